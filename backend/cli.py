@@ -0,0 +1,96 @@
+"""
+Tarefas de manutenção do banco, executadas fora do servidor web.
+
+Uso (a partir de backend/):
+    python cli.py upgrade-schema
+    python cli.py check-schema
+    python cli.py recount-active-loans
+    python cli.py rebuild-search-index
+    python cli.py apply-fines [--date AAAA-MM-DD] [--chunk-size N]
+    python cli.py points-snapshot
+    python cli.py rebuild-points [--dry-run]
+"""
+import argparse
+import sys
+from datetime import date
+from core.database import SessionLocal, engine, unit_of_work
+from core.schema import upgrade_schema, pending_changes
+from repositories import book_repository, user_repository
+from services.fine_service import apply_overdue_fines
+from services import points_service
+import models.user, models.book, models.loan, models.notification, models.points, models.catalog  # noqa: F401 (registra os mappers)
+
+def upgrade(args):
+    upgrade_schema(engine)
+    print("Esquema atualizado.")
+
+def check(args):
+    pending = pending_changes(engine)
+    for change in pending:
+        print(f"Pendente: {change}")
+    print("Esquema desatualizado; rode `python cli.py upgrade-schema`." if pending else "Esquema atualizado.")
+    if pending:
+        sys.exit(1)
+
+def recount_active_loans(args):
+    with SessionLocal() as db, unit_of_work(db):
+        fixed = user_repository.recount_active_loans(db)
+    print(f"Contadores de empréstimos ativos corrigidos: {fixed}")
+
+def rebuild_search_index(args):
+    with SessionLocal() as db:
+        book_repository.rebuild_search_index(db)
+    print("Índice de busca reconstruído a partir da tabela books.")
+
+def apply_fines(args):
+    with SessionLocal() as db:
+        report = apply_overdue_fines(db, today=args.date, chunk_size=args.chunk_size)
+    print(
+        f"Multas de {report['date']}: {report['loans']} empréstimos, {report['users']} usuários, "
+        f"{report['chunks']} blocos em {report['elapsed_seconds']}s"
+    )
+
+def points_snapshot(args):
+    with SessionLocal() as db:
+        count = points_service.take_snapshot(db)
+    print(f"Snapshots de saldo gravados: {count}")
+
+def rebuild_points(args):
+    with SessionLocal() as db:
+        count = points_service.rebuild_balances(db, dry_run=args.dry_run)
+    print(f"Saldos divergentes do razão: {count}" + (" (nada alterado)" if args.dry_run else " (corrigidos)"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do P2P Livros")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "upgrade-schema", help="cria tabelas, colunas e índices que faltam no banco"
+    ).set_defaults(func=upgrade)
+    commands.add_parser(
+        "check-schema", help="lista o que upgrade-schema aplicaria (sai com código 1 se houver algo)"
+    ).set_defaults(func=check)
+    commands.add_parser(
+        "recount-active-loans", help="recalcula users.active_loans a partir da tabela loans"
+    ).set_defaults(func=recount_active_loans)
+    commands.add_parser(
+        "rebuild-search-index", help="refaz o índice de texto (books_fts) a partir da tabela books"
+    ).set_defaults(func=rebuild_search_index)
+
+    fines = commands.add_parser("apply-fines", help="cobra a multa diária dos empréstimos atrasados")
+    fines.add_argument("--date", type=date.fromisoformat, default=None, help="dia de referência (padrão: hoje)")
+    fines.add_argument("--chunk-size", type=int, default=None)
+    fines.set_defaults(func=apply_fines)
+
+    commands.add_parser(
+        "points-snapshot", help="consolida o saldo de pontos de cada usuário até a última entrada do razão"
+    ).set_defaults(func=points_snapshot)
+    rebuild = commands.add_parser("rebuild-points", help="refaz users.points a partir do último snapshot + razão")
+    rebuild.add_argument("--dry-run", action="store_true", help="só conta os saldos divergentes")
+    rebuild.set_defaults(func=rebuild_points)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
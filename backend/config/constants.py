@@ -8,5 +8,24 @@ MIN_POINTS_TO_BORROW = 5
 MAX_ACTIVE_LOANS = 3
 LATE_FINE_PER_DAY = 1
 DEFAULT_LOAN_DAYS = 14
+MAX_CONFLICT_RETRIES = 3
+
+# Motivos das entradas do razão de pontos (points_ledger.reason)
+LEDGER_SIGNUP = "signup"
+LEDGER_OPENING_BALANCE = "opening_balance"
+LEDGER_LEND_CREDIT = "lend_credit"
+LEDGER_BORROW_DEBIT = "borrow_debit"
+LEDGER_LATE_FINE = "late_fine"
+LEDGER_ADJUSTMENT = "adjustment"
+LEDGER_PAGE_SIZE = 50
+LEDGER_MAX_PAGE_SIZE = 200
+
+BOOKS_PAGE_SIZE = 50
+BOOKS_MAX_PAGE_SIZE = 200
+
+# Paginação de GET /api/loans/my_loans e relacionamentos aceitos em `expand`
+LOANS_PAGE_SIZE = 50
+LOANS_MAX_PAGE_SIZE = 200
+LOAN_EXPANSIONS = ("book", "lender")
 
 ACCESS_TOKEN_EXPIRE = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
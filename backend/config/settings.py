@@ -1,10 +1,68 @@
 from pydantic import BaseSettings
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./p2p_books.db"
+    # Modo assíncrono (aiosqlite/asyncpg); sem ASYNC_DATABASE_URL a URL é derivada de DATABASE_URL
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Perfil de tuning do engine ("default" = padrões do SQLite, "production" = WAL etc.,
+    # as chaves de core.database.SQLITE_PROFILES); os campos DB_* abaixo, quando
+    # definidos, sobrescrevem o valor do perfil.
+    DB_PROFILE: Literal["default", "production"] = "default"
+    DB_JOURNAL_MODE: Optional[str] = None
+    DB_SYNCHRONOUS: Optional[str] = None
+    DB_BUSY_TIMEOUT_MS: Optional[int] = None
+    DB_CACHE_SIZE: Optional[int] = None
+    DB_MMAP_SIZE: Optional[int] = None
+    DB_TEMP_STORE: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Esquema na subida do servidor: "off", "check" (não sobe com o esquema desatualizado)
+    # ou "upgrade"; o passo normal é `python cli.py upgrade-schema` antes de subir os workers
+    SCHEMA_STARTUP: Literal["off", "check", "upgrade"] = "check"
     SECRET_KEY: str = "change_me"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     ALGORITHM: str = "HS256"
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+    CATALOG_CACHE_MAX_SIZE: int = 1000
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: int = 2
+    BCRYPT_MAX_QUEUE: int = 64
+    # Outbox de notificações: transporte ("console", "file" ou "smtp") e dispatcher em background
+    NOTIFY_TRANSPORT: str = "console"
+    NOTIFY_FILE_PATH: str = "./notifications.log"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 8025
+    SMTP_SENDER: str = "no-reply@p2plivros.com"
+    NOTIFY_DISPATCHER_ENABLED: bool = True
+    NOTIFY_POLL_SECONDS: float = 1.0
+    NOTIFY_BATCH_SIZE: int = 50
+    NOTIFY_MAX_ATTEMPTS: int = 5
+    NOTIFY_BACKOFF_SECONDS: float = 2.0
+    NOTIFY_BACKOFF_MAX_SECONDS: float = 300.0
+    NOTIFY_LEASE_SECONDS: int = 60
+    # Importação em massa de livros (POST /api/books/bulk)
+    BOOKS_BULK_BATCH_SIZE: int = 1000
+    BOOKS_BULK_MAX_ERRORS: int = 100
+    # Job de multas por atraso (também disponível em `python cli.py apply-fines`)
+    FINES_SCHEDULER_ENABLED: bool = False
+    FINES_INTERVAL_SECONDS: int = 3600
+    FINES_CHUNK_SIZE: int = 5000
+    # Eventos de empréstimo por SSE (GET /api/loans/events)
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    # Listas (livros, my_loans, overdue) serializadas direto das linhas com orjson,
+    # sem um modelo pydantic por item; desligado, vale a validação do response_model
+    FAST_JSON: bool = False
+    # Profiler de SQL por requisição (depuração): loga requisições lentas, N+1 e lazy loads
+    SQL_PROFILE: bool = False
+    SQL_PROFILE_SLOW_MS: float = 500.0
+    SQL_PROFILE_EXPLAIN: bool = False
+    SQL_PROFILE_REPEAT_THRESHOLD: int = 3
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config.settings import settings
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Cache LRU com tamanho máximo e expiração por tempo (`ttl` em segundos, None = sem expiração).
+    Seguro para uso entre as threads do threadpool do FastAPI; conta acertos e falhas.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._data)
+
+# Identidade do usuário autenticado (id -> UserOut), usada por get_current_user.
+user_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+# Respostas serializadas de GET /api/books/ (ETag -> (corpo, headers)). A versão
+# do catálogo faz parte do ETag, então entradas antigas só saem por LRU.
+catalog_cache = TTLCache(settings.CATALOG_CACHE_MAX_SIZE)
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Compara com o header If-None-Match (lista separada por vírgulas, '*' ou ETags fracos W/)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+_PENDING_USERS = "user_cache_invalidations"
+
+def invalidate_user_on_commit(db: Session, user_id: int):
+    """
+    Tira o usuário do cache agora e de novo quando a transação terminar, para
+    que uma requisição concorrente não guarde a versão antiga antes do commit.
+    """
+    user_cache.invalidate(user_id)
+    db.info.setdefault(_PENDING_USERS, set()).add(user_id)
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _flush_user_invalidations(session):
+    for user_id in session.info.pop(_PENDING_USERS, ()):
+        user_cache.invalidate(user_id)
@@ -1,14 +1,216 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import asyncio
+import time
+from contextlib import contextmanager
+from functools import wraps
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
 from config.settings import settings
+from config.constants import MAX_CONFLICT_RETRIES
+from core import metrics, profiler
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# PRAGMAs aplicados em cada conexão SQLite nova, por perfil.
+SQLITE_PROFILES = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",       # leitores não bloqueiam o escritor
+        "synchronous": "NORMAL",     # seguro com WAL; fsync só no checkpoint
+        "busy_timeout": 5000,        # espera o lock em vez de "database is locked"
+        "cache_size": -65536,        # 64 MiB (valor negativo = KiB)
+        "mmap_size": 268435456,      # 256 MiB
+        "temp_store": "MEMORY",
+    },
+}
+
+def sqlite_pragmas(profile: str = None) -> dict:
+    """PRAGMAs do perfil, com as sobrescritas DB_* de Settings aplicadas."""
+    pragmas = dict(SQLITE_PROFILES[profile or settings.DB_PROFILE])
+    overrides = {
+        "journal_mode": settings.DB_JOURNAL_MODE,
+        "synchronous": settings.DB_SYNCHRONOUS,
+        "busy_timeout": settings.DB_BUSY_TIMEOUT_MS,
+        "cache_size": settings.DB_CACHE_SIZE,
+        "mmap_size": settings.DB_MMAP_SIZE,
+        "temp_store": settings.DB_TEMP_STORE,
+    }
+    pragmas.update({name: value for name, value in overrides.items() if value is not None})
+    return pragmas
+
+class _TimedCheckout:
+    """Mede em `db_pool_checkout_wait_seconds` quanto cada checkout esperou por uma conexão."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.pool_wait.observe(time.perf_counter() - start)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+def engine_options(url: str, profile: str = None) -> dict:
+    """Argumentos de create_engine/create_async_engine para a URL e o perfil."""
+    parsed = make_url(url)
+    poolclass = TimedAsyncQueuePool if parsed.get_dialect().is_async else TimedQueuePool
+    if parsed.get_backend_name() == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+        if parsed.database not in (None, "", ":memory:"):
+            options.update(
+                poolclass=poolclass, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW
+            )
+        return options
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+def apply_profile(engine, profile: str = None):
+    """Registra o evento "connect" que aplica os PRAGMAs do perfil (só SQLite)."""
+    if engine.dialect.name != "sqlite":
+        return engine
+    pragmas = sqlite_pragmas(profile)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+# Contagem e tempo de SQL para /metrics: todo comando, de qualquer engine (o
+# async executa pelo sync_engine), e também por requisição via `metrics.request_sql`;
+# com o profiler ativo (SQL_PROFILE ou `query_budget`), o comando em si é registrado.
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info["statement_start"] = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("statement_start", time.perf_counter())
+    metrics.sql_latency.observe(elapsed)
+    sql = metrics.request_sql.get()
+    if sql is not None:
+        sql[0] += 1
+        sql[1] += elapsed
+    profiler.record(statement, parameters, elapsed)
+
+def build_engine(url: str, profile: str = None):
+    return apply_profile(create_engine(url, **engine_options(url, profile)), profile)
+
+# expire_on_commit=False: o objeto devolvido pelo serviço já tem os valores que
+# a resposta precisa, sem um SELECT extra (nem lazy load fora da sessão no modo async).
+engine = build_engine(settings.DATABASE_URL)
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
 Base = declarative_base()
 
-def get_db():
+def async_database_url(url: str) -> str:
+    """Troca o driver síncrono da URL pelo equivalente assíncrono (aiosqlite / asyncpg)."""
+    drivers = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+    scheme, sep, rest = url.partition("://")
+    return drivers.get(scheme.split("+")[0], scheme) + sep + rest
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    _async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+    apply_profile(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependência usada pelos routers; o modo é escolhido por Settings.DB_ASYNC.
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Executa `fn(session, *args)` (repositórios e serviços são escritos sobre a
+    Session síncrona) sem bloquear o event loop: com AsyncSession roda via
+    `run_sync` sobre o driver assíncrono; com Session comum, no threadpool.
+
+    `run_sync` roda na thread do event loop, então serviços com
+    `retry_on_conflict` têm as tentativas refeitas aqui, esperando o backoff
+    com asyncio.sleep em vez do time.sleep do decorator.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    operation = getattr(fn, "retried_operation", None)
+    if operation is None:
+        return await db.run_sync(fn, *args, **kwargs)
+    for attempt in range(MAX_CONFLICT_RETRIES):
+        try:
+            return await db.run_sync(operation, *args, **kwargs)
+        except StaleDataError:
+            await asyncio.sleep(conflict_backoff(attempt))
+    raise ValueError(CONFLICT_MESSAGE)
+
+async def release_db(db):
+    """
+    Devolve a conexão da sessão ao pool. Usado por respostas longas (SSE), que
+    só precisam do banco para autenticar e não devem prender uma conexão.
+    """
+    if isinstance(db, Session):
+        db.close()
+    else:
+        await db.close()
+
+@contextmanager
+def unit_of_work(db: Session):
+    """
+    Transação de uma operação de serviço. Os repositórios só registram as
+    alterações na sessão; aqui há um único commit no fim, ou rollback de tudo
+    se algo falhar no meio.
+    """
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+
+CONFLICT_MESSAGE = "Conflito de concorrência, tente novamente."
+
+def conflict_backoff(attempt: int) -> float:
+    return 0.01 * 2 ** attempt
+
+def retry_on_conflict(operation):
+    """
+    Reexecuta a operação quando o commit detecta que outra transação alterou
+    as mesmas linhas (StaleDataError da coluna de versão). O unit_of_work já
+    fez rollback, então a nova tentativa relê tudo do banco. O time.sleep do
+    backoff só roda no threadpool ou fora da API; com AsyncSession quem refaz
+    as tentativas é `run_db` (via `wrapper.retried_operation`).
+    """
+    @wraps(operation)
+    def wrapper(db: Session, *args, **kwargs):
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            try:
+                return operation(db, *args, **kwargs)
+            except StaleDataError:
+                time.sleep(conflict_backoff(attempt))
+        raise ValueError(CONFLICT_MESSAGE)
+    wrapper.retried_operation = operation
+    return wrapper
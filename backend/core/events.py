@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config.settings import settings
+
+class Subscription:
+    """
+    Fila de eventos de uma conexão (SSE). A fila é limitada: se o cliente não
+    consome, os eventos novos são descartados e `lagged` fica True para que a
+    conexão avise o cliente de que precisa recarregar o estado.
+    """
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.lagged = False
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+class EventBroker:
+    """Pub/sub em memória por usuário; `publish` pode ser chamado de qualquer thread."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped = 0
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.user_id, None)
+
+    def publish(self, user_ids, item: dict):
+        with self._lock:
+            targets = [s for user_id in set(user_ids) for s in self._subscribers.get(user_id, ())]
+        self.published += 1
+        for subscription in targets:
+            if subscription.queue.full():
+                self.dropped += 1
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is subscription.loop:
+                subscription._put(item)
+            else:
+                subscription.loop.call_soon_threadsafe(subscription._put, item)
+
+    def stats(self) -> dict:
+        with self._lock:
+            connections = sum(len(s) for s in self._subscribers.values())
+            users = len(self._subscribers)
+        return {"connections": connections, "users": users, "published": self.published, "dropped": self.dropped}
+
+broker = EventBroker(settings.EVENTS_QUEUE_SIZE)
+
+_PENDING_EVENTS = "pending_events"
+
+def publish_on_commit(db: Session, user_ids, item):
+    """
+    Agenda o evento para depois do commit; se a transação for desfeita, nada é
+    publicado. `item` pode ser um callable, montado no flush (quando os ids
+    gerados pelo banco já existem) ou, se agendado depois do último flush, no
+    commit.
+    """
+    db.info.setdefault(_PENDING_EVENTS, []).append((tuple(user_ids), item))
+
+@event.listens_for(Session, "after_flush")
+def _build_pending(session, flush_context):
+    pending = session.info.get(_PENDING_EVENTS)
+    if pending:
+        session.info[_PENDING_EVENTS] = [(user_ids, item() if callable(item) else item) for user_ids, item in pending]
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for user_ids, item in session.info.pop(_PENDING_EVENTS, ()):
+        broker.publish(user_ids, item() if callable(item) else item)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_EVENTS, None)
@@ -8,3 +8,6 @@ def bad_request(detail="Bad request"):
 
 def unauthorized(detail="Unauthorized"):
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+def service_unavailable(detail="Service unavailable"):
+    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers={"Retry-After": "1"})
@@ -0,0 +1,231 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Métricas no formato texto do Prometheus, sem dependência externa. Séries
+# atualizadas de várias threads (SQL, bcrypt, pool) usam um lock por série; as
+# do middleware HTTP só mudam na thread do event loop e dispensam o lock
+# (`single_thread=True`), o que mantém o custo por requisição em poucos µs.
+
+REGISTRY = []
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=(), single_thread: bool = False):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.single_thread = single_thread
+        self._children = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+class _LoopValue(_Value):
+    __slots__ = ()
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _LoopValue() if self.single_thread else _Value()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}"]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+class _LoopBuckets(_Buckets):
+    __slots__ = ()
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS, single_thread: bool = False):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames, single_thread)
+
+    def _new_child(self):
+        return _LoopBuckets(self.buckets) if self.single_thread else _Buckets(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(child.sum)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+http_requests = Counter(
+    "http_requests_total", "Requisições HTTP por rota e status.", ("method", "route", "status"), single_thread=True
+)
+http_latency = Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP.", ("method", "route"), single_thread=True
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requisições HTTP em andamento.", single_thread=True)
+request_statements = Histogram(
+    "http_request_db_statements", "Comandos SQL por requisição.", ("route",), buckets=COUNT_BUCKETS, single_thread=True
+)
+request_sql_time = Histogram("http_request_db_seconds", "Tempo em SQL por requisição.", ("route",), single_thread=True)
+sql_latency = Histogram("db_statement_duration_seconds", "Duração de cada comando SQL.")
+pool_wait = Histogram("db_pool_checkout_wait_seconds", "Espera por uma conexão do pool.")
+bcrypt_latency = Histogram("bcrypt_duration_seconds", "Tempo de cálculo do bcrypt (hash/verificação).")
+bcrypt_queue_wait = Histogram("bcrypt_queue_wait_seconds", "Espera na fila do pool de bcrypt.")
+notification_queue = Gauge("notification_queue_depth", "Notificações na outbox por status.", ("status",))
+
+# [comandos, segundos] da requisição atual; o contexto é copiado para o
+# threadpool, então os eventos do engine enxergam a mesma lista.
+request_sql = ContextVar("request_sql", default=None)
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: latência, status e SQL por template de rota (ex.:
+    /api/loans/{loan_id}/confirm), nunca pelo caminho concreto, para que a
+    cardinalidade não cresça com os ids. Requisições sem rota contam como
+    "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._in_flight = http_in_flight.labels()
+        self._series = {}
+
+    def _series_for(self, method: str, template: str, status: int):
+        key = (method, template, status)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = (
+                http_requests.labels(method, template, status),
+                http_latency.labels(method, template),
+                request_statements.labels(template),
+                request_sql_time.labels(template),
+            )
+        return series
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        sql = [0, 0.0]
+        token = request_sql.set(sql)
+        in_flight = self._in_flight
+        in_flight.value += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.value -= 1
+            request_sql.reset(token)
+            route = scope.get("route")
+            requests, latency, statements, sql_time = self._series_for(
+                scope["method"], route.path if route is not None else "unmatched", status
+            )
+            requests.value += 1
+            latency.observe(elapsed)
+            statements.observe(sql[0])
+            sql_time.observe(sql[1])
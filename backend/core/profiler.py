@@ -0,0 +1,172 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_ROW_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+def fingerprint(statement: str) -> str:
+    """
+    Forma normalizada do SQL: literais viram `?` e listas de parâmetros (IN,
+    VALUES de várias linhas) viram `(...)`, então o mesmo comando com valores
+    diferentes tem o mesmo fingerprint.
+    """
+    text = _SPACE.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(...)", text)
+    return _ROW_LIST.sub("(...)", text)
+
+class QueryProfile:
+    """Comandos SQL (com tempo) e lazy loads de relacionamento registrados durante uma requisição ou bloco."""
+
+    def __init__(self):
+        self.statements = []
+        self.lazy_loads = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(elapsed for _, _, elapsed in self.statements)
+
+    def fingerprints(self) -> Counter:
+        return Counter(fingerprint(statement) for statement, _, _ in self.statements)
+
+    def repeated(self, threshold: int) -> dict:
+        """Fingerprints executados `threshold` vezes ou mais: o padrão típico de N+1."""
+        return {fp: n for fp, n in self.fingerprints().items() if n >= threshold}
+
+    def slowest(self, limit: int):
+        return sorted(self.statements, key=lambda s: s[2], reverse=True)[:limit]
+
+    def report(self, limit: int = 10) -> str:
+        """Resumo por fingerprint, do que gastou mais tempo para o que gastou menos."""
+        totals = {}
+        for statement, _, elapsed in self.statements:
+            fp = fingerprint(statement)
+            count, seconds = totals.get(fp, (0, 0.0))
+            totals[fp] = (count + 1, seconds + elapsed)
+        lines = [f"{self.count} comandos, {self.seconds * 1000:.1f}ms em SQL"]
+        for fp, (count, seconds) in sorted(totals.items(), key=lambda t: t[1][1], reverse=True)[:limit]:
+            lines.append(f"  {count:>4}x {seconds * 1000:8.2f}ms  {fp}")
+        if self.lazy_loads:
+            lines.append(f"  lazy loads: {', '.join(sorted(set(self.lazy_loads)))}")
+        return "\n".join(lines)
+
+# Perfil da requisição atual (middleware) e perfis abertos por `query_budget`,
+# que recebem todos os comandos do processo enquanto o bloco está ativo.
+current_profile = ContextVar("current_profile", default=None)
+collectors = []
+
+def record(statement: str, parameters, elapsed: float):
+    """Chamado pelo evento after_cursor_execute de core/database."""
+    profile = current_profile.get()
+    if profile is not None:
+        profile.statements.append((statement, parameters, elapsed))
+    if collectors:
+        for collector in tuple(collectors):
+            collector.statements.append((statement, parameters, elapsed))
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_lazy_load(orm_execute_state):
+    profile = current_profile.get()
+    if profile is None and not collectors:
+        return
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+    relationship = str(orm_execute_state.loader_strategy_path[-1])
+    for target in ([profile] if profile is not None else []) + list(collectors):
+        target.lazy_loads.append(relationship)
+
+@contextmanager
+def query_budget(max_statements: int, repeat_threshold: int = None, allow_lazy_loads: bool = False):
+    """
+    Para testes: falha (AssertionError com o resumo) se o bloco executar mais
+    de `max_statements` comandos, repetir um fingerprint `repeat_threshold`
+    vezes ou fizer lazy load de relacionamento. Conta comandos de qualquer
+    thread, inclusive os da aplicação chamada pelo TestClient.
+    """
+    profile = QueryProfile()
+    collectors.append(profile)
+    try:
+        yield profile
+    finally:
+        collectors.remove(profile)
+    problems = []
+    if profile.count > max_statements:
+        problems.append(f"{profile.count} comandos SQL (orçamento: {max_statements})")
+    if repeat_threshold and profile.repeated(repeat_threshold):
+        problems.append(f"comandos repetidos (N+1): {profile.repeated(repeat_threshold)}")
+    if profile.lazy_loads and not allow_lazy_loads:
+        problems.append(f"lazy loads: {sorted(set(profile.lazy_loads))}")
+    if problems:
+        raise AssertionError("; ".join(problems) + "\n" + profile.report())
+
+def explain(engine, statement: str, parameters) -> str:
+    """Plano de execução de um SELECT (EXPLAIN QUERY PLAN no SQLite, EXPLAIN nos demais)."""
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+    return "\n".join("    " + " | ".join(str(value) for value in row) for row in rows)
+
+class SqlProfilerMiddleware:
+    """
+    Modo de depuração (SQL_PROFILE): registra os comandos de cada requisição e
+    loga (logger `core.profiler`) as lentas (>= `slow_ms`) e as com N+1 ou lazy
+    loads, com o resumo por fingerprint e, se `explain`, o plano dos SELECTs
+    mais lentos. Tem custo de regex por comando; não é para produção.
+    """
+
+    def __init__(self, app, engine=None, slow_ms: float = 500, explain: bool = False, repeat_threshold: int = 3):
+        self.app = app
+        self.engine = engine
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = QueryProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_profile.reset(token)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            await self._log(scope, profile, elapsed_ms)
+
+    async def _log(self, scope, profile: QueryProfile, elapsed_ms: float):
+        repeated = profile.repeated(self.repeat_threshold)
+        slow = elapsed_ms >= self.slow_ms
+        if not (slow or repeated or profile.lazy_loads):
+            return
+        flags = [label for label, on in (("lenta", slow), ("N+1", repeated), ("lazy load", profile.lazy_loads)) if on]
+        route = scope.get("route")
+        message = (
+            f"{scope['method']} {route.path if route is not None else scope['path']} "
+            f"{elapsed_ms:.1f}ms [{', '.join(flags)}]\n{profile.report()}"
+        )
+        if slow and self.explain and self.engine is not None:
+            for statement, parameters, elapsed in profile.slowest(3):
+                if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                    plan = await run_in_threadpool(explain, self.engine, statement, parameters)
+                    message += f"\n  plano ({elapsed * 1000:.2f}ms) {fingerprint(statement)}\n{plan}"
+        logger.warning(message)
@@ -0,0 +1,84 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+from core.database import Base
+from repositories.book_repository import ensure_search_index
+from repositories.user_repository import recount_active_loans
+from repositories.points_repository import backfill_opening_balances
+# Todas as tabelas no metadata, para quem chama daqui (cli, benchmarks) não depender do que já importou
+import models.user, models.book, models.loan, models.notification, models.points, models.catalog  # noqa: F401
+
+# Preenchem colunas desnormalizadas recém-adicionadas a partir dos dados
+# existentes; a chave (tabela, None) roda quando a tabela inteira é nova
+BACKFILLS = {
+    ("users", "active_loans"): recount_active_loans,
+    ("points_ledger", None): backfill_opening_balances,
+}
+
+def upgrade_schema(engine: Engine):
+    """
+    Leva um banco existente ao esquema atual dos models: cria as tabelas que
+    faltam e adiciona com ALTER TABLE as colunas novas (que precisam ter
+    `server_default` ou aceitar NULL) e os índices declarados que faltam;
+    também cria o índice de busca textual se ele não existir. Pode ser
+    executado várias vezes.
+    """
+    existing_tables = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    added = [(table.name, None) for table in Base.metadata.sorted_tables if table.name not in existing_tables]
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                    added.append((table.name, column.name))
+            indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(bind=conn)
+    with Session(engine) as db:
+        for key in added:
+            if key in BACKFILLS:
+                BACKFILLS[key](db)
+        db.commit()
+        ensure_search_index(db)
+
+def pending_changes(engine: Engine) -> list[str]:
+    """O que `upgrade_schema` ainda criaria no banco (tabelas, colunas e índices); vazio = atualizado."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    pending = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            pending.append(f"tabela {table.name}")
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        pending += [f"coluna {table.name}.{c.name}" for c in table.columns if c.name not in columns]
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        pending += [f"índice {i.name}" for i in table.indexes if i.name not in indexes]
+    if engine.dialect.name == "sqlite" and "books_fts" not in tables:
+        pending.append("índice de busca books_fts")
+    return pending
+
+def startup_check(engine: Engine, mode: str):
+    """
+    Passo de esquema na subida do servidor (Settings.SCHEMA_STARTUP): "off" não
+    toca no banco, "check" recusa subir (RuntimeError) se falta aplicar algo e
+    "upgrade" roda `upgrade_schema`. Em produção o esquema é atualizado antes do
+    deploy com `python cli.py upgrade-schema`, então os workers sobem sem DDL.
+    """
+    if mode == "upgrade":
+        upgrade_schema(engine)
+    elif mode == "check":
+        pending = pending_changes(engine)
+        if pending:
+            raise RuntimeError(
+                f"Esquema do banco desatualizado ({', '.join(pending)}); rode `python cli.py upgrade-schema` "
+                "ou suba com SCHEMA_STARTUP=upgrade."
+            )
+    elif mode != "off":
+        raise ValueError(f"SCHEMA_STARTUP inválido: {mode!r} (use off, check ou upgrade)")
@@ -1,27 +1,93 @@
-from passlib.context import CryptContext
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime, timedelta
-from jose import jwt
 from config.settings import settings
+from core import metrics
 from typing import Optional
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib/bcrypt e jose só são importados no primeiro uso: a maior parte das
+# requisições não faz hash de senha, e o import deles pesa na subida de cada worker.
 
-def hash_password(password: str) -> str:
+@lru_cache(maxsize=None)
+def _crypt_context():
+    from passlib.context import CryptContext
+
+    # `min_rounds` igual ao custo atual faz hashes antigos (custo menor) serem
+    # marcados para atualização em verify_and_update.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    )
+
+def __getattr__(name):
+    # `core.security.pwd_context` continua disponível, criado sob demanda
+    if name == "pwd_context":
+        return _crypt_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class HashingBusyError(RuntimeError):
+    """Fila do pool de bcrypt cheia; a requisição deve ser recusada (503) em vez de esperar."""
+
+# O bcrypt roda num pool próprio e pequeno: logins concorrentes disputam só estes
+# workers e o resto das requisições continua tendo CPU e threads livres.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(settings.BCRYPT_WORKERS + settings.BCRYPT_MAX_QUEUE)
+
+def _timed(fn, queued_at, *args):
+    started = time.perf_counter()
+    metrics.bcrypt_queue_wait.observe(started - queued_at)
+    try:
+        return fn(*args)
+    finally:
+        metrics.bcrypt_latency.observe(time.perf_counter() - started)
+
+def _submit(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingBusyError("Servidor ocupado, tente novamente em instantes.")
+    try:
+        future = _hash_executor.submit(_timed, fn, time.perf_counter(), *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
+def _truncate(password: str) -> str:
     # Bcrypt tem limite de 72 bytes, truncar se necessário
     password_bytes = password.encode('utf-8')
     if len(password_bytes) > 72:
         # Truncar em bytes, não em caracteres
         password = password_bytes[:72].decode('utf-8', errors='ignore')
-    return pwd_context.hash(password)
+    return password
+
+def hash_password(password: str) -> str:
+    return _submit(_crypt_context().hash, _truncate(password)).result()
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return _submit(_crypt_context().verify, plain, hashed).result()
+
+def verify_and_update(plain: str, hashed: str) -> tuple[bool, Optional[str]]:
+    """Verifica a senha e, se o hash usa um custo antigo, devolve o novo hash para ser salvo."""
+    return _submit(_crypt_context().verify_and_update, plain, hashed).result()
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit(_crypt_context().hash, _truncate(password)))
+
+async def verify_and_update_async(plain: str, hashed: str) -> tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(_submit(_crypt_context().verify_and_update, plain, hashed))
 
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = {"sub": str(subject)}
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
+    from jose import jwt
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 def decode_token(token: str) -> dict:
+    from jose import jwt
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -0,0 +1,74 @@
+import json
+from datetime import date
+from functools import lru_cache
+from operator import attrgetter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+from config.settings import settings
+
+try:
+    import orjson
+except ImportError:  # opcional: sem orjson o modo rápido usa o json da stdlib
+    orjson = None
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} não é serializável em JSON")
+
+def dumps(content) -> bytes:
+    """JSON compacto em UTF-8, igual ao do JSONResponse do FastAPI."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class FastJSONResponse(Response):
+    """Resposta JSON serializada com orjson (ou stdlib), sem passar pelo jsonable_encoder."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+@lru_cache(maxsize=None)
+def compile_serializer(model):
+    """
+    Função objeto -> dict com os campos de `model` (um schema orm_mode), lidos
+    direto dos atributos de uma entidade ou Row, sem instanciar o modelo nem
+    validar tipos. Campos que são outros schemas viram dicts (ou None).
+    """
+    simple, rest = [], []
+    for name, field in model.__fields__.items():
+        if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+            rest.append((name, compile_serializer(field.type_)))
+        else:
+            simple.append(name)
+    get_simple = attrgetter(*simple) if len(simple) > 1 else (lambda obj: (getattr(obj, simple[0]),))
+    # Os campos simples são lidos de uma vez; se algum vier depois de um aninhado
+    # no schema, a ordem das chaves é refeita para ficar igual à do pydantic
+    order = list(model.__fields__)
+    reorder = order != simple + [name for name, _ in rest]
+
+    def serialize(obj) -> dict:
+        item = dict(zip(simple, get_simple(obj)))
+        for name, child in rest:
+            value = getattr(obj, name)
+            item[name] = None if value is None else child(value)
+        return {name: item[name] for name in order} if reorder else item
+
+    return serialize
+
+def serialize_list(model, items) -> list:
+    serialize = compile_serializer(model)
+    return [serialize(item) for item in items]
+
+def render_list(model, items) -> bytes:
+    """
+    Corpo JSON de uma lista de `model`. Com FAST_JSON usa o serializador
+    compilado + orjson; senão, o caminho padrão (um modelo pydantic por item
+    e json da stdlib), que valida os tipos de cada linha.
+    """
+    if settings.FAST_JSON:
+        return dumps(serialize_list(model, items))
+    return JSONResponse(jsonable_encoder([model.from_orm(item) for item in items])).body
@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config.settings import settings
-from core.database import Base, engine
+from core.database import engine
+from core.metrics import MetricsMiddleware
+from core.profiler import SqlProfilerMiddleware
+from core.schema import startup_check
 from routers import users as users_router, books as books_router, loans as loans_router
-
-Base.metadata.create_all(bind=engine)
+from routers import notifications as notifications_router, metrics as metrics_router
+from services.notification_service import dispatcher
+from services.fine_service import scheduler as fine_scheduler
 
 app = FastAPI(title="P2P Livros — Backend Modular", version="1.0")
 
@@ -15,11 +19,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
 )
+app.add_middleware(MetricsMiddleware)
+if settings.SQL_PROFILE:
+    app.add_middleware(
+        SqlProfilerMiddleware,
+        engine=engine,
+        slow_ms=settings.SQL_PROFILE_SLOW_MS,
+        explain=settings.SQL_PROFILE_EXPLAIN,
+        repeat_threshold=settings.SQL_PROFILE_REPEAT_THRESHOLD,
+    )
 
 app.include_router(users_router.router, prefix="/api/users", tags=["users"])
 app.include_router(books_router.router, prefix="/api/books", tags=["books"])
 app.include_router(loans_router.router, prefix="/api/loans", tags=["loans"])
+app.include_router(notifications_router.router, prefix="/api/notifications", tags=["notifications"])
+app.include_router(metrics_router.router, tags=["metrics"])
+
+@app.on_event("startup")
+def check_schema():
+    startup_check(engine, settings.SCHEMA_STARTUP)
+
+@app.on_event("startup")
+def start_background_jobs():
+    if settings.NOTIFY_DISPATCHER_ENABLED:
+        dispatcher.start()
+    if settings.FINES_SCHEDULER_ENABLED:
+        fine_scheduler.start()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    dispatcher.stop()
+    fine_scheduler.stop()
 
 @app.get("/")
 def root():
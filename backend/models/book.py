@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DDL, event
 from sqlalchemy.orm import relationship
 from core.database import Base
 
@@ -10,5 +10,29 @@ class Book(Base):
     condition = Column(String, default="Bom")
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     available = Column(Boolean, default=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     owner = relationship("User", back_populates="owned_books")
+
+    # Controle de concorrência otimista: o UPDATE inclui "WHERE version = ?" e
+    # falha com StaleDataError se outra transação alterou o livro antes.
+    __mapper_args__ = {"version_id_col": version}
+
+# Índice de texto (SQLite FTS5) sobre título e autor. É uma tabela "external content":
+# guarda só o índice invertido e é mantida em sincronia com `books` por triggers,
+# então qualquer INSERT/UPDATE/DELETE (inclusive fora do ORM) atualiza a busca.
+BOOKS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+    "title, author, content='books', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN "
+    "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); "
+    "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+]
+
+for statement in BOOKS_FTS_DDL:
+    event.listen(Book.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Book.__table__, "before_drop", DDL("DROP TABLE IF EXISTS books_fts").execute_if(dialect="sqlite"))
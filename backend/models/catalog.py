@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DDL, event
+from core.database import Base
+
+class CatalogVersion(Base):
+    """
+    Linha única (id = 1) com a versão do catálogo de livros. Sobe na mesma
+    transação de qualquer mudança visível em GET /api/books/ (livro novo ou
+    disponibilidade alterada) e compõe o ETag dessa listagem.
+    """
+    __tablename__ = "catalog_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 1)"),
+)
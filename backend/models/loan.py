@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
 
+ACTIVE_ONLY = text("status = 'active'")
+
 class Loan(Base):
     __tablename__ = "loans"
     id = Column(Integer, primary_key=True, index=True)
@@ -14,7 +16,25 @@ class Loan(Base):
     due_date = Column(Date)
     returned_date = Column(Date)
     status = Column(String, default="requested")
+    # Último dia já cobrado em multa (job diário ou devolução); None = nada cobrado
+    fined_through = Column(Date)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     book = relationship("Book")
     lender = relationship("User", foreign_keys=[lender_id], back_populates="loans_lent")
     borrower = relationship("User", foreign_keys=[borrower_id], back_populates="loans_borrowed")
+
+    # Índices das consultas quentes de loan_repository. Os parciais só guardam
+    # empréstimos ativos, então continuam pequenos conforme o histórico cresce;
+    # para o planner usá-los, a consulta precisa ter status = 'active' literal.
+    __table_args__ = (
+        Index("ix_loans_borrower_status", "borrower_id", "status"),
+        Index("ix_loans_status_due_date", "status", "due_date"),
+        Index("ix_loans_lender_status", "lender_id", "status"),
+        Index("ix_loans_active_borrower", "borrower_id", sqlite_where=ACTIVE_ONLY, postgresql_where=ACTIVE_ONLY),
+        Index("ix_loans_active_due_date", "due_date", sqlite_where=ACTIVE_ONLY, postgresql_where=ACTIVE_ONLY),
+    )
+
+    # O job de multas altera loans em massa; a versão faz uma devolução
+    # concorrente com dados antigos falhar e ser reexecutada (retry_on_conflict)
+    __mapper_args__ = {"version_id_col": version}
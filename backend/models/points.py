@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from core.database import Base
+
+class PointsEntry(Base):
+    """
+    Razão (ledger) de pontos, só de inserção: cada crédito, débito e multa vira
+    uma linha na mesma transação que altera `User.points`, que passa a ser o
+    saldo materializado da soma dessas linhas.
+    """
+    __tablename__ = "points_ledger"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    delta = Column(Integer, nullable=False)
+    reason = Column(String, nullable=False)
+    loan_id = Column(Integer, ForeignKey("loans.id"))
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_points_ledger_user_id", "user_id", "id"),
+    )
+
+class PointsSnapshot(Base):
+    """Saldo de um usuário consolidado até a entrada `ledger_id` do razão (inclusive)."""
+    __tablename__ = "points_snapshots"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    balance = Column(Integer, nullable=False)
+    ledger_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_points_snapshots_user_id", "user_id", "id"),
+    )
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 from core.database import Base
+from models.points import PointsEntry  # noqa: F401 (alvo de User.points_entries)
 from config.constants import INITIAL_POINTS
 
 class User(Base):
@@ -10,7 +11,16 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
     points = Column(Integer, default=INITIAL_POINTS)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Contador desnormalizado de empréstimos com status 'active' como tomador,
+    # mantido na mesma transação de confirm/return (ver user_repository.recount_active_loans)
+    active_loans = Column(Integer, nullable=False, default=0, server_default="0")
 
     owned_books = relationship("Book", back_populates="owner")
     loans_borrowed = relationship("Loan", back_populates="borrower", foreign_keys="Loan.borrower_id")
     loans_lent = relationship("Loan", back_populates="lender", foreign_keys="Loan.lender_id")
+    # Só para gravar entradas junto com o usuário novo; ler o razão inteiro por aqui
+    # é proibido (lazy="raise"), o extrato é paginado em points_repository.get_page
+    points_entries = relationship("PointsEntry", lazy="raise")
+
+    __mapper_args__ = {"version_id_col": version}
@@ -1,25 +1,127 @@
-from sqlalchemy.orm import Session
-from models.book import Book
+import re
+from sqlalchemy import func, text, and_, or_, column, table, insert, false
+from sqlalchemy.orm import Session, joinedload
+from models.book import Book, BOOKS_FTS_DDL
+
+books_fts = table("books_fts", column("rowid"), column("rank"))
+
+# Colunas de BookOut: as listagens só leem estas, então search_rows não carrega entidades
+ROW_COLUMNS = (Book.id, Book.title, Book.author, Book.condition, Book.owner_id, Book.available)
 
 def create(db: Session, book: Book):
     db.add(book)
-    db.commit()
-    db.refresh(book)
     return book
 
+def bulk_create(db: Session, rows: list):
+    """INSERT em lote (executemany) a partir de dicts, sem criar objetos Book."""
+    if rows:
+        db.execute(insert(Book), rows)
+    return len(rows)
+
 def get(db: Session, book_id: int):
     return db.query(Book).get(book_id)
 
-def search(db: Session, q=None, author=None):
-    query = db.query(Book)
-    if q:
-        query = query.filter(Book.title.ilike(f"%{q}%"))
-    if author:
-        query = query.filter(Book.author.ilike(f"%{author}%"))
+def get_many(db: Session, book_ids):
+    return db.query(Book).filter(Book.id.in_(book_ids)).all()
+
+def get_with_owner(db: Session, book_id: int):
+    """Livro e dono num único SELECT (evita o lazy load de `book.owner`)."""
+    return db.query(Book).options(joinedload(Book.owner)).filter(Book.id == book_id).first()
+
+def _uses_fts(db: Session):
+    return db.get_bind().dialect.name == "sqlite"
+
+def _fts_match(q=None, author=None):
+    """
+    Monta a expressão MATCH do FTS5: cada palavra vira um prefixo ("pyth"*)
+    e as palavras de cada campo precisam aparecer todas (AND implícito).
+    None quando não há nenhuma palavra (sem termos ou só pontuação).
+    """
+    parts = []
+    for field, value in (("title", q), ("author", author)):
+        words = re.findall(r"\w+", value or "")
+        if words:
+            parts.append(f"{field} : (" + " ".join(f'"{w}"*' for w in words) + ")")
+    return " AND ".join(parts) or None
+
+def _filtered(db: Session, query, q=None, author=None, available=None, owner_id=None):
+    match = None
+    if _uses_fts(db):
+        match = _fts_match(q, author)
+        if match:
+            query = query.join(books_fts, books_fts.c.rowid == Book.id).filter(text("books_fts MATCH :match"))
+        elif q or author:
+            # Termo sem nenhuma palavra (ex.: "!!!") não casa com nada, em vez de listar o catálogo todo
+            query = query.filter(false())
+    else:
+        if q:
+            query = query.filter(Book.title.ilike(f"%{q}%"))
+        if author:
+            query = query.filter(Book.author.ilike(f"%{author}%"))
+    if available is not None:
+        query = query.filter(Book.available == available)
+    if owner_id is not None:
+        query = query.filter(Book.owner_id == owner_id)
+    return query, match
+
+def search_rows(db: Session, q=None, author=None, available=None, owner_id=None, after_id=None, limit=None):
+    """
+    Lista livros paginando por cursor (keyset) a partir de `after_id`.
+
+    Sem busca textual a ordem é por id. Com busca (`q`/`author`) a ordem é por
+    relevância (bm25) e depois id; o cursor continua sendo o id do último livro
+    da página anterior, e o rank dele é recalculado para continuar de onde parou
+    (ValueError se esse livro não casa mais com a busca).
+    Só leitura: seleciona apenas as colunas de BookOut e retorna Rows (tuplas
+    nomeadas), que não entram no identity map da sessão.
+    """
+    query, match = _filtered(db, db.query(*ROW_COLUMNS), q, author, available, owner_id)
+    if match:
+        if after_id is not None:
+            cursor_rank = db.execute(
+                text("SELECT rank FROM books_fts WHERE books_fts MATCH :match AND rowid = :id"),
+                {"match": match, "id": after_id},
+            ).scalar()
+            if cursor_rank is None:
+                # O livro do cursor não casa mais com a busca (título mudou, id
+                # inventado): sem o rank dele não há onde continuar na ordem por relevância
+                raise ValueError("Cursor de busca inválido; refaça a busca sem after_id.")
+            query = query.filter(or_(
+                books_fts.c.rank > cursor_rank,
+                and_(books_fts.c.rank == cursor_rank, Book.id > after_id),
+            ))
+        query = query.order_by(books_fts.c.rank, Book.id).params(match=match)
+    else:
+        if after_id is not None:
+            query = query.filter(Book.id > after_id)
+        query = query.order_by(Book.id)
+    if limit is not None:
+        query = query.limit(limit)
     return query.all()
 
+def count(db: Session, q=None, author=None, available=None, owner_id=None):
+    query, match = _filtered(db, db.query(func.count(Book.id)), q, author, available, owner_id)
+    if match:
+        query = query.params(match=match)
+    return query.scalar()
+
+def ensure_search_index(db: Session):
+    """Cria o índice de texto em bancos antigos (sem `books_fts`) e o popula a partir de `books`."""
+    if not _uses_fts(db):
+        return
+    exists = db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'")).first()
+    for statement in BOOKS_FTS_DDL:
+        db.execute(text(statement))
+    if not exists:
+        rebuild_search_index(db)
+    db.commit()
+
+def rebuild_search_index(db: Session):
+    """Reconstrói o índice inteiro a partir da tabela `books`."""
+    if _uses_fts(db):
+        db.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
+        db.commit()
+
 def update(db: Session, book: Book):
     db.add(book)
-    db.commit()
-    db.refresh(book)
     return book
@@ -0,0 +1,15 @@
+from sqlalchemy import select, update as sql_update
+from sqlalchemy.orm import Session
+from models.catalog import CatalogVersion
+
+def current(db: Session) -> int:
+    return db.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1)).scalar() or 0
+
+def bump(db: Session):
+    """Incrementa a versão no banco (UPDATE atômico), válido para todos os workers."""
+    db.execute(
+        sql_update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(version=CatalogVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
@@ -1,28 +1,140 @@
+from sqlalchemy import Date, DateTime, Integer, and_, cast, func, insert, literal, select, text, update as sql_update
 from sqlalchemy.orm import Session
 from models.loan import Loan
-from datetime import date
+from models.user import User
+from models.book import Book
+from models.points import PointsEntry
+from config.constants import LEDGER_LATE_FINE
+from collections import namedtuple
+from datetime import date, datetime
+
+# 'active' vai inline no SQL (não como parâmetro) para casar com os índices parciais
+ACTIVE = literal("active", literal_execute=True)
+
+# Colunas de LoanOut, lidas pelas consultas só leitura (*_rows) sem carregar entidades
+ROW_COLUMNS = (
+    Loan.id, Loan.book_id, Loan.lender_id, Loan.borrower_id, Loan.requested_at,
+    Loan.start_date, Loan.due_date, Loan.returned_date, Loan.status,
+)
+LoanRecord = namedtuple("LoanRecord", [c.key for c in ROW_COLUMNS] + ["book", "lender"])
+LoanBookRecord = namedtuple("LoanBookRecord", ["id", "title", "author"])
+LoanLenderRecord = namedtuple("LoanLenderRecord", ["id", "name"])
 
 def create(db: Session, loan: Loan):
     db.add(loan)
-    db.commit()
-    db.refresh(loan)
     return loan
 
 def get(db: Session, loan_id: int):
     return db.query(Loan).get(loan_id)
 
+def get_many(db: Session, loan_ids):
+    return db.query(Loan).filter(Loan.id.in_(loan_ids)).all()
+
 def get_active_by_borrower(db: Session, borrower_id: int):
-    return db.query(Loan).filter(Loan.borrower_id == borrower_id, Loan.status == "active").all()
+    return db.query(Loan).filter(Loan.borrower_id == borrower_id, Loan.status == ACTIVE).all()
+
+def count_active_by_borrower(db: Session, borrower_id: int) -> int:
+    return db.query(func.count(Loan.id)).filter(Loan.borrower_id == borrower_id, Loan.status == ACTIVE).scalar()
+
+def get_rows_by_borrower_id(db: Session, borrower_id: int, statuses=None, before_id=None, limit=None, expand=()):
+    """
+    Empréstimos do tomador, mais recentes primeiro, paginados por `before_id`.
+    Só leitura: seleciona só as colunas da resposta, com JOIN em books/users
+    conforme `expand` ("book", "lender"), e retorna LoanRecords, tuplas nomeadas
+    fora do identity map, com `book`/`lender` None quando não pedidos.
+    """
+    book, lender = "book" in expand, "lender" in expand
+    query = db.query(*ROW_COLUMNS)
+    if book:
+        query = query.add_columns(Book.title, Book.author).join(Book, Book.id == Loan.book_id)
+    if lender:
+        query = query.add_columns(User.name).join(User, User.id == Loan.lender_id)
+    query = query.filter(Loan.borrower_id == borrower_id)
+    if statuses:
+        query = query.filter(Loan.status.in_(statuses))
+    if before_id is not None:
+        query = query.filter(Loan.id < before_id)
+    query = query.order_by(Loan.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
 
-def get_by_borrower_id(db: Session, borrower_id: int):
-    return db.query(Loan).filter(Loan.borrower_id == borrower_id).all()
+    n = len(ROW_COLUMNS)
+    records = []
+    for row in query:
+        book_record = LoanBookRecord(row[1], row[n], row[n + 1]) if book else None
+        lender_record = LoanLenderRecord(row[2], row[-1]) if lender else None
+        records.append(LoanRecord(*row[:n], book_record, lender_record))
+    return records
 
-def get_overdue(db: Session):
+def get_overdue_rows(db: Session):
+    """Empréstimos ativos vencidos, só leitura: Rows com as colunas de LoanOut."""
     today = date.today()
-    return db.query(Loan).filter(Loan.status == "active", Loan.due_date < today).all()
+    return db.query(*ROW_COLUMNS).filter(Loan.status == ACTIVE, Loan.due_date < today).all()
+
+def _fined_from():
+    return func.coalesce(Loan.fined_through, Loan.due_date)
+
+def analyze(db: Session):
+    """
+    Atualiza as estatísticas do planner do SQLite para loans. Sem elas, os
+    UPDATEs por faixa de id preferem o índice de status e varrem todos os
+    empréstimos ativos a cada faixa.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(text("ANALYZE loans"))
+
+def overdue_id_range(db: Session, today: date):
+    """Menor e maior id entre os empréstimos ativos com multa a cobrar até `today` ((None, None) se nenhum)."""
+    return db.execute(
+        select(func.min(Loan.id), func.max(Loan.id)).where(Loan.status == ACTIVE, _fined_from() < literal(today, Date))
+    ).one()
+
+def charge_overdue_fines(db: Session, today: date, after_id: int, last_id: int, fine_per_day: int):
+    """
+    Cobra as multas da faixa de ids (after_id, last_id] direto no banco: um UPDATE ...
+    FROM em users debita a soma dos dias ainda não cobrados de cada tomador,
+    um INSERT ... SELECT grava uma entrada 'late_fine' por empréstimo no razão
+    e outro UPDATE marca os empréstimos como cobrados até `today`. Empréstimos já
+    cobrados hoje ficam de fora, então repetir o bloco não cobra duas vezes.
+    Retorna (empréstimos, usuários) alterados.
+    """
+    today_value = literal(today, Date)
+    fined_from = _fined_from()
+    if db.get_bind().dialect.name == "sqlite":
+        days_late = cast(func.julianday(today_value) - func.julianday(fined_from), Integer)
+    else:
+        days_late = today_value - fined_from
+    pending = and_(Loan.status == ACTIVE, Loan.id > after_id, Loan.id <= last_id, fined_from < today_value)
+
+    owed = (
+        select(Loan.borrower_id, (func.sum(days_late) * fine_per_day).label("fine"))
+        .where(pending)
+        .group_by(Loan.borrower_id)
+        .subquery()
+    )
+    users = db.execute(
+        sql_update(User)
+        .where(User.id == owed.c.borrower_id)
+        .values(points=User.points - owed.c.fine, version=User.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.execute(
+        insert(PointsEntry).from_select(
+            ["user_id", "delta", "reason", "loan_id", "created_at"],
+            select(
+                Loan.borrower_id, -days_late * fine_per_day, literal(LEDGER_LATE_FINE), Loan.id,
+                literal(datetime.utcnow(), DateTime),
+            ).where(pending),
+        )
+    )
+    loans = db.execute(
+        sql_update(Loan)
+        .where(pending)
+        .values(fined_through=today, version=Loan.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return loans, users
 
 def update(db: Session, loan: Loan):
     db.add(loan)
-    db.commit()
-    db.refresh(loan)
     return loan
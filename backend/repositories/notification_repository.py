@@ -0,0 +1,37 @@
+import uuid
+from sqlalchemy import func, select, update as sql_update
+from sqlalchemy.orm import Session
+from models.notification import Notification
+
+def create(db: Session, notification: Notification):
+    db.add(notification)
+    return notification
+
+def claim_due(db: Session, now, limit: int, lease_until):
+    """
+    Reserva até `limit` notificações vencidas, empurrando next_attempt_at para
+    `lease_until`. Outro dispatcher (outro worker) não pega as mesmas linhas, e
+    se este processo morrer no meio do envio elas voltam à fila quando a reserva expira.
+    """
+    token = uuid.uuid4().hex
+    due = (
+        select(Notification.id)
+        .where(Notification.status == "pending", Notification.next_attempt_at <= now)
+        .order_by(Notification.id)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    db.execute(
+        sql_update(Notification)
+        .where(Notification.id.in_(due), Notification.status == "pending", Notification.next_attempt_at <= now)
+        .values(claim_token=token, next_attempt_at=lease_until)
+        .execution_options(synchronize_session=False)
+    )
+    return db.query(Notification).filter(Notification.claim_token == token).order_by(Notification.id).all()
+
+def count_by_status(db: Session) -> dict:
+    rows = db.query(Notification.status, func.count(Notification.id)).group_by(Notification.status).all()
+    return dict(rows)
+
+def update(db: Session, notification: Notification):
+    db.add(notification)
@@ -0,0 +1,90 @@
+from datetime import datetime
+from sqlalchemy import func, insert, literal, select, update as sql_update
+from sqlalchemy.orm import Session
+from models.points import PointsEntry, PointsSnapshot
+from models.user import User
+from config.constants import LEDGER_OPENING_BALANCE
+
+def record(db: Session, entries: list):
+    """Grava entradas do razão a partir de dicts (user_id, delta, reason, loan_id), num único INSERT."""
+    entries = [entry for entry in entries if entry["delta"]]
+    if entries:
+        now = datetime.utcnow()
+        db.execute(insert(PointsEntry), [{"loan_id": None, "created_at": now, **entry} for entry in entries])
+
+def get_page(db: Session, user_id: int, before_id: int = None, limit: int = None):
+    """Entradas do usuário da mais nova para a mais antiga, começando antes de `before_id`."""
+    query = db.query(PointsEntry).filter(PointsEntry.user_id == user_id)
+    if before_id is not None:
+        query = query.filter(PointsEntry.id < before_id)
+    return query.order_by(PointsEntry.id.desc()).limit(limit).all()
+
+def _latest_snapshots():
+    """Último snapshot de cada usuário (subquery com user_id, balance, ledger_id)."""
+    latest = select(func.max(PointsSnapshot.id)).group_by(PointsSnapshot.user_id)
+    return (
+        select(PointsSnapshot.user_id, PointsSnapshot.balance, PointsSnapshot.ledger_id)
+        .where(PointsSnapshot.id.in_(latest))
+        .subquery()
+    )
+
+def _ledger_balances(through_id=None):
+    """
+    Saldo de cada usuário pelo razão: último snapshot + entradas posteriores
+    a ele (até `through_id`). Só as entradas depois do snapshot são somadas.
+    """
+    snapshot = _latest_snapshots()
+    entries = select(func.coalesce(func.sum(PointsEntry.delta), 0)).where(
+        PointsEntry.user_id == User.id,
+        PointsEntry.id > func.coalesce(snapshot.c.ledger_id, 0),
+    )
+    if through_id is not None:
+        entries = entries.where(PointsEntry.id <= through_id)
+    balance = func.coalesce(snapshot.c.balance, 0) + entries.scalar_subquery()
+    return select(User.id.label("user_id"), balance.label("balance")).outerjoin(
+        snapshot, snapshot.c.user_id == User.id
+    )
+
+def take_snapshot(db: Session) -> int:
+    """Consolida o saldo de todos os usuários até a última entrada atual do razão; retorna quantos snapshots gravou."""
+    through_id = db.execute(select(func.max(PointsEntry.id))).scalar()
+    if through_id is None:
+        return 0
+    balances = _ledger_balances(through_id).subquery()
+    result = db.execute(
+        insert(PointsSnapshot).from_select(
+            ["user_id", "balance", "ledger_id", "created_at"],
+            select(balances.c.user_id, balances.c.balance, literal(through_id), literal(datetime.utcnow())),
+        )
+    )
+    return result.rowcount
+
+def rebuild_balances(db: Session, dry_run: bool = False) -> int:
+    """
+    Recalcula `User.points` a partir do último snapshot + razão e corrige os
+    saldos divergentes (ou só os conta, com `dry_run`). Retorna quantos divergiam.
+    """
+    balances = _ledger_balances().subquery()
+    if dry_run:
+        return db.execute(
+            select(func.count()).select_from(User).join(balances, balances.c.user_id == User.id)
+            .where(User.points != balances.c.balance)
+        ).scalar()
+    return db.execute(
+        sql_update(User)
+        .where(User.id == balances.c.user_id, User.points != balances.c.balance)
+        .values(points=balances.c.balance, version=User.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def backfill_opening_balances(db: Session) -> int:
+    """Para bancos anteriores ao razão: uma entrada 'opening_balance' com o saldo atual de quem não tem entradas."""
+    has_entries = select(PointsEntry.id).where(PointsEntry.user_id == User.id).exists()
+    result = db.execute(
+        insert(PointsEntry).from_select(
+            ["user_id", "delta", "reason", "created_at"],
+            select(User.id, User.points, literal(LEDGER_OPENING_BALANCE), literal(datetime.utcnow()))
+            .where(User.points != 0, ~has_entries),
+        )
+    )
+    return result.rowcount
@@ -1,5 +1,10 @@
+from sqlalchemy import case, func, select, update as sql_update
 from sqlalchemy.orm import Session
 from models.user import User
+from models.loan import Loan
+from core.cache import invalidate_user_on_commit
+from repositories import points_repository
+from config.constants import LEDGER_ADJUSTMENT
 
 def get_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
@@ -9,12 +14,76 @@ def get(db: Session, user_id: int):
 
 def create(db: Session, user: User):
     db.add(user)
-    db.commit()
-    db.refresh(user)
     return user
 
 def update(db: Session, user: User):
+    invalidate_user_on_commit(db, user.id)
     db.add(user)
-    db.commit()
-    db.refresh(user)
     return user
+
+def add_points(db: Session, user_id: int, delta: int, active_loans: int = 0,
+               reason: str = LEDGER_ADJUSTMENT, loan_id: int = None):
+    """
+    Soma `delta` aos pontos (e `active_loans` ao contador de empréstimos ativos)
+    com um UPDATE atômico (points = points + delta), sem ler-modificar-escrever
+    em Python; a versão também sobe, para que um flush concorrente do mesmo
+    usuário com dados antigos seja detectado. O movimento vai para o razão
+    (points_ledger) na mesma transação.
+    """
+    invalidate_user_on_commit(db, user_id)
+    db.execute(
+        sql_update(User)
+        .where(User.id == user_id)
+        .values(
+            points=User.points + delta,
+            active_loans=User.active_loans + active_loans,
+            version=User.version + 1,
+        )
+    )
+    points_repository.record(db, [{"user_id": user_id, "delta": delta, "reason": reason, "loan_id": loan_id}])
+
+def add_points_many(db: Session, entries: list):
+    """
+    Versão em lote de add_points: cada entrada é um dict com user_id, delta,
+    reason, loan_id e, opcionalmente, active_loans. Os saldos viram um único
+    UPDATE com CASE por id e as entradas do razão um único INSERT.
+    """
+    if not entries:
+        return
+    points, active = {}, {}
+    for entry in entries:
+        user_id = entry["user_id"]
+        points[user_id] = points.get(user_id, 0) + entry["delta"]
+        active[user_id] = active.get(user_id, 0) + entry.get("active_loans", 0)
+        invalidate_user_on_commit(db, user_id)
+    db.execute(
+        sql_update(User)
+        .where(User.id.in_(points))
+        .values(
+            points=User.points + case(points, value=User.id, else_=0),
+            active_loans=User.active_loans + case(active, value=User.id, else_=0),
+            version=User.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    points_repository.record(db, [
+        {key: entry[key] for key in ("user_id", "delta", "reason", "loan_id")} for entry in entries
+    ])
+
+def recount_active_loans(db: Session) -> int:
+    """
+    Reconciliação: recalcula `active_loans` de todos os usuários a partir da
+    tabela loans num único UPDATE e devolve quantos contadores estavam errados.
+    """
+    actual = (
+        select(func.count(Loan.id))
+        .where(Loan.borrower_id == User.id, Loan.status == "active")
+        .scalar_subquery()
+    )
+    result = db.execute(
+        sql_update(User)
+        .where(User.active_loans != actual)
+        .values(active_loans=actual)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
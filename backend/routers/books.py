@@ -1,19 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from core.database import get_db
-from schemas.book import BookCreate, BookOut
-from services.book_service import add_book, list_books
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from core.database import get_db, run_db
+from schemas.book import BookCreate, BookOut, BookImportResult
+from services.book_service import add_book, list_books, import_books, catalog_version
+from core.cache import catalog_cache, make_etag, etag_matches
+from core.serializers import render_list
 from routers.users import get_current_user
+from config.constants import BOOKS_PAGE_SIZE, BOOKS_MAX_PAGE_SIZE
 
 router = APIRouter()
 
 @router.post("/", response_model=BookOut)
-def api_add_book(payload: BookCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def api_add_book(payload: BookCreate, db=Depends(get_db), current_user=Depends(get_current_user)):
     try:
-        return add_book(db, current_user.id, payload)
+        return await run_db(db, add_book, current_user.id, payload)
     except Exception as e:
         raise HTTPException(400, str(e))
 
+@router.post("/bulk", response_model=BookImportResult)
+async def api_bulk_import(
+    request: Request,
+    format: str | None = Query(None, regex="^(csv|ndjson)$"),
+    db=Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Importa livros em massa para o usuário logado a partir de um corpo CSV
+    (cabeçalho title,author,condition) ou NDJSON (um objeto por linha). O
+    formato vem de `format` ou do Content-Type. O corpo é lido em streaming e
+    as linhas inválidas (inclusive as longas demais) são reportadas em `errors`
+    sem impedir as demais.
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("ndjson" if "ndjson" in content_type or "jsonl" in content_type
+                     else "csv" if "csv" in content_type else None)
+    if fmt is None:
+        raise HTTPException(415, "Envie text/csv ou application/x-ndjson (ou informe ?format=).")
+    return await import_books(db, current_user.id, request.stream(), fmt)
+
 @router.get("/", response_model=list[BookOut])
-def api_list(q: str | None = Query(None), author: str | None = Query(None), db: Session = Depends(get_db)):
-    return list_books(db, q, author)
+async def api_list(
+    q: str | None = Query(None),
+    author: str | None = Query(None),
+    available: bool | None = Query(None),
+    owner_id: int | None = Query(None),
+    after_id: int | None = Query(None, ge=0),
+    limit: int = Query(BOOKS_PAGE_SIZE, ge=1, le=BOOKS_MAX_PAGE_SIZE),
+    include_total: bool = Query(False),
+    if_none_match: str | None = Header(None),
+    db=Depends(get_db),
+):
+    """
+    Lista livros ordenados por id, em páginas de no máximo `limit` itens.
+
+    A próxima página é pedida com `after_id` igual ao header `X-Next-Cursor`;
+    o header não vem na última página. `include_total=true` adiciona `X-Total-Count`.
+
+    O ETag combina a versão do catálogo com os parâmetros: com `If-None-Match`
+    igual a ele a resposta é 304 sem corpo, e a resposta serializada fica em
+    `catalog_cache` até a versão mudar.
+    """
+    params = (q, author, available, owner_id, after_id, limit, include_total)
+    etag = make_etag(await run_db(db, catalog_version), *params)
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    cached = catalog_cache.get(etag)
+    if cached is None:
+        try:
+            books, next_cursor, total = await run_db(db, list_books, *params)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        headers = {}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+        if total is not None:
+            headers["X-Total-Count"] = str(total)
+        body = render_list(BookOut, books)
+        cached = (body, headers)
+        catalog_cache.set(etag, cached)
+    body, headers = cached
+    return Response(content=body, media_type="application/json", headers={**headers, **cache_headers})
@@ -1,57 +1,153 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from core.database import get_db
-from schemas.loan import LoanRequest, LoanOut
-from services.loan_service import request_loan, confirm_loan, return_loan, overdue_loans, get_user_loans, return_loan_by_user
-from routers.users import get_current_user
+import asyncio
+import json
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from core.database import get_db, run_db, release_db
+from core.events import broker
+from core.serializers import FastJSONResponse, serialize_list
+from config.settings import settings
+from schemas.loan import LoanRequest, LoanOut, LoanExpandedOut, LoanBatch, LoanBatchItem
+from services.loan_service import (
+    request_loan, confirm_loan, return_loan, overdue_loans, get_user_loans, return_loan_by_user,
+    confirm_loans, return_loans,
+)
+from routers.users import get_current_user, get_current_user_for_stream
+from config.constants import LOANS_PAGE_SIZE, LOANS_MAX_PAGE_SIZE, LOAN_EXPANSIONS
+
+_EXPAND_PATTERN = "^({0})(,({0}))*$".format("|".join(LOAN_EXPANSIONS))
 
 router = APIRouter()
 
 @router.post("/request", response_model=LoanOut)
-def api_request(payload: LoanRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def api_request(payload: LoanRequest, db=Depends(get_db), current_user=Depends(get_current_user)):
+    try:
+        return await run_db(db, request_loan, current_user.id, payload.book_id)
+    except Exception as e:
+        raise HTTPException(400, str(e))
+
+# Rotas de lote antes das rotas /{loan_id}/..., senão "batch" seria lido como loan_id
+@router.post("/batch/confirm", response_model=list[LoanBatchItem])
+async def api_batch_confirm(payload: LoanBatch, db=Depends(get_db), current_user=Depends(get_current_user)):
+    """Confirma vários pedidos do dono logado numa transação; o resultado vem por item."""
+    try:
+        return await run_db(db, confirm_loans, payload.loan_ids, current_user.id)
+    except Exception as e:
+        raise HTTPException(400, str(e))
+
+@router.post("/batch/return", response_model=list[LoanBatchItem])
+async def api_batch_return(payload: LoanBatch, db=Depends(get_db), current_user=Depends(get_current_user)):
+    """Devolve vários empréstimos do usuário logado numa transação; o resultado vem por item."""
     try:
-        return request_loan(db, current_user.id, payload.book_id)
+        return await run_db(db, return_loans, payload.loan_ids, current_user.id)
     except Exception as e:
         raise HTTPException(400, str(e))
 
+async def sse_stream(user_id: int, heartbeat: float):
+    """
+    Eventos de empréstimo do usuário no formato text/event-stream. A inscrição
+    só existe enquanto o stream é lido; sem eventos, um comentário a cada
+    `heartbeat` segundos mantém a conexão aberta em proxies. Se a fila da
+    conexão encheu, envia `resync` para o cliente recarregar seus empréstimos.
+    """
+    subscription = broker.subscribe(user_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if subscription.lagged:
+                subscription.lagged = False
+                yield "event: resync\ndata: {}\n\n"
+            yield f"event: {item['type']}\ndata: {json.dumps(item)}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+@router.get("/events")
+async def api_events(db=Depends(get_db), current_user=Depends(get_current_user_for_stream)):
+    """
+    Stream SSE com pedidos, confirmações e devoluções dos empréstimos em que o
+    usuário logado é dono ou tomador; substitui o polling de /my_loans. Aceita
+    o token em `?token=` (EventSource não envia headers).
+    """
+    await release_db(db)
+    return StreamingResponse(
+        sse_stream(current_user.id, settings.EVENTS_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/events/stats")
+async def api_events_stats():
+    """Conexões SSE abertas neste processo e eventos publicados/descartados."""
+    return broker.stats()
+
 @router.post("/{loan_id}/confirm", response_model=LoanOut)
-def api_confirm(loan_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def api_confirm(loan_id: int, db=Depends(get_db), current_user=Depends(get_current_user)):
     try:
-        return confirm_loan(db, loan_id)
+        return await run_db(db, confirm_loan, loan_id)
     except Exception as e:
         raise HTTPException(400, str(e))
 
-@router.get("/my_loans", response_model=list[LoanOut])
-def api_my_loans(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    """Retorna todos os empréstimos (ativos e históricos) do usuário logado."""
+@router.get("/my_loans", response_model=list[LoanExpandedOut])
+async def api_my_loans(
+    response: Response,
+    expand: str | None = Query(None, regex=_EXPAND_PATTERN),
+    status: list[Literal["requested", "active", "returned"]] | None = Query(None),
+    before_id: int | None = Query(None, ge=1),
+    limit: int = Query(LOANS_PAGE_SIZE, ge=1, le=LOANS_MAX_PAGE_SIZE),
+    db=Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Empréstimos (ativos e históricos) do usuário logado, mais recentes primeiro.
+
+    `expand=book,lender` embute título/autor do livro e nome do dono (sem
+    precisar baixar o catálogo); `status` pode ser repetido para filtrar. A
+    próxima página é pedida com `before_id` igual ao header `X-Next-Cursor`.
+    """
+    expansions = set(expand.split(",")) if expand else set()
     try:
-        return get_user_loans(db, current_user.id)
+        loans, next_cursor = await run_db(
+            db, get_user_loans, current_user.id, status, before_id, limit, tuple(expansions)
+        )
     except Exception as e:
         raise HTTPException(400, str(e))
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+    if settings.FAST_JSON:
+        return FastJSONResponse(serialize_list(LoanExpandedOut, loans), headers=headers)
+    response.headers.update(headers)
+    return loans
 
 @router.post("/{loan_id}/return", response_model=LoanOut)
-def api_return(loan_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def api_return(loan_id: int, db=Depends(get_db), current_user=Depends(get_current_user)):
     """Permite que o usuário logado devolva um livro."""
     try:
-        return return_loan_by_user(db, loan_id, current_user.id)
+        return await run_db(db, return_loan_by_user, loan_id, current_user.id)
     except Exception as e:
         raise HTTPException(400, str(e))
 
 @router.post("/{loan_id}/confirm", response_model=LoanOut)
-def api_confirm(loan_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def api_confirm(loan_id: int, db=Depends(get_db), current_user=Depends(get_current_user)):
     """Endpoint para o proprietário confirmar o empréstimo (mantido para compatibilidade)."""
     try:
-        return confirm_loan(db, loan_id)
+        return await run_db(db, confirm_loan, loan_id)
     except Exception as e:
         raise HTTPException(400, str(e))
 
 @router.post("/{loan_id}/return", response_model=LoanOut)
-def api_return(loan_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def api_return(loan_id: int, db=Depends(get_db), current_user=Depends(get_current_user)):
     try:
-        return return_loan(db, loan_id)
+        return await run_db(db, return_loan, loan_id)
     except Exception as e:
         raise HTTPException(400, str(e))
 
 @router.get("/overdue", response_model=list[LoanOut])
-def api_overdue(db: Session = Depends(get_db)):
-    return overdue_loans(db)
+async def api_overdue(db=Depends(get_db)):
+    loans = await run_db(db, overdue_loans)
+    if settings.FAST_JSON:
+        return FastJSONResponse(serialize_list(LoanOut, loans))
+    return loans
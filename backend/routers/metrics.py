@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from core import metrics
+from core.database import get_db, run_db
+from services.notification_service import queue_depth
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def api_metrics(db=Depends(get_db)):
+    """Métricas deste processo no formato texto do Prometheus (exposition format 0.0.4)."""
+    depth = await run_db(db, queue_depth)
+    for status, count in depth.items():
+        metrics.notification_queue.labels(status).set(count)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
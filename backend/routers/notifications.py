@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from core.database import get_db, run_db
+from services.notification_service import queue_depth, dispatcher
+
+router = APIRouter()
+
+@router.get("/queue")
+async def api_queue(db=Depends(get_db)):
+    """Profundidade da outbox por status e contadores do dispatcher deste processo."""
+    depth = await run_db(db, queue_depth)
+    return {**depth, "dispatcher": {"running": dispatcher.running, "sent": dispatcher.sent, "failed": dispatcher.failed}}
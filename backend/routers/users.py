@@ -1,36 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from core.database import get_db
+from core.database import get_db, run_db
 from schemas.user import UserCreate, UserOut, Token, UserLogin
-from services.user_service import register, authenticate
-from core.security import decode_token
-from core.exceptions import unauthorized
+from schemas.points import PointsEntryOut
+from services.user_service import register_async, authenticate_async
+from services.points_service import get_ledger_page
+from core.security import decode_token, HashingBusyError
+from core.exceptions import unauthorized, service_unavailable
+from core.cache import user_cache
 from repositories.user_repository import get as get_user_repo
+from config.constants import LEDGER_PAGE_SIZE, LEDGER_MAX_PAGE_SIZE
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
+oauth2_optional = OAuth2PasswordBearer(tokenUrl="/api/users/login", auto_error=False)
 
 @router.post("/register", response_model=UserOut)
-def api_register(payload: UserCreate, db: Session = Depends(get_db)):
+async def api_register(payload: UserCreate, db=Depends(get_db)):
     try:
-        return register(db, payload)
+        return await register_async(db, payload)
+    except HashingBusyError as e:
+        service_unavailable(str(e))
     except Exception as e:
         raise HTTPException(400, str(e))
 
 @router.post("/login", response_model=Token)
-def api_login(form: UserLogin, db: Session = Depends(get_db)):
-    out = authenticate(db, form.email, form.password)
+async def api_login(form: UserLogin, db=Depends(get_db)):
+    try:
+        out = await authenticate_async(db, form.email, form.password)
+    except HashingBusyError as e:
+        service_unavailable(str(e))
     if not out:
         raise HTTPException(401, "Credenciais inválidas.")
     return {"access_token": out["access_token"], "token_type": "bearer"}
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
+    """
+    Resolve o usuário do token. A identidade fica em `user_cache` (UserOut, com TTL),
+    então só há consulta ao banco quando o usuário não está em cache ou foi invalidado.
+    """
     try:
         data = decode_token(token)
-        user = get_user_repo(db, int(data["sub"]))
-        if not user:
-            unauthorized("Usuário não encontrado.")
+        user_id = int(data["sub"])
+        user = user_cache.get(user_id)
+        if user is None:
+            db_user = await run_db(db, get_user_repo, user_id)
+            if not db_user:
+                unauthorized("Usuário não encontrado.")
+            user = UserOut.from_orm(db_user)
+            user_cache.set(user_id, user)
         return user
     except:
         unauthorized("Token inválido.")
+
+async def get_current_user_for_stream(
+    token: str | None = Query(None), header_token: str | None = Depends(oauth2_optional), db=Depends(get_db)
+):
+    """
+    Como `get_current_user`, mas aceita o token também em `?token=`: o
+    EventSource do navegador não permite enviar o header Authorization.
+    """
+    return await get_current_user(token or header_token or "", db)
+
+@router.get("/me/ledger", response_model=list[PointsEntryOut])
+async def api_my_ledger(
+    response: Response,
+    before_id: int | None = Query(None, ge=1),
+    limit: int = Query(LEDGER_PAGE_SIZE, ge=1, le=LEDGER_MAX_PAGE_SIZE),
+    db=Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Extrato de pontos do usuário logado, do movimento mais recente para o mais
+    antigo. A próxima página é pedida com `before_id` igual ao header `X-Next-Cursor`.
+    """
+    entries, next_cursor = await run_db(db, get_ledger_page, current_user.id, before_id, limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return entries
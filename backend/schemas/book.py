@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 class BookCreate(BaseModel):
     title: str
@@ -16,3 +16,14 @@ class BookOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class BookImportError(BaseModel):
+    line: int
+    error: str
+
+class BookImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BookImportError]
+    # True quando há mais erros do que os listados (limite BOOKS_BULK_MAX_ERRORS)
+    errors_truncated: bool
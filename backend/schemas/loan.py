@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist
 from typing import Optional
 from datetime import datetime, date
 
@@ -18,3 +18,32 @@ class LoanOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class LoanBookOut(BaseModel):
+    id: int
+    title: str
+    author: Optional[str]
+
+    class Config:
+        orm_mode = True
+
+class LoanUserOut(BaseModel):
+    id: int
+    name: str
+
+    class Config:
+        orm_mode = True
+
+class LoanExpandedOut(LoanOut):
+    """LoanOut com livro e dono embutidos quando pedidos em `expand` (senão, null)."""
+    book: Optional[LoanBookOut] = None
+    lender: Optional[LoanUserOut] = None
+
+class LoanBatch(BaseModel):
+    loan_ids: conlist(int, min_items=1, max_items=500)
+
+class LoanBatchItem(BaseModel):
+    loan_id: int
+    ok: bool
+    error: Optional[str] = None
+    loan: Optional[LoanOut] = None
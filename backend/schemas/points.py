@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class PointsEntryOut(BaseModel):
+    id: int
+    delta: int
+    reason: str
+    loan_id: Optional[int]
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
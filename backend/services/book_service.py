@@ -1,7 +1,11 @@
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from repositories import book_repository
+from core.database import unit_of_work, run_db
+from repositories import book_repository, catalog_repository
 from models.book import Book
 from schemas.book import BookCreate
+from config.settings import settings
+from utils.streaming import iter_records
 
 def add_book(db: Session, owner_id: int, payload: BookCreate):
     book = Book(
@@ -11,7 +15,71 @@ def add_book(db: Session, owner_id: int, payload: BookCreate):
         owner_id=owner_id,
         available=True
     )
-    return book_repository.create(db, book)
+    with unit_of_work(db):
+        book = book_repository.create(db, book)
+        catalog_repository.bump(db)
+    return book
 
-def list_books(db: Session, q: str = None, author: str = None):
-    return book_repository.search(db, q=q, author=author)
+def catalog_version(db: Session) -> int:
+    return catalog_repository.current(db)
+
+def list_books(db: Session, q: str = None, author: str = None, available: bool = None,
+               owner_id: int = None, after_id: int = None, limit: int = None, with_total: bool = False):
+    """
+    Retorna uma página de livros (Rows só leitura) e o cursor da próxima página.
+
+    Busca `limit + 1` linhas para saber se há mais resultados sem precisar de COUNT.
+    O total só é calculado quando `with_total` é pedido.
+    """
+    fetch = limit + 1 if limit is not None else None
+    filters = dict(q=q, author=author, available=available, owner_id=owner_id)
+    books = book_repository.search_rows(db, after_id=after_id, limit=fetch, **filters)
+    next_cursor = None
+    if limit is not None and len(books) > limit:
+        books = books[:limit]
+        next_cursor = books[-1].id
+    total = book_repository.count(db, **filters) if with_total else None
+    return books, next_cursor, total
+
+def _insert_batch(db: Session, rows: list):
+    with unit_of_work(db):
+        catalog_repository.bump(db)
+        return book_repository.bulk_create(db, rows)
+
+def _validation_message(error: ValidationError):
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+async def import_books(db, owner_id: int, chunks, fmt: str, batch_size: int = None):
+    """
+    Importa livros de um upload CSV/NDJSON lido em pedaços. Cada registro é
+    validado com BookCreate; os válidos são inseridos em lotes de `batch_size`
+    (um commit por lote) e os inválidos viram erros por linha, sem abortar o
+    restante. Só o lote atual fica em memória.
+    """
+    batch_size = batch_size or settings.BOOKS_BULK_BATCH_SIZE
+    result = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    batch = []
+
+    def reject(line_no, message):
+        result["failed"] += 1
+        if len(result["errors"]) < settings.BOOKS_BULK_MAX_ERRORS:
+            result["errors"].append({"line": line_no, "error": message})
+        else:
+            result["errors_truncated"] = True
+
+    async for line_no, record in iter_records(chunks, fmt):
+        if isinstance(record, Exception):
+            reject(line_no, str(record))
+            continue
+        try:
+            payload = BookCreate.parse_obj(record)
+        except ValidationError as e:
+            reject(line_no, _validation_message(e))
+            continue
+        batch.append({**payload.dict(), "owner_id": owner_id, "available": True})
+        if len(batch) >= batch_size:
+            result["inserted"] += await run_db(db, _insert_batch, batch)
+            batch = []
+    if batch:
+        result["inserted"] += await run_db(db, _insert_batch, batch)
+    return result
@@ -1,20 +1,63 @@
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
-from repositories import loan_repository, user_repository, book_repository
+from core.database import retry_on_conflict, unit_of_work
+from core.events import publish_on_commit
+from repositories import loan_repository, user_repository, book_repository, catalog_repository
 from models.loan import Loan
 from config.constants import (
     CREDIT_PER_LEND, DEBIT_PER_BORROW, MIN_POINTS_TO_BORROW,
-    MAX_ACTIVE_LOANS, LATE_FINE_PER_DAY, DEFAULT_LOAN_DAYS
+    MAX_ACTIVE_LOANS, LATE_FINE_PER_DAY, DEFAULT_LOAN_DAYS,
+    LEDGER_LEND_CREDIT, LEDGER_BORROW_DEBIT, LEDGER_LATE_FINE
 )
-from utils.notifications import send_notification_stub
+from services import notification_service
+from utils.notifications import loan_request_message
 
-def count_active_loans(db: Session, user_id: int):
-    return len(loan_repository.get_active_by_borrower(db, user_id))
+def _start(loan: Loan, book):
+    loan.start_date = date.today()
+    loan.due_date = loan.start_date + timedelta(days=DEFAULT_LOAN_DAYS)
+    loan.status = "active"
+    book.available = False
 
-def get_user_loans(db: Session, user_id: int):
-    """Retorna todos os empréstimos (ativos e históricos) de um usuário."""
-    return loan_repository.get_by_borrower_id(db, user_id)
+def _finish(loan: Loan, book, today: date) -> int:
+    """Marca a devolução e retorna a multa; só cobra os dias que o job diário ainda não cobrou."""
+    loan.returned_date = today
+    loan.status = "returned"
+    book.available = True
+    fined_from = loan.fined_through or loan.due_date
+    if fined_from and today > fined_from:
+        loan.fined_through = today
+        return (today - fined_from).days * LATE_FINE_PER_DAY
+    return 0
+
+def loan_event(loan: Loan) -> dict:
+    return {
+        "type": "loan", "loan_id": loan.id, "book_id": loan.book_id, "status": loan.status,
+        "lender_id": loan.lender_id, "borrower_id": loan.borrower_id,
+    }
+
+def _publish(db: Session, loan: Loan):
+    """Avisa dono e tomador (GET /api/loans/events) quando a transação for confirmada."""
+    publish_on_commit(db, (loan.lender_id, loan.borrower_id), lambda: loan_event(loan))
 
+def count_active_loans(db: Session, user_id: int):
+    """Conta direto na tabela loans; no fluxo normal use o contador `User.active_loans`."""
+    return loan_repository.count_active_by_borrower(db, user_id)
+
+def get_user_loans(db: Session, user_id: int, statuses=None, before_id: int = None, limit: int = None, expand=()):
+    """
+    Uma página dos empréstimos (ativos e históricos) do usuário, mais recentes
+    primeiro, e o cursor da próxima, como em list_books. Os empréstimos vêm
+    como registros só leitura (LoanRecord), não entidades da sessão.
+    """
+    fetch = limit + 1 if limit is not None else None
+    loans = loan_repository.get_rows_by_borrower_id(db, user_id, statuses, before_id, fetch, expand)
+    next_cursor = None
+    if limit is not None and len(loans) > limit:
+        loans = loans[:limit]
+        next_cursor = loans[-1].id
+    return loans, next_cursor
+
+@retry_on_conflict
 def return_loan_by_user(db: Session, loan_id: int, user_id: int):
     """Permite que o usuário devolva um livro, verificando se ele é o tomador."""
     loan = loan_repository.get(db, loan_id)
@@ -23,76 +66,147 @@ def return_loan_by_user(db: Session, loan_id: int, user_id: int):
     if loan.borrower_id != user_id:
         raise PermissionError("Você não tem permissão para devolver este livro.")
     
-    # Reutiliza a lógica de return_loan
-    return return_loan(db, loan_id)
+    # Reutiliza a lógica de return_loan sem o retry dela: quem refaz a
+    # tentativa (e espera o backoff, async no run_db) é este serviço
+    return return_loan.retried_operation(db, loan_id)
 
 def request_loan(db: Session, borrower_id: int, book_id: int):
-    book = book_repository.get(db, book_id)
-    if not book or not book.available:
-        raise ValueError("Livro indisponível.")
-    borrower = user_repository.get(db, borrower_id)
-    if not borrower:
-        raise ValueError("Usuário não encontrado.")
-    if borrower.points < MIN_POINTS_TO_BORROW:
-        raise ValueError("Pontos insuficientes.")
-    if count_active_loans(db, borrower_id) >= MAX_ACTIVE_LOANS:
-        raise ValueError("Limite de empréstimos ativos atingido.")
-
-    loan = Loan(book_id=book.id, borrower_id=borrower_id, lender_id=book.owner_id)
-    loan = loan_repository.create(db, loan)
-
-    send_notification_stub(book.owner.email, "Pedido de empréstimo", f"{borrower.name} solicitou '{book.title}'.")
+    with unit_of_work(db):
+        book = book_repository.get_with_owner(db, book_id)
+        if not book or not book.available:
+            raise ValueError("Livro indisponível.")
+        borrower = user_repository.get(db, borrower_id)
+        if not borrower:
+            raise ValueError("Usuário não encontrado.")
+        if borrower.points < MIN_POINTS_TO_BORROW:
+            raise ValueError("Pontos insuficientes.")
+        if borrower.active_loans >= MAX_ACTIVE_LOANS:
+            raise ValueError("Limite de empréstimos ativos atingido.")
+
+        loan = Loan(book_id=book.id, borrower_id=borrower_id, lender_id=book.owner_id)
+        loan = loan_repository.create(db, loan)
+        # Mesma transação do pedido: sem pedido não há aviso, e o envio fica com o dispatcher
+        subject, body = loan_request_message(book.title, borrower.name)
+        notification_service.enqueue(db, book.owner.email, subject, body)
+        _publish(db, loan)
 
     return loan
 
+@retry_on_conflict
 def confirm_loan(db: Session, loan_id: int):
-    loan = loan_repository.get(db, loan_id)
-    if not loan:
-        raise ValueError("Pedido não encontrado.")
-    if loan.status != "requested":
-        raise ValueError("Este empréstimo não está pendente.")
+    with unit_of_work(db):
+        loan = loan_repository.get(db, loan_id)
+        if not loan:
+            raise ValueError("Pedido não encontrado.")
+        if loan.status != "requested":
+            raise ValueError("Este empréstimo não está pendente.")
 
-    borrower = user_repository.get(db, loan.borrower_id)
-    lender = user_repository.get(db, loan.lender_id)
-    book = book_repository.get(db, loan.book_id)
+        book = book_repository.get(db, loan.book_id)
+        if not book.available:
+            raise ValueError("Livro indisponível.")
 
-    loan.start_date = date.today()
-    loan.due_date = loan.start_date + timedelta(days=DEFAULT_LOAN_DAYS)
-    loan.status = "active"
-    book.available = False
+        _start(loan, book)
 
-    lender.points += CREDIT_PER_LEND
-    borrower.points -= DEBIT_PER_BORROW
+        user_repository.add_points(db, loan.lender_id, CREDIT_PER_LEND, reason=LEDGER_LEND_CREDIT, loan_id=loan.id)
+        user_repository.add_points(
+            db, loan.borrower_id, -DEBIT_PER_BORROW, active_loans=1, reason=LEDGER_BORROW_DEBIT, loan_id=loan.id
+        )
 
-    loan_repository.update(db, loan)
-    book_repository.update(db, book)
-    user_repository.update(db, lender)
-    user_repository.update(db, borrower)
+        loan_repository.update(db, loan)
+        book_repository.update(db, book)
+        catalog_repository.bump(db)
+        _publish(db, loan)
 
     return loan
 
+@retry_on_conflict
 def return_loan(db: Session, loan_id: int):
-    loan = loan_repository.get(db, loan_id)
-    if not loan or loan.status != "active":
-        raise ValueError("Empréstimo inválido.")
-
-    today = date.today()
-    loan.returned_date = today
-    loan.status = "returned"
-
-    book = book_repository.get(db, loan.book_id)
-    book.available = True
+    with unit_of_work(db):
+        loan = loan_repository.get(db, loan_id)
+        if not loan or loan.status != "active":
+            raise ValueError("Empréstimo inválido.")
 
-    if loan.due_date and today > loan.due_date:
-        days_late = (today - loan.due_date).days
-        borrower = user_repository.get(db, loan.borrower_id)
-        borrower.points -= days_late * LATE_FINE_PER_DAY
-        user_repository.update(db, borrower)
+        book = book_repository.get(db, loan.book_id)
+        fine = _finish(loan, book, date.today())
+        user_repository.add_points(db, loan.borrower_id, -fine, active_loans=-1, reason=LEDGER_LATE_FINE, loan_id=loan.id)
 
-    loan_repository.update(db, loan)
-    book_repository.update(db, book)
+        loan_repository.update(db, loan)
+        book_repository.update(db, book)
+        catalog_repository.bump(db)
+        _publish(db, loan)
 
     return loan
 
+def _load_batch(db: Session, loan_ids):
+    """Empréstimos e livros do lote com duas consultas IN (...); ids repetidos contam uma vez."""
+    loan_ids = list(dict.fromkeys(loan_ids))
+    loans = {loan.id: loan for loan in loan_repository.get_many(db, loan_ids)}
+    books = {book.id: book for book in book_repository.get_many(db, {loan.book_id for loan in loans.values()})}
+    return loan_ids, loans, books
+
+@retry_on_conflict
+def confirm_loans(db: Session, loan_ids, lender_id: int):
+    """
+    Confirma vários pedidos do mesmo dono numa única transação. Cada id tem
+    seu resultado ({"loan_id", "ok", "error", "loan"}); um pedido inválido
+    não impede os outros. Os pontos de todos os envolvidos são transferidos
+    com um único UPDATE.
+    """
+    results = []
+    entries = []
+    with unit_of_work(db):
+        loan_ids, loans, books = _load_batch(db, loan_ids)
+        for loan_id in loan_ids:
+            loan = loans.get(loan_id)
+            error = None
+            if not loan:
+                error = "Pedido não encontrado."
+            elif loan.lender_id != lender_id:
+                error = "Você não é o dono deste livro."
+            elif loan.status != "requested":
+                error = "Este empréstimo não está pendente."
+            elif not books[loan.book_id].available:
+                error = "Livro indisponível."
+            else:
+                _start(loan, books[loan.book_id])
+                _publish(db, loan)
+                entries.append({"user_id": loan.lender_id, "delta": CREDIT_PER_LEND,
+                                "reason": LEDGER_LEND_CREDIT, "loan_id": loan.id})
+                entries.append({"user_id": loan.borrower_id, "delta": -DEBIT_PER_BORROW, "active_loans": 1,
+                                "reason": LEDGER_BORROW_DEBIT, "loan_id": loan.id})
+            results.append({"loan_id": loan_id, "ok": error is None, "error": error, "loan": None if error else loan})
+        user_repository.add_points_many(db, entries)
+        if entries:
+            catalog_repository.bump(db)
+    return results
+
+@retry_on_conflict
+def return_loans(db: Session, loan_ids, borrower_id: int):
+    """Devolve vários empréstimos do mesmo tomador numa única transação, com resultado por id."""
+    results = []
+    entries = []
+    today = date.today()
+    with unit_of_work(db):
+        loan_ids, loans, books = _load_batch(db, loan_ids)
+        for loan_id in loan_ids:
+            loan = loans.get(loan_id)
+            error = None
+            if not loan:
+                error = "Empréstimo não encontrado."
+            elif loan.borrower_id != borrower_id:
+                error = "Você não tem permissão para devolver este livro."
+            elif loan.status != "active":
+                error = "Empréstimo inválido."
+            else:
+                fine = _finish(loan, books[loan.book_id], today)
+                _publish(db, loan)
+                entries.append({"user_id": loan.borrower_id, "delta": -fine, "active_loans": -1,
+                                "reason": LEDGER_LATE_FINE, "loan_id": loan.id})
+            results.append({"loan_id": loan_id, "ok": error is None, "error": error, "loan": None if error else loan})
+        user_repository.add_points_many(db, entries)
+        if entries:
+            catalog_repository.bump(db)
+    return results
+
 def overdue_loans(db: Session):
-    return loan_repository.get_overdue(db)
+    return loan_repository.get_overdue_rows(db)
@@ -0,0 +1,113 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from core.database import SessionLocal, unit_of_work
+from repositories import notification_repository
+from models.notification import Notification
+from config.settings import settings
+from utils.notifications import get_transport
+
+logger = logging.getLogger(__name__)
+
+def enqueue(db: Session, to_email: str, subject: str, body: str):
+    """Grava a notificação na outbox; o commit fica com a transação de quem chamou."""
+    return notification_repository.create(db, Notification(to_email=to_email, subject=subject, body=body))
+
+def queue_depth(db: Session) -> dict:
+    counts = notification_repository.count_by_status(db)
+    return {status: counts.get(status, 0) for status in ("pending", "sent", "failed")}
+
+def backoff_seconds(attempts: int) -> float:
+    return min(settings.NOTIFY_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.NOTIFY_BACKOFF_MAX_SECONDS)
+
+def dispatch_batch(db: Session, transport, batch_size: int = None):
+    """
+    Reserva um lote vencido, envia pelo transporte fora de qualquer transação e
+    grava o resultado: enviada, nova tentativa com backoff exponencial ou
+    'failed' depois de NOTIFY_MAX_ATTEMPTS. Retorna (enviadas, falhas).
+    """
+    now = datetime.utcnow()
+    with unit_of_work(db):
+        batch = notification_repository.claim_due(
+            db, now, batch_size or settings.NOTIFY_BATCH_SIZE, now + timedelta(seconds=settings.NOTIFY_LEASE_SECONDS)
+        )
+    if not batch:
+        return 0, 0
+
+    errors = transport.send_batch([(n.to_email, n.subject, n.body) for n in batch])
+
+    sent = failed = 0
+    now = datetime.utcnow()
+    with unit_of_work(db):
+        for notification, error in zip(batch, errors):
+            notification.claim_token = None
+            if error is None:
+                notification.status = "sent"
+                notification.sent_at = now
+                sent += 1
+            else:
+                notification.attempts += 1
+                notification.last_error = str(error)[:500]
+                if notification.attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+                    notification.status = "failed"
+                else:
+                    notification.next_attempt_at = now + timedelta(seconds=backoff_seconds(notification.attempts))
+                failed += 1
+            notification_repository.update(db, notification)
+    return sent, failed
+
+class NotificationDispatcher:
+    """Thread em background que esvazia a outbox a cada NOTIFY_POLL_SECONDS."""
+
+    def __init__(self, session_factory=SessionLocal, transport=None, poll_seconds: float = None, batch_size: int = None):
+        self.session_factory = session_factory
+        self.transport = transport
+        self.poll_seconds = poll_seconds or settings.NOTIFY_POLL_SECONDS
+        self.batch_size = batch_size or settings.NOTIFY_BATCH_SIZE
+        self.sent = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def run_once(self):
+        """Envia lotes até a fila de vencidas esvaziar; retorna (enviadas, falhas)."""
+        transport = self.transport or get_transport()
+        total_sent = total_failed = 0
+        with self.session_factory() as db:
+            while not self._stop.is_set():
+                sent, failed = dispatch_batch(db, transport, self.batch_size)
+                total_sent += sent
+                total_failed += failed
+                if sent + failed < self.batch_size:
+                    break
+        self.sent += total_sent
+        self.failed += total_failed
+        return total_sent, total_failed
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Falha ao despachar notificações")
+            self._stop.wait(self.poll_seconds)
+
+dispatcher = NotificationDispatcher()
@@ -0,0 +1,25 @@
+from sqlalchemy.orm import Session
+from core.cache import user_cache
+from core.database import unit_of_work
+from repositories import points_repository
+
+def get_ledger_page(db: Session, user_id: int, before_id: int = None, limit: int = None):
+    """Uma página do razão do usuário (mais recentes primeiro) e o cursor da próxima, como em list_books."""
+    entries = points_repository.get_page(db, user_id, before_id, limit + 1)
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = entries[-1].id
+    return entries, next_cursor
+
+def take_snapshot(db: Session) -> int:
+    with unit_of_work(db):
+        return points_repository.take_snapshot(db)
+
+def rebuild_balances(db: Session, dry_run: bool = False) -> int:
+    """Refaz `User.points` a partir do último snapshot + razão; com `dry_run` só conta as divergências."""
+    with unit_of_work(db):
+        fixed = points_repository.rebuild_balances(db, dry_run)
+    if fixed and not dry_run:
+        user_cache.clear()
+    return fixed
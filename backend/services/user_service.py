@@ -1,21 +1,74 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from core.database import unit_of_work, run_db
 from repositories import user_repository
 from models.user import User
-from core.security import hash_password, verify_password, create_access_token
+from models.points import PointsEntry
+from core.security import (
+    hash_password, verify_and_update, hash_password_async, verify_and_update_async, create_access_token
+)
 from schemas.user import UserCreate
-from config.constants import ACCESS_TOKEN_EXPIRE
+from config.constants import ACCESS_TOKEN_EXPIRE, INITIAL_POINTS, LEDGER_SIGNUP
+
+def _create_user(db: Session, payload: UserCreate, password_hash: str):
+    # Os pontos iniciais entram no razão junto com o usuário
+    user = User(
+        name=payload.name, email=payload.email, password=password_hash, points=INITIAL_POINTS,
+        points_entries=[PointsEntry(delta=INITIAL_POINTS, reason=LEDGER_SIGNUP)],
+    )
+    with unit_of_work(db):
+        user = user_repository.create(db, user)
+    return user
+
+def _upgrade_hash(db: Session, user: User, new_hash: str):
+    # Hash criado com custo antigo do bcrypt: regrava com o custo atual. Se
+    # outro login do mesmo usuário gravou antes (StaleDataError da versão), o
+    # unit_of_work já desfez e o login segue com o que o outro gravou
+    user.password = new_hash
+    try:
+        with unit_of_work(db):
+            user_repository.update(db, user)
+    except StaleDataError:
+        db.refresh(user)
+
+def _token_response(user: User):
+    token = create_access_token(str(user.id), expires_delta=ACCESS_TOKEN_EXPIRE)
+    return {"access_token": token, "user": user}
 
 def register(db: Session, payload: UserCreate):
     existing = user_repository.get_by_email(db, payload.email)
     if existing:
         raise ValueError("Email já cadastrado.")
-    user = User(name=payload.name, email=payload.email, password=hash_password(payload.password))
-    return user_repository.create(db, user)
+    return _create_user(db, payload, hash_password(payload.password))
 
 def authenticate(db: Session, email: str, password: str):
     user = user_repository.get_by_email(db, email)
-    if not user or not verify_password(password, user.password):
+    if not user:
+        return None
+    valid, new_hash = verify_and_update(password, user.password)
+    if not valid:
         return None
+    if new_hash:
+        _upgrade_hash(db, user, new_hash)
+    return _token_response(user)
 
-    token = create_access_token(str(user.id), expires_delta=ACCESS_TOKEN_EXPIRE)
-    return {"access_token": token, "user": user}
+# Versões para os routers async: o acesso ao banco passa por run_db e o bcrypt
+# é aguardado no pool dele, então o event loop nunca fica preso no hash.
+
+async def register_async(db, payload: UserCreate):
+    existing = await run_db(db, user_repository.get_by_email, payload.email)
+    if existing:
+        raise ValueError("Email já cadastrado.")
+    password_hash = await hash_password_async(payload.password)
+    return await run_db(db, _create_user, payload, password_hash)
+
+async def authenticate_async(db, email: str, password: str):
+    user = await run_db(db, user_repository.get_by_email, email)
+    if not user:
+        return None
+    valid, new_hash = await verify_and_update_async(password, user.password)
+    if not valid:
+        return None
+    if new_hash:
+        await run_db(db, _upgrade_hash, user, new_hash)
+    return _token_response(user)
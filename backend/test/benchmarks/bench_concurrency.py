@@ -0,0 +1,56 @@
+# Arquivo: bench_concurrency.py
+# Abre muitas conexões simultâneas (1.000+) contra um servidor já rodando e mede
+# vazão e latência de rotas de leitura. Serve para comparar o caminho síncrono
+# (threadpool) com o assíncrono (DB_ASYNC=true) no mesmo hardware.
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+import httpx
+
+async def login(client):
+    email = f"bench_{uuid.uuid4().hex[:8]}@p2plivros.com"
+    await client.post("/api/users/register", json={"name": "Bench", "email": email, "password": "benchpassword"})
+    response = await client.post("/api/users/login", json={"email": email, "password": "benchpassword"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def connection(client, headers, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            books = await client.get("/api/books/", params={"limit": 20})
+            loans = await client.get("/api/loans/my_loans", headers=headers)
+            if books.status_code >= 400 or loans.status_code >= 400:
+                errors.append(1)
+        except httpx.HTTPError:
+            errors.append(1)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def run(base_url, connections, duration):
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        headers = await login(client)
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(connection(client, headers, deadline, latencies, errors) for _ in range(connections)))
+
+    latencies.sort()
+    p99 = latencies[int(0.99 * (len(latencies) - 1))] if latencies else float("nan")
+    print(f"conexões={connections} iterações={len(latencies)} it/s={len(latencies) / duration:.1f} "
+          f"p50={statistics.median(latencies):.1f}ms p99={p99:.1f}ms erros={len(errors)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de conexões concorrentes (sync x async)")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.connections, args.duration))
+
+# --- Como Executar ---
+# Caminho síncrono:  uvicorn main:app --port 8000
+# Caminho async:     DB_ASYNC=true uvicorn main:app --port 8000   (precisa de aiosqlite/asyncpg)
+# Em outro terminal: python test/benchmarks/bench_concurrency.py --connections 1000
+# (aumente o limite de arquivos abertos antes: ulimit -n 4096)
@@ -0,0 +1,96 @@
+# Arquivo: bench_db_profiles.py
+# Compara os perfis de tuning do SQLite (core.database.SQLITE_PROFILES) com a
+# mesma carga mista: várias threads pedindo/confirmando/devolvendo empréstimos
+# pelos serviços enquanto outras listam livros. Cada perfil roda num arquivo novo.
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from core.database import Base, SQLITE_PROFILES, build_engine
+from models.user import User
+from models.book import Book
+from models.loan import Loan  # noqa: F401 (registra o mapper)
+from services import loan_service, book_service
+
+def seed(Session, users, books):
+    with Session() as db:
+        db.add_all(User(name=f"U{i}", email=f"u{i}@bench.com", password="x", points=10_000) for i in range(users))
+        db.flush()
+        db.add_all(Book(title=f"Livro {i}", author="Autor", owner_id=1 + i % users) for i in range(books))
+        db.commit()
+
+def writer(Session, users, books, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        book_id = random.randint(1, books)
+        start = time.perf_counter()
+        try:
+            with Session() as db:
+                owner_id = db.get(Book, book_id).owner_id
+                borrower_id = random.choice([i for i in range(1, users + 1) if i != owner_id])
+                loan = loan_service.request_loan(db, borrower_id, book_id)
+                loan_service.confirm_loan(db, loan.id)
+                loan_service.return_loan(db, loan.id)
+        except (ValueError, OperationalError):
+            errors.append(1)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+def reader(Session, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            with Session() as db:
+                book_service.list_books(db, limit=50, after_id=random.randint(0, 1000))
+        except OperationalError:
+            errors.append(1)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+def summary(name, latencies, errors, duration):
+    latencies.sort()
+    if not latencies:
+        return f"{name}: sem operações"
+    p99 = latencies[int(0.99 * (len(latencies) - 1))]
+    return (f"{name}: ops={len(latencies)} ops/s={len(latencies) / duration:.1f} "
+            f"p50={statistics.median(latencies):.1f}ms p99={p99:.1f}ms erros={len(errors)}")
+
+def run(profile, writers, readers, duration, users, books):
+    path = os.path.join(tempfile.mkdtemp(), f"bench_{profile}.db")
+    engine = build_engine(f"sqlite:///{path}", profile)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    seed(Session, users, books)
+
+    deadline = time.perf_counter() + duration
+    w_lat, w_err, r_lat, r_err = [], [], [], []
+    threads = [threading.Thread(target=writer, args=(Session, users, books, deadline, w_lat, w_err)) for _ in range(writers)]
+    threads += [threading.Thread(target=reader, args=(Session, deadline, r_lat, r_err)) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    print(f"[{profile}]")
+    print("  " + summary("escrita (pedir+confirmar+devolver)", w_lat, w_err, duration))
+    print("  " + summary("leitura (listar livros)", r_lat, r_err, duration))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos perfis de tuning do SQLite")
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES))
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--books", type=int, default=2000)
+    args = parser.parse_args()
+    for profile in args.profiles:
+        run(profile, args.writers, args.readers, args.duration, args.users, args.books)
+
+# --- Como Executar ---
+# A partir de backend/:  PYTHONPATH=. python test/benchmarks/bench_db_profiles.py --duration 10
+# Erros no perfil "default" costumam ser "database is locked" (sem busy_timeout nem WAL).
@@ -0,0 +1,74 @@
+# Arquivo: bench_login.py
+# Mede latência (p50/p95/p99) e vazão do login e, ao mesmo tempo, de GET /api/books/
+# contra um servidor já rodando. Serve para comparar antes/depois de mudanças no bcrypt:
+# se o login "rouba" CPU e threads, a latência da listagem sobe junto.
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+import httpx
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+def worker(client, method, path, payload, duration, latencies, errors):
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        try:
+            response = client.request(method, path, json=payload)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not ok:
+            errors.append(1)
+
+def run(base_url, login_threads, read_threads, duration):
+    email = f"bench_{uuid.uuid4().hex[:8]}@p2plivros.com"
+    password = "benchpassword"
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        client.post("/api/users/register", json={"name": "Bench", "email": email, "password": password})
+
+    results = {"login": ([], []), "books": ([], [])}
+    threads = []
+    for _ in range(login_threads):
+        client = httpx.Client(base_url=base_url, timeout=30)
+        lat, err = results["login"]
+        threads.append(threading.Thread(target=worker, args=(client, "POST", "/api/users/login", {"email": email, "password": password}, duration, lat, err)))
+    for _ in range(read_threads):
+        client = httpx.Client(base_url=base_url, timeout=30)
+        lat, err = results["books"]
+        threads.append(threading.Thread(target=worker, args=(client, "GET", "/api/books/?limit=20", None, duration, lat, err)))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(f"{'rota':<8} {'req':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}")
+    for name, (lat, err) in results.items():
+        if not lat:
+            continue
+        print(f"{name:<8} {len(lat):>7} {len(lat) / duration:>8.1f} {statistics.median(lat):>8.1f} "
+              f"{percentile(lat, 95):>8.1f} {percentile(lat, 99):>8.1f} {len(err):>6}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de login (bcrypt) com leitura concorrente")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--login-threads", type=int, default=16)
+    parser.add_argument("--read-threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+    run(args.url, args.login_threads, args.read_threads, args.duration)
+
+# --- Como Executar ---
+# 1. Iniciar o backend: uvicorn main:app --port 8000 (sem --reload)
+# 2. python test/benchmarks/bench_login.py --duration 30
+# 3. Repetir com outro BCRYPT_ROUNDS/BCRYPT_WORKERS (variáveis de ambiente) ou em outro commit
+#    e comparar as colunas p99 e req/s das duas rotas.
@@ -0,0 +1,178 @@
+# Arquivo: bench_services.py
+# Microbenchmarks da camada de serviço (pytest-benchmark), chamando os serviços
+# direto, sem servidor: request/confirm/return_loan, list_books e authenticate,
+# em bancos SQLite sintéticos com 10k, 100k e 1M livros e empréstimos.
+#
+# É opt-in: o nome não casa com test_*.py, então `pytest test` não o coleta, e
+# sem pytest-benchmark instalado o módulo é pulado. Cada banco é semeado uma vez
+# (fica em BENCH_DATA_DIR, padrão: diretório temporário do sistema) e copiado
+# para uma cópia de trabalho por sessão, já que os benchmarks de escrita o alteram.
+
+import itertools
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from core.database import build_engine
+from core.schema import upgrade_schema
+from core.security import hash_password
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from services import book_service, loan_service, user_service
+
+# Sobe quando o formato dos dados semeados muda, para não reaproveitar bancos antigos
+SEED_VERSION = 1
+PASSWORD = "senha123"
+SIZES = [int(size) for size in os.environ.get("BENCH_SIZES", "10000,100000,1000000").split(",")]
+DATA_DIR = Path(os.environ.get("BENCH_DATA_DIR", tempfile.gettempdir()))
+INSERT_BATCH = 50_000
+
+def label(size):
+    return f"{size // 1_000_000}M" if size >= 1_000_000 else f"{size // 1000}k"
+
+def users_for(size):
+    return max(size // 10, 100)
+
+def owner_of(book_id, users):
+    return (book_id - 1) % users + 1
+
+def insert_batched(conn, model, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            conn.execute(insert(model), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(model), batch)
+
+def seed(path: Path, size: int):
+    """
+    `size` livros e `size` empréstimos já devolvidos (o histórico), de size/10
+    usuários com a mesma senha; todos os livros ficam disponíveis.
+    """
+    engine = build_engine(f"sqlite:///{path}")
+    upgrade_schema(engine)
+    users = users_for(size)
+    password = hash_password(PASSWORD)
+    started = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        insert_batched(conn, User, ({"name": f"Usuário {i}", "email": f"u{i}@bench.com", "password": password,
+                                     "points": 1_000_000} for i in range(1, users + 1)))
+        insert_batched(conn, Book, ({"title": f"Livro {i}", "author": f"Autor {i % 5000}", "condition": "Bom",
+                                     "owner_id": owner_of(i, users), "available": True} for i in range(1, size + 1)))
+        insert_batched(conn, Loan, (
+            {"book_id": i, "lender_id": owner_of(i, users), "borrower_id": owner_of(i, users) % users + 1,
+             "status": "returned", "requested_at": started, "start_date": started.date(),
+             "due_date": started.date() + timedelta(days=14), "returned_date": started.date() + timedelta(days=7)}
+            for i in range(1, size + 1)
+        ))
+    engine.dispose()
+
+@pytest.fixture(scope="session", params=SIZES, ids=label)
+def dataset(request, tmp_path_factory):
+    """Sessionmaker sobre uma cópia de trabalho do banco semeado com `size` linhas."""
+    size = request.param
+    seeded = DATA_DIR / f"p2p_bench_v{SEED_VERSION}_{size}.db"
+    if not seeded.exists():
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        partial = seeded.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+        seed(partial, size)
+        partial.rename(seeded)
+    work = tmp_path_factory.mktemp(label(size)) / "bench.db"
+    shutil.copy(seeded, work)
+    engine = build_engine(f"sqlite:///{work}")
+    yield size, sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+    engine.dispose()
+
+@pytest.fixture
+def db(dataset):
+    _, Session = dataset
+    with Session() as session:
+        yield session
+
+@pytest.fixture(scope="session")
+def pairs(dataset):
+    """
+    Gera (tomador, livro) ainda não usados: livros do fim da tabela, um por vez,
+    e tomadores em rodízio, para nenhum passar do limite de empréstimos ativos.
+    """
+    size, _ = dataset
+    users = users_for(size)
+    books = itertools.count(size, -1)
+    borrowers = itertools.cycle(range(1, users + 1))
+
+    def next_pair():
+        book_id = next(books)
+        borrower_id = next(borrowers)
+        if borrower_id == owner_of(book_id, users):
+            borrower_id = next(borrowers)
+        return borrower_id, book_id
+
+    return next_pair
+
+ROUNDS = 30
+
+def test_request_loan(benchmark, db, pairs):
+    def setup():
+        return (db, *pairs()), {}
+
+    loan = benchmark.pedantic(loan_service.request_loan, setup=setup, rounds=ROUNDS)
+    assert loan.status == "requested"
+
+def test_confirm_loan(benchmark, db, pairs):
+    def setup():
+        return (db, loan_service.request_loan(db, *pairs()).id), {}
+
+    loan = benchmark.pedantic(loan_service.confirm_loan, setup=setup, rounds=ROUNDS)
+    assert loan.status == "active"
+
+def test_return_loan(benchmark, db, pairs):
+    def setup():
+        loan = loan_service.request_loan(db, *pairs())
+        loan_service.confirm_loan(db, loan.id)
+        return (db, loan.id), {}
+
+    loan = benchmark.pedantic(loan_service.return_loan, setup=setup, rounds=ROUNDS)
+    assert loan.status == "returned"
+
+@pytest.mark.parametrize("case", ["tudo", "pagina", "busca", "autor-com-total"])
+def test_list_books(benchmark, db, dataset, case):
+    size, _ = dataset
+    filters = {
+        "tudo": {},
+        "pagina": {"available": True, "after_id": size // 2, "limit": 50},
+        "busca": {"q": f"livro {size // 2}", "limit": 20},
+        "autor-com-total": {"author": "autor 17", "limit": 20, "with_total": True},
+    }[case]
+    if case == "tudo" and size > 100_000:
+        pytest.skip("lista sem limite só até 100k linhas (uma rodada levaria segundos)")
+
+    books, _, _ = benchmark(book_service.list_books, db, **filters)
+    assert books
+
+def test_authenticate(benchmark, db, dataset):
+    size, _ = dataset
+    email = f"u{users_for(size) // 2}@bench.com"
+
+    # Dominado pelo bcrypt (BCRYPT_ROUNDS); poucas rodadas bastam
+    token = benchmark.pedantic(user_service.authenticate, args=(db, email, PASSWORD), rounds=5)
+    assert token["access_token"]
+
+# --- Como Executar ---
+# A partir de backend/ (precisa de `pip install pytest-benchmark`; BENCH_SIZES limita os tamanhos):
+#   PYTHONPATH=. BENCH_SIZES=10000,100000 python -m pytest test/benchmarks/bench_services.py \
+#       --benchmark-save=baseline                      # grava .benchmarks/<máquina>/0001_baseline.json
+#   PYTHONPATH=. python -m pytest test/benchmarks/bench_services.py \
+#       --benchmark-compare=0001 --benchmark-compare-fail=mean:15%   # falha se a média piorar >15%
+# `--benchmark-json=arquivo.json` grava o resultado de uma execução avulsa; `--benchmark-storage`
+# troca o diretório .benchmarks. A primeira execução com 1M semeia o banco (alguns minutos).
@@ -0,0 +1,73 @@
+# Arquivo: bench_sse_connections.py
+# Abre N conexões SSE ociosas (GET /api/loans/events) contra um servidor já
+# rodando, mede quantas o worker aceitou (GET /api/loans/events/stats) e o
+# tempo até um evento de empréstimo chegar a todas as conexões do dono.
+
+import argparse
+import asyncio
+import time
+import uuid
+import httpx
+
+async def login(client, name):
+    email = f"bench_sse_{name}_{uuid.uuid4().hex[:8]}@p2plivros.com"
+    await client.post("/api/users/register", json={"name": name, "email": email, "password": "benchpassword"})
+    response = await client.post("/api/users/login", json={"email": email, "password": "benchpassword"})
+    return response.json()["access_token"]
+
+async def listen(client, token, opened, received, errors):
+    try:
+        async with client.stream("GET", "/api/loans/events", params={"token": token}) as response:
+            async for line in response.aiter_lines():
+                if line == ": connected":
+                    opened.append(1)
+                elif line.startswith("event: loan"):
+                    received.append(time.perf_counter())
+    except httpx.HTTPError:
+        errors.append(1)
+
+async def run(base_url, connections, hold):
+    limits = httpx.Limits(max_connections=connections + 10, max_keepalive_connections=10)
+    timeout = httpx.Timeout(60, read=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        owner = await login(client, "Dono")
+        borrower = await login(client, "Tomador")
+        opened, received, errors = [], [], []
+        listeners = [asyncio.create_task(listen(client, owner, opened, received, errors)) for _ in range(connections)]
+
+        start = time.perf_counter()
+        while len(opened) + len(errors) < connections and time.perf_counter() - start < 60:
+            await asyncio.sleep(0.1)
+        setup = time.perf_counter() - start
+        await asyncio.sleep(hold)
+        stats = (await client.get("/api/loans/events/stats")).json()
+
+        # Um pedido de empréstimo gera um evento para todas as conexões do dono
+        auth = {"Authorization": f"Bearer {owner}"}
+        book = (await client.post("/api/books/", json={"title": "Bench SSE", "author": "Bench"}, headers=auth)).json()
+        published = time.perf_counter()
+        await client.post("/api/loans/request", json={"book_id": book["id"]},
+                          headers={"Authorization": f"Bearer {borrower}"})
+        while len(received) < len(opened) and time.perf_counter() - published < 30:
+            await asyncio.sleep(0.01)
+
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+    fanout = (max(received) - published) * 1000 if received else float("nan")
+    print(f"conexões={len(opened)}/{connections} no servidor={stats['connections']} abertura={setup:.1f}s "
+          f"eventos={len(received)} fan-out={fanout:.1f}ms erros={len(errors)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de conexões SSE ociosas por worker")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--hold", type=float, default=5.0, help="segundos com as conexões ociosas antes do evento")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.connections, args.hold))
+
+# --- Como Executar ---
+# Servidor (um worker):  uvicorn main:app --port 8000
+# Em outro terminal:     python test/benchmarks/bench_sse_connections.py --connections 5000
+# (aumente o limite de arquivos abertos antes: ulimit -n 16384; acompanhe a memória do worker com `ps -o rss`)
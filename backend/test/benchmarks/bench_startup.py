@@ -0,0 +1,88 @@
+# Arquivo: bench_startup.py
+# Mede a subida a frio de um worker, em processos novos: o tempo de `import main`
+# e o tempo até a primeira resposta de um uvicorn (do Popen até o primeiro
+# 200 em GET /), para cada modo de SCHEMA_STARTUP. O banco é um SQLite
+# temporário já atualizado com upgrade_schema, como depois de um deploy.
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from sqlalchemy import create_engine
+
+BACKEND = Path(__file__).resolve().parents[2]
+IMPORT_CODE = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def import_seconds(env):
+    out = subprocess.run([sys.executable, "-c", IMPORT_CODE], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+def first_response_seconds(env, timeout=30.0):
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/")
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("o servidor não respondeu a tempo")
+    finally:
+        server.terminate()
+        server.wait()
+
+def run(modes, repeat):
+    # Migra o banco temporário antes: o passo de deploy, fora da medição
+    sys.path.insert(0, str(BACKEND))
+    from core.schema import upgrade_schema
+    import models.user, models.book, models.loan, models.notification, models.points  # noqa: F401
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{tmp}/startup.db"
+        upgrade_schema(create_engine(url))
+        for mode in modes:
+            env = {**os.environ, "DATABASE_URL": url, "SCHEMA_STARTUP": mode,
+                   "NOTIFY_DISPATCHER_ENABLED": "false"}
+            imports = [import_seconds(env) * 1000 for _ in range(repeat)]
+            firsts = [first_response_seconds(env) * 1000 for _ in range(repeat)]
+            results[mode] = {"import_ms": statistics.median(imports), "first_response_ms": statistics.median(firsts)}
+            print(f"SCHEMA_STARTUP={mode:<8} import main={results[mode]['import_ms']:6.0f}ms  "
+                  f"primeira resposta={results[mode]['first_response_ms']:6.0f}ms")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de subida a frio do backend")
+    parser.add_argument("--modes", nargs="+", default=["off", "check", "upgrade"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="grava as medianas neste arquivo (para acompanhar entre versões)")
+    args = parser.parse_args()
+    results = run(args.modes, args.repeat)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+# --- Como Executar ---
+# A partir de backend/:  PYTHONPATH=. python test/benchmarks/bench_startup.py --repeat 5 --json startup.json
+# Referência (CPU de desenvolvimento, 20 execuções intercaladas): `import main` caiu de
+# ~790ms (mediana; 590ms mínimo) para ~750ms (510ms mínimo) sem o DDL no import e sem
+# passlib/jose; o modo "check" soma só a inspeção do esquema na subida.
@@ -0,0 +1,64 @@
+# Arquivo: conftest.py
+# Fixtures compartilhadas pelos testes: banco SQLite em memória para os testes
+# de serviço e o mesmo banco ligado ao app (override de get_db) para os de API.
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from main import app
+from core.database import Base, get_db
+import core.schema  # noqa: F401 (registra todos os mappers antes do create_all)
+from models.user import User
+from models.book import Book
+from config.constants import INITIAL_POINTS
+
+def memory_engine():
+    # StaticPool: todas as sessões (e threads) enxergam o mesmo banco em memória
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture
+def Session():
+    """Banco novo a cada teste; devolve o sessionmaker."""
+    engine = memory_engine()
+    yield sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    engine.dispose()
+
+@pytest.fixture
+def cenario(Session):
+    """Dono com um livro e um tomador com pontos iniciais; devolve os ids."""
+    db = Session()
+    owner = User(name="Dono", email="dono@teste.com", password="x", points=INITIAL_POINTS)
+    borrower = User(name="Tomador", email="tomador@teste.com", password="x", points=INITIAL_POINTS)
+    db.add_all([owner, borrower])
+    db.flush()
+    book = Book(title="Livro", author="Autor", owner_id=owner.id, available=True)
+    db.add(book)
+    db.commit()
+    ids = {"owner": owner.id, "borrower": borrower.id, "book": book.id}
+    db.close()
+    return ids
+
+@pytest.fixture(scope="module")
+def api_db():
+    """Um banco por módulo de teste de API, usado pelo app no lugar do padrão; devolve o sessionmaker."""
+    engine = memory_engine()
+    TestingSessionLocal = sessionmaker(autoflush=False, bind=engine, expire_on_commit=False)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestingSessionLocal
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+    engine.dispose()
@@ -4,6 +4,7 @@
 
 from locust import HttpUser, task, between
 import random
+import uuid
 
 # Constantes de Usuário para simulação
 TEST_USER_EMAIL = "loadtest_books@p2plivros.com"
@@ -27,16 +28,19 @@ class P2PLivrosBooksUser(HttpUser):
         Função que roda quando o usuário virtual "nasce".
         Aqui a gente registra e loga o usuário para ter o token.
         """
+        # Um email por usuário virtual: com um só, todos disputavam a mesma conta
+        self.email = f"{uuid.uuid4().hex[:8]}.{TEST_USER_EMAIL}"
+
         # 1. Tenta registrar o usuário (para garantir que exista)
         self.client.post("/api/users/register", json={
             "name": "Load Test Books User",
-            "email": TEST_USER_EMAIL,
+            "email": self.email,
             "password": TEST_USER_PASSWORD
         }, name="/api/users/register (Setup)")
         
         # 2. Realiza o Login
         response = self.client.post("/api/users/login", json={
-            "email": TEST_USER_EMAIL,
+            "email": self.email,
             "password": TEST_USER_PASSWORD
         }, name="/api/users/login")
         
@@ -65,13 +69,14 @@ class P2PLivrosBooksUser(HttpUser):
             book_data = {
                 "title": f"Livro de Teste {random.randint(1, 10000)}",
                 "author": "Load Test",
-                "points": random.randint(5, 20)
+                "condition": random.choice(["Novo", "Bom", "Usado"])
             }
             self.client.post("/api/books/", json=book_data, name="/api/books/ (POST Cadastrar Livro)")
 
 # --- Como Executar o Teste de Carga e Estresse ---
 # 1. Instalar o Locust: pip install locust
-# 2. Iniciar o backend: uvicorn main:app --reload --port 8000
+# 2. Iniciar o backend (a partir de backend/): python cli.py upgrade-schema
+#    e depois uvicorn main:app --reload --port 8000
 # 3. Executar o Locust: locust -f locustfile_books_estudante.py
 # 4. Abrir o navegador em http://localhost:8089 e configurar a carga.
 #
@@ -0,0 +1,252 @@
+# Arquivo: locustfile_cenarios.py
+# Teste de carga e estresse por cenários: donos e leitores pré-cadastrados
+# (seed_carga.py) fazendo o ciclo completo de empréstimo (pedido -> confirmação
+# -> devolução) junto com navegação no catálogo, nas formas de carga do plano
+# de estresse, e com verificação de SLOs (p95, p99 e taxa de erro) no fim.
+#
+# Os pedidos passam do leitor para o dono por filas em memória do processo do
+# Locust (a API não lista os pedidos recebidos por um dono); com vários
+# processos/workers cada um confirma só os pedidos feitos nele.
+
+import base64
+import itertools
+import json
+import logging
+import random
+from collections import Counter, defaultdict, deque
+from locust import HttpUser, LoadTestShape, between, events, task
+from locust.exception import StopUser
+from locust.runners import WorkerRunner
+from seed_carga import PASSWORD, lender_email, borrower_email
+
+logger = logging.getLogger(__name__)
+
+MAX_ACTIVE_LOANS = 3  # config.constants.MAX_ACTIVE_LOANS
+# Respostas 400 que fazem parte do uso normal e não contam como erro: dois
+# leitores pedindo o mesmo livro, dois VUs do mesmo dono confirmando o mesmo pedido
+EXPECTED_CONFLICTS = {
+    "Livro indisponível.",
+    "Este empréstimo não está pendente.",
+    "Limite de empréstimos ativos atingido.",
+}
+
+# dono_id -> (loan_id, leitor_id) esperando confirmação; leitor_id -> loan_ids ativos
+pending_requests = defaultdict(deque)
+active_loans = defaultdict(deque)
+# Donos com algum VU logado: os leitores só pedem livros deles
+online_lenders = Counter()
+_lender_seq = itertools.count()
+_borrower_seq = itertools.count()
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    group = parser.add_argument_group("Cenários P2P Livros")
+    group.add_argument("--lenders", type=int, default=50, help="donos semeados (seed_carga.py --lenders)")
+    group.add_argument("--borrowers", type=int, default=500, help="leitores semeados (seed_carga.py --borrowers)")
+    group.add_argument("--stress-plan", choices=["ramp", "spike", "steady"], default="ramp")
+    group.add_argument("--step-users", type=int, default=50)
+    group.add_argument("--step-seconds", type=int, default=300)
+    group.add_argument("--max-users", type=int, default=1000)
+    group.add_argument("--hold-seconds", type=int, default=300)
+    group.add_argument("--shape-spawn-rate", type=float, default=10, help="VUs/s nos degraus e no steady")
+    group.add_argument("--stop-error-rate", type=float, default=0.10, help="ramp para quando a taxa de erro passa disto")
+    group.add_argument("--slo-p95-ms", type=float, default=500)
+    group.add_argument("--slo-p99-ms", type=float, default=1500)
+    group.add_argument("--slo-error-rate", type=float, default=0.01)
+
+def user_id_from(token: str) -> int:
+    payload = token.split(".")[1]
+    return int(json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["sub"])
+
+def accept(response) -> bool:
+    """Marca o resultado de uma resposta com catch_response; True só para 2xx."""
+    if response.ok:
+        return True
+    if response.status_code == 400 and response.json().get("detail") in EXPECTED_CONFLICTS:
+        response.success()
+    else:
+        response.failure(f"{response.status_code}: {response.text[:200]}")
+    return False
+
+class P2PUser(HttpUser):
+    abstract = True
+    wait_time = between(1, 3)
+    host = "http://localhost:8000"
+
+    def login(self, email: str):
+        response = self.client.post("/api/users/login", json={"email": email, "password": PASSWORD})
+        if response.status_code != 200:
+            logger.error("Login de %s falhou (%s); rodou o seed_carga.py?", email, response.status_code)
+            raise StopUser()
+        token = response.json()["access_token"]
+        self.client.headers["Authorization"] = f"Bearer {token}"
+        self.user_id = user_id_from(token)
+
+class Dono(P2PUser):
+    """Dono de livros: confirma os pedidos que recebe, cadastra livros e confere o extrato."""
+    weight = 1
+
+    def on_start(self):
+        self.login(lender_email(next(_lender_seq) % self.environment.parsed_options.lenders))
+        online_lenders[self.user_id] += 1
+
+    def on_stop(self):
+        online_lenders[self.user_id] -= 1
+        if online_lenders[self.user_id] <= 0:
+            del online_lenders[self.user_id]
+
+    @task(6)
+    def confirm_request(self):
+        if not pending_requests[self.user_id]:
+            return
+        loan_id, borrower_id = pending_requests[self.user_id].popleft()
+        with self.client.post(f"/api/loans/{loan_id}/confirm", name="/api/loans/[id]/confirm",
+                              catch_response=True) as response:
+            if accept(response):
+                active_loans[borrower_id].append(loan_id)
+
+    @task(1)
+    def add_book(self):
+        self.client.post("/api/books/", json={
+            "title": f"Livro novo {random.randint(1, 10**9)}", "author": f"Autor {random.randint(1, 50)}",
+            "condition": random.choice(["Novo", "Bom", "Usado"]),
+        })
+
+    @task(1)
+    def my_shelf(self):
+        self.client.get("/api/books/", params={"owner_id": self.user_id, "limit": 50}, name="/api/books/ (estante)")
+
+    @task(1)
+    def ledger(self):
+        self.client.get("/api/users/me/ledger", params={"limit": 20}, name="/api/users/me/ledger")
+
+class Leitor(P2PUser):
+    """Leitor: navega e busca no catálogo, pede livros aos donos online, acompanha e devolve."""
+    weight = 4
+
+    def on_start(self):
+        self.login(borrower_email(next(_borrower_seq) % self.environment.parsed_options.borrowers))
+        self.catalog_cursor = None
+        self.active = 0
+        # Empréstimos ativos de execuções anteriores entram na fila de devolução
+        response = self.client.get("/api/loans/my_loans", params={"status": "active", "limit": 200},
+                                   name="/api/loans/my_loans (ativos)")
+        if response.ok:
+            active_loans[self.user_id].extend(loan["id"] for loan in response.json())
+            self.active = len(response.json())
+
+    @task(6)
+    def browse_catalog(self):
+        params = {"available": "true", "limit": 50}
+        if self.catalog_cursor:
+            params["after_id"] = self.catalog_cursor
+        response = self.client.get("/api/books/", params=params, name="/api/books/ (catálogo)")
+        self.catalog_cursor = response.headers.get("X-Next-Cursor")
+
+    @task(2)
+    def search(self):
+        self.client.get("/api/books/", params={"q": random.choice(["carga", "livro", "novo"]),
+                                              "author": f"autor {random.randint(1, 50)}", "limit": 20},
+                        name="/api/books/ (busca)")
+
+    @task(3)
+    def request_book(self):
+        if self.active >= MAX_ACTIVE_LOANS or not online_lenders:
+            return
+        lender_id = random.choice(list(online_lenders))
+        shelf = self.client.get("/api/books/", params={"owner_id": lender_id, "available": "true", "limit": 20},
+                                name="/api/books/ (estante)")
+        if not shelf.ok or not shelf.json():
+            return
+        book = random.choice(shelf.json())
+        with self.client.post("/api/loans/request", json={"book_id": book["id"]}, catch_response=True) as response:
+            if accept(response):
+                pending_requests[lender_id].append((response.json()["id"], self.user_id))
+
+    @task(2)
+    def return_book(self):
+        if not active_loans[self.user_id]:
+            return
+        loan_id = active_loans[self.user_id].popleft()
+        with self.client.post(f"/api/loans/{loan_id}/return", name="/api/loans/[id]/return",
+                              catch_response=True) as response:
+            if accept(response):
+                self.active = max(self.active - 1, 0)
+
+    @task(2)
+    def my_loans(self):
+        response = self.client.get("/api/loans/my_loans", params={"expand": "book,lender", "limit": 20},
+                                   name="/api/loans/my_loans")
+        if response.ok:
+            self.active = sum(loan["status"] == "active" for loan in response.json())
+
+class StressPlanShape(LoadTestShape):
+    """
+    Formas de carga do plano de estresse (--stress-plan):
+    - ramp: +--step-users VUs a cada --step-seconds até --max-users, parando
+      antes se a taxa de erro passar de --stop-error-rate (ponto de ruptura);
+    - spike: --max-users de uma vez por --hold-seconds e depois --step-users por
+      mais --hold-seconds, para medir a recuperação;
+    - steady: --max-users (a carga esperada) por --hold-seconds.
+    """
+
+    def tick(self):
+        options = self.runner.environment.parsed_options
+        run_time = self.get_run_time()
+        if options.stress_plan == "ramp":
+            step = int(run_time // options.step_seconds) + 1
+            users = step * options.step_users
+            if users > options.max_users or (step > 1 and self.runner.stats.total.fail_ratio > options.stop_error_rate):
+                return None
+            return users, options.shape_spawn_rate
+        if options.stress_plan == "spike":
+            if run_time < options.hold_seconds:
+                return options.max_users, options.max_users
+            if run_time < 2 * options.hold_seconds:
+                return options.step_users, options.max_users
+            return None
+        if run_time < options.hold_seconds:
+            return options.max_users, options.shape_spawn_rate
+        return None
+
+@events.quitting.add_listener
+def check_slos(environment, **kwargs):
+    """Compara o total da execução com os SLOs; se algum foi violado, o locust sai com código 1."""
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    options = environment.parsed_options
+    total = environment.stats.total
+    for entry in sorted(environment.stats.entries.values(), key=lambda e: (e.name, e.method)):
+        logger.info("%-6s %-36s n=%-7d p95=%6.0fms p99=%6.0fms erros=%.2f%%", entry.method, entry.name,
+                    entry.num_requests, entry.get_response_time_percentile(0.95),
+                    entry.get_response_time_percentile(0.99), entry.fail_ratio * 100)
+    if total.num_requests == 0:
+        logger.error("SLO: nenhuma requisição feita")
+        environment.process_exit_code = 1
+        return
+    p95, p99 = total.get_response_time_percentile(0.95), total.get_response_time_percentile(0.99)
+    checks = [
+        ("p95", p95, options.slo_p95_ms, "{:.0f}ms"),
+        ("p99", p99, options.slo_p99_ms, "{:.0f}ms"),
+        ("taxa de erro", total.fail_ratio, options.slo_error_rate, "{:.2%}"),
+    ]
+    violated = [f"{name} {fmt.format(value)} > {fmt.format(limit)}" for name, value, limit, fmt in checks if value > limit]
+    summary = ", ".join(f"{name}={fmt.format(value)}" for name, value, _, fmt in checks)
+    if violated:
+        logger.error("SLO violado (%s): %s", summary, "; ".join(violated))
+        environment.process_exit_code = 1
+    else:
+        logger.info("SLOs atendidos: %s", summary)
+
+# --- Como Executar ---
+# 1. Banco e servidor (a partir de backend/):
+#      python cli.py upgrade-schema
+#      PYTHONPATH=. python test/casos_testes/seed_carga.py --lenders 50 --borrowers 500
+#      uvicorn main:app --port 8000 --workers 4
+# 2. Estresse em degraus (+50 VUs a cada 5 min até 1000 ou 10% de erro), sem interface:
+#      locust -f test/casos_testes/locustfile_cenarios.py --headless --lenders 50 --borrowers 500 \
+#          --stress-plan ramp --step-users 50 --step-seconds 300 --max-users 1000 --csv carga
+# 3. Pico (1000 VUs de uma vez por 5 min e recuperação com 50):
+#      locust -f test/casos_testes/locustfile_cenarios.py --headless --stress-plan spike --max-users 1000
+# 4. Carga esperada: --stress-plan steady --max-users 100 --hold-seconds 600
+# Os limites dos SLOs vêm de --slo-p95-ms, --slo-p99-ms e --slo-error-rate; violados, o locust sai com código 1.
@@ -0,0 +1,68 @@
+# Arquivo: seed_carga.py
+# Prepara o banco para o teste de carga por cenários (locustfile_cenarios.py):
+# donos com livros e leitores com pontos de sobra, todos com a mesma senha,
+# inseridos direto no banco do servidor (DATABASE_URL) em vez de via API, para
+# a carga medir o uso normal e não milhares de cadastros com bcrypt.
+# Pode ser executado de novo: usuários que já existem são mantidos.
+
+import argparse
+
+PASSWORD = "carga123"
+# Leitores não podem ficar sem pontos no meio do teste (cada pedido custa DEBIT_PER_BORROW)
+BORROWER_POINTS = 1_000_000
+
+def lender_email(i: int) -> str:
+    return f"dono{i}@carga.p2plivros.com"
+
+def borrower_email(i: int) -> str:
+    return f"leitor{i}@carga.p2plivros.com"
+
+def seed(lenders: int, borrowers: int, books_per_lender: int):
+    # Imports do backend só aqui: o locustfile usa as funções acima sem carregá-lo
+    from sqlalchemy import func, insert, select
+    from core.database import SessionLocal, engine, unit_of_work
+    from core.schema import upgrade_schema
+    from core.security import hash_password
+    from repositories import catalog_repository
+    from models.user import User
+    from models.book import Book
+    import models.loan, models.notification, models.points  # noqa: F401 (registra os mappers)
+    from config.constants import INITIAL_POINTS
+
+    upgrade_schema(engine)
+    password = hash_password(PASSWORD)
+    wanted = [(lender_email(i), f"Dono {i}", INITIAL_POINTS) for i in range(lenders)]
+    wanted += [(borrower_email(i), f"Leitor {i}", BORROWER_POINTS) for i in range(borrowers)]
+
+    with SessionLocal() as db, unit_of_work(db):
+        existing = set(db.scalars(select(User.email).where(User.email.like("%@carga.p2plivros.com"))))
+        new_users = [{"email": email, "name": name, "password": password, "points": points}
+                     for email, name, points in wanted if email not in existing]
+        if new_users:
+            db.execute(insert(User), new_users)
+        owners = db.execute(
+            select(User.id, func.count(Book.id))
+            .outerjoin(Book, Book.owner_id == User.id)
+            .where(User.email.in_([lender_email(i) for i in range(lenders)]))
+            .group_by(User.id)
+        ).all()
+        books = [{"title": f"Livro de carga {owner_id}-{n}", "author": f"Autor {n % 50}", "condition": "Bom",
+                  "owner_id": owner_id, "available": True}
+                 for owner_id, count in owners for n in range(count, books_per_lender)]
+        if books:
+            db.execute(insert(Book), books)
+            catalog_repository.bump(db)
+    print(f"Usuários criados: {len(new_users)}; livros criados: {len(books)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Semeia donos, leitores e livros para o teste de carga")
+    parser.add_argument("--lenders", type=int, default=50)
+    parser.add_argument("--borrowers", type=int, default=500)
+    parser.add_argument("--books-per-lender", type=int, default=20)
+    args = parser.parse_args()
+    seed(args.lenders, args.borrowers, args.books_per_lender)
+
+# --- Como Executar ---
+# A partir de backend/, com o mesmo DATABASE_URL do servidor:
+#   PYTHONPATH=. python test/casos_testes/seed_carga.py --lenders 50 --borrowers 500 --books-per-lender 20
+# Os mesmos --lenders/--borrowers são passados ao locust (ver locustfile_cenarios.py).
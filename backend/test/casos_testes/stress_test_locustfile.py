@@ -5,6 +5,7 @@
 
 from locust import HttpUser, task, between
 import random
+import uuid
 
 # Constantes de Usuário para simulação
 TEST_USER_EMAIL = "stresstest@p2plivros.com"
@@ -23,22 +24,26 @@ class P2PLivrosStressUser(HttpUser):
     
     # Variáveis de estado
     token = None
+    book_ids = []
     
     def on_start(self):
         """
         Método executado no início da vida de cada usuário virtual.
         Simula o login e obtém o token de autenticação.
         """
+        # Um email por usuário virtual: com um só, todos disputavam a mesma conta
+        self.email = f"{uuid.uuid4().hex[:8]}.{TEST_USER_EMAIL}"
+
         # 1. Tenta registrar o usuário (para garantir que exista)
         self.client.post("/api/users/register", json={
             "name": "Stress Test User",
-            "email": TEST_USER_EMAIL,
+            "email": self.email,
             "password": TEST_USER_PASSWORD
         }, name="/api/users/register (Setup)")
         
         # 2. Realiza o Login
         response = self.client.post("/api/users/login", json={
-            "email": TEST_USER_EMAIL,
+            "email": self.email,
             "password": TEST_USER_PASSWORD
         }, name="/api/users/login")
         
@@ -54,7 +59,9 @@ class P2PLivrosStressUser(HttpUser):
         """
         Simula a listagem de livros disponíveis (operação de leitura mais comum).
         """
-        self.client.get("/api/books/", name="/api/books/ (Listar)")
+        response = self.client.get("/api/books/", params={"available": "true"}, name="/api/books/ (Listar)")
+        if response.status_code == 200:
+            self.book_ids = [book["id"] for book in response.json()]
 
     @task(2) # Prioridade 2 (menos frequente)
     def add_book(self):
@@ -65,7 +72,7 @@ class P2PLivrosStressUser(HttpUser):
             book_data = {
                 "title": f"Livro de Estresse {random.randint(1, 100000)}",
                 "author": "Stress Test",
-                "points": random.randint(5, 20)
+                "condition": random.choice(["Novo", "Bom", "Usado"])
             }
             self.client.post("/api/books/", json=book_data, name="/api/books/ (Cadastrar)")
 
@@ -75,15 +82,20 @@ class P2PLivrosStressUser(HttpUser):
         Simula a solicitação de um empréstimo (operação transacional).
         """
         if self.token:
-            # Simulação simplificada: tenta solicitar um livro com ID aleatório
-            random_book_id = random.randint(1, 50) 
+            # Pede um dos livros disponíveis vistos na última listagem
+            if not self.book_ids:
+                return
+            random_book_id = random.choice(self.book_ids)
             self.client.post("/api/loans/request", json={"book_id": random_book_id}, name="/api/loans/request")
 
 # --- Como Executar o Teste de Estresse ---
 # 1. Instalar o Locust: pip install locust
-# 2. Iniciar o backend: uvicorn main:app --reload --port 8000
+# 2. Iniciar o backend (a partir de backend/): python cli.py upgrade-schema
+#    e depois uvicorn main:app --reload --port 8000
 # 3. Executar o Locust e configurar uma carga alta (ex: 1000 usuários) na interface web
 #    ou via linha de comando:
 #    locust -f stress_test_locustfile.py
 # 4. Abrir o navegador em http://localhost:8089 e configurar a carga para estresse.
 #    Exemplo de configuração: Usuários: 1000, Taxa de Eclosão: 100
+# Cenário completo (donos e leitores semeados, ciclo pedido -> confirmação -> devolução,
+# formas de carga do plano de estresse e SLOs): locustfile_cenarios.py.
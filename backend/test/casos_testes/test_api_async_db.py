@@ -0,0 +1,115 @@
+# Arquivo: test_api_async_db.py
+# Testes de Integração do modo assíncrono (Settings.DB_ASYNC): a API inteira
+# roda sobre uma AsyncSession (aiosqlite) em vez da Session síncrona.
+
+import os
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import NullPool
+from main import app
+from config.settings import settings
+from core.database import Base, get_db, async_database_url, retry_on_conflict, run_db
+
+pytest.importorskip("aiosqlite")
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+from services import loan_service
+
+DB_FILE = "./test_async_db.db"
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_FILE}", poolclass=NullPool)
+AsyncTestingSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with AsyncTestingSession() as db:
+        yield db
+
+@pytest.fixture(scope="module")
+def client():
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_async_db
+    # A subida checaria o esquema do banco padrão; aqui o banco é o async_engine
+    startup_mode, settings.SCHEMA_STARTUP = settings.SCHEMA_STARTUP, "off"
+    with TestClient(app) as client:
+        client.portal.call(create_tables)
+        yield client
+    settings.SCHEMA_STARTUP = startup_mode
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+    os.remove(DB_FILE)
+
+async def create_tables():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+def login(client, email, name):
+    client.post("/api/users/register", json={"name": name, "email": email, "password": "senha123"})
+    response = client.post("/api/users/login", json={"email": email, "password": "senha123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_url_async_e_derivada_da_url_sincrona():
+    assert async_database_url("sqlite:///./p2p_books.db") == "sqlite+aiosqlite:///./p2p_books.db"
+    assert async_database_url("postgresql+psycopg2://u:p@db/p2p") == "postgresql+asyncpg://u:p@db/p2p"
+
+def test_fluxo_completo_de_emprestimo_com_sessao_async(client):
+    # Arrange: dono com um livro e um tomador, tudo via API
+    dono = login(client, "dono@async.com", "Dono")
+    tomador = login(client, "tomador@async.com", "Tomador")
+    book = client.post("/api/books/", json={"title": "Livro Async", "author": "Autor"}, headers=dono).json()
+
+    # Act: pedir, confirmar e devolver
+    loan = client.post("/api/loans/request", json={"book_id": book["id"]}, headers=tomador).json()
+    confirmed = client.post(f"/api/loans/{loan['id']}/confirm", headers=dono)
+    returned = client.post(f"/api/loans/{loan['id']}/return", headers=tomador)
+
+    # Assert
+    assert confirmed.status_code == 200 and confirmed.json()["status"] == "active"
+    assert returned.status_code == 200 and returned.json()["status"] == "returned"
+    livros = client.get("/api/books/", params={"q": "async"}).json()
+    assert livros[0]["available"] is True
+
+def test_conflito_com_sessao_async_espera_sem_bloquear_o_loop(client):
+    # Arrange: operação que perde a corrida na primeira tentativa
+    attempts = []
+
+    @retry_on_conflict
+    def operation(db, value):
+        attempts.append(value)
+        if len(attempts) == 1:
+            raise StaleDataError("versão mudou")
+        return value
+
+    async def call():
+        async with AsyncTestingSession() as db:
+            return await run_db(db, operation, 42)
+
+    # Act
+    with patch("core.database.time.sleep") as blocking_sleep:
+        result = client.portal.call(call)
+
+    # Assert: refez a operação e o backoff foi com asyncio.sleep, não time.sleep
+    assert result == 42 and attempts == [42, 42]
+    blocking_sleep.assert_not_called()
+
+def test_devolucao_pelo_tomador_refaz_o_conflito_no_loop(client):
+    # Arrange: a devolução perde a corrida uma vez e depois passa
+    return_loan = MagicMock()
+    return_loan.retried_operation.side_effect = [StaleDataError("versão mudou"), "devolvido"]
+
+    async def call():
+        async with AsyncTestingSession() as db:
+            return await run_db(db, loan_service.return_loan_by_user, 1, 7)
+
+    # Act
+    with patch.object(loan_service, "return_loan", return_loan), \
+         patch.object(loan_service.loan_repository, "get", return_value=SimpleNamespace(borrower_id=7)), \
+         patch("core.database.time.sleep") as blocking_sleep:
+        result = client.portal.call(call)
+
+    # Assert: a nova tentativa passa pelo run_db (asyncio.sleep), não pelo retry de return_loan
+    assert result == "devolvido"
+    assert return_loan.retried_operation.call_count == 2
+    blocking_sleep.assert_not_called()
@@ -0,0 +1,126 @@
+# Arquivo: test_api_books_bulk.py
+# Testes de Integração da importação em massa POST /api/books/bulk (CSV e NDJSON
+# lidos em streaming, validação por linha e inserção em lotes).
+
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from main import app
+from core.security import create_access_token
+from config.settings import settings
+from utils import streaming
+from models.user import User
+from models.book import Book
+
+client = TestClient(app)
+pytestmark = pytest.mark.usefixtures("api_db")
+
+@pytest.fixture
+def parceira(api_db):
+    """Usuário novo a cada teste, para contar só os livros importados nele; devolve (headers, id)."""
+    db = api_db()
+    user = User(name="Parceira", email=f"biblioteca{db.query(User).count()}@bulk.com", password="x")
+    db.add(user)
+    db.commit()
+    token = create_access_token(str(user.id))
+    owner_id = user.id
+    db.close()
+    return {"Authorization": f"Bearer {token}"}, owner_id
+
+def books_of(Session, owner_id):
+    db = Session()
+    books = db.query(Book).filter(Book.owner_id == owner_id).order_by(Book.id).all()
+    db.close()
+    return books
+
+def test_importa_csv_e_reporta_linhas_invalidas(api_db, parceira):
+    headers, owner_id = parceira
+    # Arrange: linha 3 sem título e linha 5 com colunas a mais
+    body = (
+        "title,author,condition\n"
+        "Dom Casmurro,Machado de Assis,Novo\n"
+        ",Autor Sem Livro,\n"
+        '"Vidas Secas, 1938",Graciliano Ramos,\n'
+        "Demais,A,B,C\n"
+    )
+
+    # Act
+    response = client.post("/api/books/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+
+    # Assert
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (2, 2)
+    assert [e["line"] for e in result["errors"]] == [3, 5]
+    titles = [b.title for b in books_of(api_db, owner_id)]
+    assert titles == ["Dom Casmurro", "Vidas Secas, 1938"]
+    assert books_of(api_db, owner_id)[1].condition == "Bom"
+
+def test_importa_ndjson_em_streaming_com_lotes(api_db, parceira, monkeypatch):
+    headers, owner_id = parceira
+    # Arrange: corpo enviado em pedaços que cortam linhas no meio
+    monkeypatch.setattr(settings, "BOOKS_BULK_BATCH_SIZE", 4)
+    lines = "".join(json.dumps({"title": f"Livro {i}", "author": "Autor"}) + "\n" for i in range(10))
+    lines += "{quebrado\n"
+    data = lines.encode()
+    chunks = (data[i:i + 7] for i in range(0, len(data), 7))
+    inserts = []
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO books"):
+            inserts.append(statement)
+    engine = api_db.kw["bind"]
+    event.listen(engine, "before_cursor_execute", count_inserts)
+
+    # Act
+    response = client.post("/api/books/bulk?format=ndjson", content=chunks, headers=headers)
+    event.remove(engine, "before_cursor_execute", count_inserts)
+
+    # Assert: 10 livros em 3 lotes (4 + 4 + 2) e o JSON quebrado reportado
+    result = response.json()
+    assert result["inserted"] == 10 and result["failed"] == 1
+    assert result["errors"][0]["line"] == 11
+    assert len(inserts) == 3
+    assert len(books_of(api_db, owner_id)) == 10
+
+def test_linha_longa_demais_vira_erro_da_linha(api_db, parceira, monkeypatch):
+    headers, owner_id = parceira
+    # Arrange: limite de 40 bytes; a linha 3 tem 30 caracteres, mas 60 bytes em UTF-8
+    monkeypatch.setattr(streaming, "MAX_LINE_BYTES", 40)
+    monkeypatch.setattr(settings, "BOOKS_BULK_BATCH_SIZE", 1)
+    body = "title,author\nAntes,A\n" + "ç" * 30 + ",B\n" + "x" * 100 + "\nDepois,C\n"
+    data = body.encode()
+    chunks = (data[i:i + 16] for i in range(0, len(data), 16))
+
+    # Act
+    response = client.post("/api/books/bulk", content=chunks, headers={**headers, "Content-Type": "text/csv"})
+
+    # Assert: as duas linhas longas são reportadas e a importação segue
+    result = response.json()
+    assert response.status_code == 200
+    assert (result["inserted"], result["failed"]) == (2, 2)
+    assert [e["line"] for e in result["errors"]] == [3, 4]
+    assert "maior que 40 bytes" in result["errors"][0]["error"]
+    assert [b.title for b in books_of(api_db, owner_id)] == ["Antes", "Depois"]
+
+def test_limite_de_erros_listados(parceira, monkeypatch):
+    headers, _ = parceira
+    monkeypatch.setattr(settings, "BOOKS_BULK_MAX_ERRORS", 3)
+    body = "title\n" + "\n".join('""' for _ in range(10)) + "\nUm Livro\n"
+
+    result = client.post("/api/books/bulk", content=body, headers={**headers, "Content-Type": "text/csv"}).json()
+
+    assert result["failed"] == 10 and len(result["errors"]) == 3
+    assert result["errors_truncated"] is True
+    assert result["inserted"] == 1
+
+def test_formato_desconhecido_e_recusado(parceira):
+    headers, _ = parceira
+    response = client.post("/api/books/bulk", content="x", headers={**headers, "Content-Type": "application/xml"})
+
+    assert response.status_code == 415
+
+def test_importacao_exige_login():
+    response = client.post("/api/books/bulk", content="title\nA\n", headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 401
@@ -0,0 +1,82 @@
+# Arquivo: test_api_books_etag.py
+# Testes de Integração do GET condicional de /api/books/: ETag pela versão do
+# catálogo + parâmetros, 304 com If-None-Match e cache da resposta serializada.
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from main import app
+from core.cache import catalog_cache
+from core.security import create_access_token
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module", autouse=True)
+def cache_limpo(api_db):
+    catalog_cache.clear()
+    yield
+    catalog_cache.clear()
+
+@pytest.fixture(scope="module")
+def usuarios(api_db):
+    db = api_db()
+    owner = User(name="Dono", email="dono@etag.com", password="x", points=50)
+    borrower = User(name="Tomador", email="tomador@etag.com", password="x", points=50)
+    db.add_all([owner, borrower])
+    db.commit()
+    tokens = {
+        "owner": {"Authorization": f"Bearer {create_access_token(str(owner.id))}"},
+        "borrower": {"Authorization": f"Bearer {create_access_token(str(borrower.id))}"},
+    }
+    db.close()
+    return tokens
+
+def test_if_none_match_igual_devolve_304(usuarios):
+    client.post("/api/books/", json={"title": "Primeiro", "author": "A"}, headers=usuarios["owner"])
+    first = client.get("/api/books/")
+
+    second = client.get("/api/books/", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200 and first.json()[0]["title"] == "Primeiro"
+    assert second.status_code == 304 and second.content == b""
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+def test_parametros_diferentes_geram_etags_diferentes(usuarios):
+    assert client.get("/api/books/").headers["ETag"] != client.get("/api/books/?limit=5").headers["ETag"]
+
+def test_novo_livro_e_emprestimo_mudam_o_etag(usuarios):
+    # Arrange
+    etag = client.get("/api/books/").headers["ETag"]
+    book = client.post("/api/books/", json={"title": "Segundo", "author": "B"}, headers=usuarios["owner"]).json()
+    after_add = client.get("/api/books/", headers={"If-None-Match": etag})
+
+    # Act: pedido não muda o catálogo; confirmação muda (livro fica indisponível)
+    loan = client.post("/api/loans/request", json={"book_id": book["id"]}, headers=usuarios["borrower"]).json()
+    after_request = client.get("/api/books/", headers={"If-None-Match": after_add.headers["ETag"]})
+    client.post(f"/api/loans/{loan['id']}/confirm", headers=usuarios["owner"])
+    after_confirm = client.get("/api/books/", headers={"If-None-Match": after_add.headers["ETag"]})
+
+    # Assert
+    assert after_add.status_code == 200 and len(after_add.json()) == 2
+    assert after_request.status_code == 304
+    assert after_confirm.status_code == 200
+    assert [b["available"] for b in after_confirm.json()] == [True, False]
+
+def test_resposta_repetida_vem_do_cache_sem_consultar_livros(api_db, usuarios):
+    client.get("/api/books/?q=segundo")
+    statements = []
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+    engine = api_db.kw["bind"]
+    event.listen(engine, "before_cursor_execute", capture)
+
+    response = client.get("/api/books/?q=segundo")
+    event.remove(engine, "before_cursor_execute", capture)
+
+    # Só a leitura da versão do catálogo chega ao banco
+    assert response.json()[0]["title"] == "Segundo"
+    assert not any("FROM books" in s for s in statements)
+    assert any("catalog_version" in s for s in statements)
@@ -0,0 +1,84 @@
+# Arquivo: test_api_books_paginacao.py
+# Testes de Integração para a paginação por cursor de GET /api/books/
+# Os livros são inseridos direto no banco para o teste ficar rápido.
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.user import User
+from models.book import Book
+
+# --- Configuração do Ambiente de Teste ---
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module", autouse=True)
+def catalogo(api_db):
+    """Popula o catálogo do módulo: 20 livros de um dono e 5 de outro, um em cada 5 indisponível."""
+    db = api_db()
+    owner = User(name="Dono", email="dono@paginacao.com", password="x")
+    other = User(name="Outro", email="outro@paginacao.com", password="x")
+    db.add_all([owner, other])
+    db.flush()
+    for i in range(1, 26):
+        db.add(Book(title=f"Livro {i}", author="Autor", owner_id=owner.id if i <= 20 else other.id, available=i % 5 != 0))
+    db.commit()
+    db.close()
+
+# --- Testes ---
+
+def test_primeira_pagina_respeita_limit_e_devolve_cursor():
+    response = client.get("/api/books/", params={"limit": 10})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 10
+    assert [b["title"] for b in data][:2] == ["Livro 1", "Livro 2"]
+    assert response.headers["X-Next-Cursor"] == str(data[-1]["id"])
+    assert "X-Total-Count" not in response.headers # total é opcional
+
+def test_percorrer_todas_as_paginas_sem_repetir():
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 7}
+        if cursor:
+            params["after_id"] = cursor
+        response = client.get("/api/books/", params=params)
+        ids += [b["id"] for b in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(ids) == 25
+    assert ids == sorted(set(ids)) # ordem estável e sem duplicados
+
+def test_filtro_available_e_total():
+    response = client.get("/api/books/", params={"available": "true", "include_total": "true", "limit": 50})
+
+    data = response.json()
+    assert all(b["available"] for b in data)
+    assert len(data) == 20
+    assert response.headers["X-Total-Count"] == "20"
+    assert "X-Next-Cursor" not in response.headers # última página
+
+def test_filtro_owner_id():
+    todos = client.get("/api/books/", params={"limit": 50}).json()
+    owner_id = todos[0]["owner_id"]
+
+    data = client.get("/api/books/", params={"owner_id": owner_id, "limit": 50}).json()
+
+    assert len(data) == 20
+    assert all(b["owner_id"] == owner_id for b in data)
+
+def test_limit_acima_do_maximo_e_rejeitado():
+    response = client.get("/api/books/", params={"limit": 100000})
+    assert response.status_code == 422
+
+def test_cursor_fora_da_busca_e_recusado():
+    # O livro 1 não casa com "livro 2*"; o cursor não tem rank para continuar
+    primeiro = client.get("/api/books/", params={"limit": 1}).json()[0]
+
+    response = client.get("/api/books/", params={"q": "livro 2", "after_id": primeiro["id"]})
+
+    assert response.status_code == 400
+    assert "Cursor de busca inválido" in response.json()["detail"]
@@ -0,0 +1,97 @@
+# Arquivo: test_api_metrics.py
+# Testes do endpoint /metrics (formato texto do Prometheus): latência e status
+# por template de rota, SQL por requisição, bcrypt e profundidade da outbox.
+
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+from core import metrics
+from core.security import create_access_token, hash_password
+from models.user import User
+from models.book import Book
+
+client = TestClient(app)
+pytestmark = pytest.mark.usefixtures("api_db")
+
+def scrape():
+    """Amostras de /metrics como {"nome{labels}": valor}."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+def test_metricas_por_template_de_rota_e_status(api_db):
+    # Arrange
+    db = api_db()
+    owner = User(name="Dono", email="dono@metrics.com", password="x", points=50)
+    borrower = User(name="Tomador", email="tomador@metrics.com", password="x", points=50)
+    db.add_all([owner, borrower])
+    db.flush()
+    book = Book(title="Livro", author="Autor", owner_id=owner.id)
+    db.add(book)
+    db.commit()
+    owner_auth = {"Authorization": f"Bearer {create_access_token(str(owner.id))}"}
+    borrower_auth = {"Authorization": f"Bearer {create_access_token(str(borrower.id))}"}
+    db.close()
+
+    # Act
+    loan = client.post("/api/loans/request", json={"book_id": book.id}, headers=borrower_auth).json()
+    client.post(f"/api/loans/{loan['id']}/confirm", headers=owner_auth)
+    client.post("/api/loans/99999/confirm", headers=owner_auth)
+    client.get("/nao-existe")
+    samples = scrape()
+
+    # Assert: o id concreto nunca vira label
+    route = '/api/loans/{loan_id}/confirm'
+    assert samples[f'http_requests_total{{method="POST",route="{route}",status="200"}}'] >= 1
+    assert samples[f'http_requests_total{{method="POST",route="{route}",status="400"}}'] >= 1
+    assert samples['http_requests_total{method="GET",route="unmatched",status="404"}'] >= 1
+    assert not any(f"/api/loans/{loan['id']}/" in name for name in samples)
+    assert samples[f'http_request_duration_seconds_count{{method="POST",route="{route}"}}'] >= 2
+    assert samples[f'http_request_db_statements_count{{route="{route}"}}'] >= 2
+    assert samples[f'http_request_db_statements_sum{{route="{route}"}}'] >= 5
+    assert samples[f'http_request_db_seconds_sum{{route="{route}"}}'] > 0
+    assert samples['notification_queue_depth{status="pending"}'] == 1
+    assert samples["http_requests_in_flight"] == 1  # o próprio scrape
+
+def test_comandos_sql_sao_contados_por_requisicao():
+    before = scrape()
+    client.get("/api/books/", params={"limit": 5})
+    after = scrape()
+
+    key = 'http_request_db_statements_count{route="/api/books/"}'
+    statements = after['http_request_db_statements_sum{route="/api/books/"}'] - before.get(
+        'http_request_db_statements_sum{route="/api/books/"}', 0)
+    assert after[key] - before.get(key, 0) == 1
+    assert statements >= 1
+    assert after["db_statement_duration_seconds_count"] > before["db_statement_duration_seconds_count"]
+
+def test_tempo_do_bcrypt():
+    before = scrape().get("bcrypt_duration_seconds_count", 0)
+    with patch("core.security.pwd_context.hash", return_value="hash"):
+        hash_password("senha123")
+
+    assert scrape()["bcrypt_duration_seconds_count"] == before + 1
+
+def test_formato_do_histograma():
+    histogram = metrics.Histogram("teste_latencia_seconds", "Teste.", ("rota",), buckets=(0.1, 1.0))
+    histogram.labels('/a"b').observe(0.05)
+    histogram.labels('/a"b').observe(0.5)
+    histogram.labels('/a"b').observe(3)
+    metrics.REGISTRY.remove(histogram)
+
+    assert histogram.render() == [
+        "# HELP teste_latencia_seconds Teste.",
+        "# TYPE teste_latencia_seconds histogram",
+        'teste_latencia_seconds_bucket{rota="/a\\"b",le="0.1"} 1',
+        'teste_latencia_seconds_bucket{rota="/a\\"b",le="1.0"} 2',
+        'teste_latencia_seconds_bucket{rota="/a\\"b",le="+Inf"} 3',
+        'teste_latencia_seconds_sum{rota="/a\\"b"} 3.55',
+        'teste_latencia_seconds_count{rota="/a\\"b"} 3',
+    ]
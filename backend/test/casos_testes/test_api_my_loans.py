@@ -0,0 +1,88 @@
+# Arquivo: test_api_my_loans.py
+# Testes de Integração de GET /api/loans/my_loans: livro e dono embutidos com
+# `expand` sem N+1, filtro por status e paginação por cursor (before_id).
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from core.profiler import query_budget
+from core.security import create_access_token
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+
+client = TestClient(app)
+pytestmark = pytest.mark.usefixtures("api_db")
+
+@pytest.fixture(scope="module")
+def tomador(api_db):
+    """12 empréstimos de livros de 3 donos diferentes: 4 pedidos, 4 ativos e 4 devolvidos; o Livro 0 não tem autor."""
+    db = api_db()
+    owners = [User(name=f"Dono {i}", email=f"dono{i}@myloans.com", password="x") for i in range(3)]
+    borrower = User(name="Tomador", email="tomador@myloans.com", password="x")
+    db.add_all(owners + [borrower])
+    db.flush()
+    for i in range(12):
+        owner = owners[i % 3]
+        book = Book(title=f"Livro {i}", author=f"Autor {i}" if i else None, owner_id=owner.id)
+        db.add(book)
+        db.flush()
+        status = ("requested", "active", "returned")[i % 3]
+        db.add(Loan(book_id=book.id, lender_id=owner.id, borrower_id=borrower.id, status=status))
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(str(borrower.id))}"}
+    db.close()
+    return headers
+
+def test_expand_embute_livro_e_dono_numa_consulta(tomador):
+    # Autenticação + um único SELECT com JOIN, sem lazy load por empréstimo
+    with query_budget(2, repeat_threshold=2):
+        response = client.get("/api/loans/my_loans", params={"expand": "book,lender"}, headers=tomador)
+
+    loans = response.json()
+    assert response.status_code == 200 and len(loans) == 12
+    assert loans[0]["book"] == {"id": loans[0]["book_id"], "title": "Livro 11", "author": "Autor 11"}
+    assert loans[0]["lender"]["name"] == "Dono 2"
+    assert [loan["id"] for loan in loans] == sorted((loan["id"] for loan in loans), reverse=True)
+
+def test_sem_expand_nao_carrega_relacionamentos(tomador):
+    with query_budget(2, repeat_threshold=2):
+        response = client.get("/api/loans/my_loans", params={"expand": "lender"}, headers=tomador)
+        plain = client.get("/api/loans/my_loans", headers=tomador)
+
+    assert response.json()[0]["book"] is None and response.json()[0]["lender"]["name"] == "Dono 2"
+    assert all(loan["book"] is None and loan["lender"] is None for loan in plain.json())
+
+def test_expand_com_livro_sem_autor(tomador):
+    response = client.get("/api/loans/my_loans", params={"expand": "book", "status": "requested"}, headers=tomador)
+
+    assert response.status_code == 200
+    assert response.json()[-1]["book"]["title"] == "Livro 0" and response.json()[-1]["book"]["author"] is None
+
+def test_filtro_por_status(tomador):
+    response = client.get("/api/loans/my_loans", params=[("status", "active"), ("status", "requested")], headers=tomador)
+
+    assert sorted({loan["status"] for loan in response.json()}) == ["active", "requested"]
+    assert len(response.json()) == 8
+
+def test_paginacao_por_cursor(tomador):
+    # Arrange
+    ids = []
+    params = {"limit": 5, "expand": "book"}
+
+    # Act: segue o X-Next-Cursor até a última página
+    while True:
+        response = client.get("/api/loans/my_loans", params=params, headers=tomador)
+        ids += [loan["id"] for loan in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["before_id"] = response.headers["X-Next-Cursor"]
+
+    # Assert
+    assert len(ids) == 12 and len(set(ids)) == 12
+    assert ids == sorted(ids, reverse=True)
+
+def test_expand_invalido_e_recusado(tomador):
+    response = client.get("/api/loans/my_loans", params={"expand": "book,password"}, headers=tomador)
+
+    assert response.status_code == 422
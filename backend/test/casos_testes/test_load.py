@@ -3,6 +3,7 @@
 
 from locust import HttpUser, task, between
 import random
+import uuid
 
 # Constantes de Usuário para simulação
 TEST_USER_EMAIL = "loadtest@p2plivros.com"
@@ -20,22 +21,26 @@ class P2PLivrosUser(HttpUser):
     
     # Variáveis de estado
     token = None
+    book_ids = []
     
     def on_start(self):
         """
         Método executado no início da vida de cada usuário virtual.
         Usado para simular o login e obter o token de autenticação.
         """
+        # Um email por usuário virtual: com um só, todos disputavam a mesma conta
+        self.email = f"{uuid.uuid4().hex[:8]}.{TEST_USER_EMAIL}"
+
         # 1. Tenta registrar o usuário (para garantir que exista)
         self.client.post("/api/users/register", json={
             "name": "Load Test User",
-            "email": TEST_USER_EMAIL,
+            "email": self.email,
             "password": TEST_USER_PASSWORD
         }, name="/api/users/register (Setup)")
         
         # 2. Realiza o Login
         response = self.client.post("/api/users/login", json={
-            "email": TEST_USER_EMAIL,
+            "email": self.email,
             "password": TEST_USER_PASSWORD
         }, name="/api/users/login")
         
@@ -51,7 +56,9 @@ class P2PLivrosUser(HttpUser):
         """
         Simula a listagem de livros disponíveis (operação de leitura mais comum).
         """
-        self.client.get("/api/books/", name="/api/books/ (Listar)")
+        response = self.client.get("/api/books/", params={"available": "true"}, name="/api/books/ (Listar)")
+        if response.status_code == 200:
+            self.book_ids = [book["id"] for book in response.json()]
 
     @task(1) # Prioridade 1 (menos frequente)
     def add_book(self):
@@ -62,7 +69,7 @@ class P2PLivrosUser(HttpUser):
             book_data = {
                 "title": f"Livro de Teste {random.randint(1, 10000)}",
                 "author": "Load Test",
-                "points": random.randint(5, 20)
+                "condition": random.choice(["Novo", "Bom", "Usado"])
             }
             self.client.post("/api/books/", json=book_data, name="/api/books/ (Cadastrar)")
 
@@ -72,13 +79,17 @@ class P2PLivrosUser(HttpUser):
         Simula a solicitação de um empréstimo (operação transacional).
         """
         if self.token:
-            # Simulação simplificada: tenta solicitar um livro com ID aleatório
-            # Em um teste real, seria necessário listar os IDs disponíveis primeiro.
-            random_book_id = random.randint(1, 50) 
+            # Pede um dos livros disponíveis vistos na última listagem
+            if not self.book_ids:
+                return
+            random_book_id = random.choice(self.book_ids)
             self.client.post("/api/loans/request", json={"book_id": random_book_id}, name="/api/loans/request")
 
 # --- Como Executar o Teste de Carga ---
 # 1. Instalar o Locust: pip install locust
-# 2. Iniciar o backend: uvicorn main:app --reload --port 8000
+# 2. Iniciar o backend (a partir de backend/): python cli.py upgrade-schema
+#    e depois uvicorn main:app --reload --port 8000
 # 3. Executar o Locust: locust -f locustfile.py
 # 4. Abrir o navegador em http://localhost:8089 e configurar a carga.
+# Cenário completo (donos e leitores semeados, ciclo pedido -> confirmação -> devolução,
+# formas de carga do plano de estresse e SLOs): locustfile_cenarios.py.
@@ -0,0 +1,82 @@
+# Arquivo: test_unit_busca_livros.py
+# Testes do índice de texto (FTS5) usado na busca de livros por título/autor.
+# Usa um banco SQLite em memória, então não precisa da API rodando.
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from core.database import Base
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from repositories import book_repository
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    owner = User(name="Dono", email="dono@busca.com", password="x")
+    session.add(owner)
+    session.flush()
+    session.add_all([
+        Book(title="Python Fluente", author="Luciano Ramalho", owner_id=owner.id),
+        Book(title="Python e Python para Iniciantes", author="Mark Lutz", owner_id=owner.id),
+        Book(title="Dom Casmurro", author="Machado de Assis", owner_id=owner.id),
+        Book(title="Ação e Reação", author="Autor X", owner_id=owner.id),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+def titulos(books):
+    return [b.title for b in books]
+
+def test_busca_por_prefixo_ordena_por_relevancia(db):
+    # "pyth" casa com "Python"; o livro com mais ocorrências vem primeiro
+    assert titulos(book_repository.search_rows(db, q="pyth")) == ["Python e Python para Iniciantes", "Python Fluente"]
+
+def test_busca_ignora_acentos_e_maiusculas(db):
+    assert titulos(book_repository.search_rows(db, q="ACAO")) == ["Ação e Reação"]
+
+def test_busca_por_autor_e_titulo_juntos(db):
+    assert titulos(book_repository.search_rows(db, q="python", author="ramal")) == ["Python Fluente"]
+    assert book_repository.count(db, author="machado") == 1
+
+def test_termo_sem_palavras_nao_lista_o_catalogo(db):
+    assert book_repository.search_rows(db, q="!!!") == []
+    assert book_repository.search_rows(db, author="- *") == []
+    assert book_repository.count(db, q="!!!") == 0
+    assert len(book_repository.search_rows(db, q="")) == 4
+
+def test_paginacao_por_cursor_na_busca(db):
+    primeira = book_repository.search_rows(db, q="pyth", limit=1)
+    segunda = book_repository.search_rows(db, q="pyth", after_id=primeira[0].id, limit=1)
+
+    assert titulos(primeira + segunda) == titulos(book_repository.search_rows(db, q="pyth"))
+
+def test_cursor_que_nao_casa_mais_com_a_busca_e_recusado(db):
+    primeira = book_repository.search_rows(db, q="pyth", limit=1)
+    book = db.get(Book, primeira[0].id)
+    book.title = "Outro Título"
+    book_repository.update(db, book)
+    db.commit()
+
+    with pytest.raises(ValueError, match="Cursor de busca inválido"):
+        book_repository.search_rows(db, q="pyth", after_id=primeira[0].id, limit=1)
+
+def test_indice_acompanha_update_e_rebuild(db):
+    book = db.query(Book).filter(Book.title == "Dom Casmurro").one()
+    book.title = "Memórias Póstumas"
+    book_repository.update(db, book)
+    db.commit()
+
+    assert book_repository.search_rows(db, q="casmurro") == []
+    assert titulos(book_repository.search_rows(db, q="memorias")) == ["Memórias Póstumas"]
+
+    # Apaga o índice por fora e reconstrói a partir da tabela books
+    db.execute(text("INSERT INTO books_fts(books_fts) VALUES ('delete-all')"))
+    db.commit()
+    assert book_repository.search_rows(db, q="memorias") == []
+    book_repository.rebuild_search_index(db)
+    assert titulos(book_repository.search_rows(db, q="memorias")) == ["Memórias Póstumas"]
@@ -0,0 +1,66 @@
+# Arquivo: test_unit_cache_usuario.py
+# Testes Unitários do cache de identidade usado em get_current_user (core/cache.py)
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from core.cache import TTLCache, user_cache
+from core.database import Base
+from core.security import create_access_token
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from repositories import user_repository
+from routers.users import get_current_user
+
+def test_ttl_cache_expira_e_conta_acertos():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None # expirou
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_ttl_cache_remove_o_menos_usado_quando_cheio():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a") # "a" passa a ser o mais recente
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def test_get_current_user_so_consulta_o_banco_no_primeiro_acesso():
+    user_cache.clear()
+    token = create_access_token("7")
+    db_user = MagicMock(id=7, email="cache@teste.com", points=50)
+    db_user.name = "Cache"
+
+    with patch("routers.users.get_user_repo", return_value=db_user) as mock_get:
+        primeiro = asyncio.run(get_current_user(token=token, db=MagicMock(spec=Session)))
+        segundo = asyncio.run(get_current_user(token=token, db=MagicMock(spec=Session)))
+
+    mock_get.assert_called_once()
+    assert primeiro.id == segundo.id == 7
+    assert segundo.points == 50
+
+def test_update_do_usuario_invalida_o_cache_no_commit():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = user_repository.create(db, User(name="Ana", email="ana@cache.com", password="x"))
+    db.commit()
+    user_cache.set(user.id, "versão antiga")
+
+    user.points -= 5
+    user_repository.update(db, user)
+    db.commit()
+
+    assert user_cache.get(user.id) is None
+    db.close()
@@ -0,0 +1,117 @@
+# Arquivo: test_unit_eventos_emprestimo.py
+# Testes do push de eventos de empréstimo (GET /api/loans/events): publicação
+# após o commit para dono e tomador, filas limitadas por conexão e formato SSE.
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+from main import app
+from core.events import EventBroker, broker, publish_on_commit
+from models.user import User
+from routers.loans import sse_stream
+from services import loan_service
+
+@pytest.fixture
+def cenario(cenario, Session):
+    """O cenário comum mais um usuário sem relação com o empréstimo."""
+    db = Session()
+    stranger = User(name="Outro", email="outro@teste.com", password="x", points=50)
+    db.add(stranger)
+    db.commit()
+    ids = {**cenario, "stranger": stranger.id}
+    db.close()
+    return ids
+
+def test_pedido_e_confirmacao_chegam_ao_dono_e_ao_tomador(Session, cenario):
+    async def scenario():
+        # Arrange: uma conexão por usuário; o serviço roda no threadpool, como nas rotas
+        subs = {name: broker.subscribe(cenario[name]) for name in ("owner", "borrower", "stranger")}
+        db = Session()
+        try:
+            # Act
+            loan = await run_in_threadpool(loan_service.request_loan, db, cenario["borrower"], cenario["book"])
+            await run_in_threadpool(loan_service.confirm_loan, db, loan.id)
+            received = {name: [await asyncio.wait_for(s.queue.get(), 1) for _ in range(2)]
+                        for name, s in subs.items() if name != "stranger"}
+            return loan.id, received, subs["stranger"].queue.qsize()
+        finally:
+            for s in subs.values():
+                broker.unsubscribe(s)
+            db.close()
+
+    loan_id, received, stranger_events = asyncio.run(scenario())
+
+    # Assert
+    for events in received.values():
+        assert [(e["loan_id"], e["status"]) for e in events] == [(loan_id, "requested"), (loan_id, "active")]
+    assert stranger_events == 0
+
+def test_operacao_desfeita_nao_publica(Session, cenario):
+    async def scenario():
+        sub = broker.subscribe(cenario["owner"])
+        db = Session()
+        try:
+            with pytest.raises(ValueError):
+                await run_in_threadpool(loan_service.request_loan, db, cenario["owner"] + 100, cenario["book"])
+            return sub.queue.qsize()
+        finally:
+            broker.unsubscribe(sub)
+            db.close()
+
+    assert asyncio.run(scenario()) == 0
+
+def test_evento_agendado_depois_do_ultimo_flush_e_montado_no_commit(Session, cenario):
+    async def scenario():
+        sub = broker.subscribe(cenario["owner"])
+        db = Session()
+        try:
+            # Nada a gravar depois do agendamento: o commit não dispara outro flush
+            db.flush()
+            publish_on_commit(db, (cenario["owner"],), lambda: {"type": "teste", "book_id": cenario["book"]})
+            db.commit()
+            return await asyncio.wait_for(sub.queue.get(), 1)
+        finally:
+            broker.unsubscribe(sub)
+            db.close()
+
+    assert asyncio.run(scenario()) == {"type": "teste", "book_id": cenario["book"]}
+
+def test_fila_cheia_descarta_e_stream_pede_resync():
+    async def scenario():
+        small = EventBroker(queue_size=2)
+        sub = small.subscribe(7)
+        for i in range(5):
+            small.publish([7], {"type": "loan", "loan_id": i})
+        return small.stats(), sub
+
+    stats, sub = asyncio.run(scenario())
+
+    assert sub.queue.qsize() == 2 and sub.lagged is True
+    assert stats["dropped"] == 3 and stats["connections"] == 1
+
+def test_stream_sse_com_heartbeat_evento_e_limpeza():
+    async def scenario():
+        stream = sse_stream(42, heartbeat=0.01)
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        broker.publish([42], {"type": "loan", "loan_id": 1, "status": "returned"})
+        chunk = await stream.__anext__()
+        while chunk == ": ping\n\n":
+            chunk = await stream.__anext__()
+        chunks.append(chunk)
+        connected = broker.stats()["connections"]
+        await stream.aclose()
+        return chunks, connected, broker.stats()["connections"]
+
+    chunks, connected, after_close = asyncio.run(scenario())
+
+    assert chunks[:2] == [": connected\n\n", ": ping\n\n"]
+    assert chunks[2] == 'event: loan\ndata: {"type": "loan", "loan_id": 1, "status": "returned"}\n\n'
+    assert connected == 1 and after_close == 0
+
+def test_stream_exige_token():
+    client = TestClient(app)
+
+    assert client.get("/api/loans/events").status_code == 401
+    assert client.get("/api/loans/events?token=invalido").status_code == 401
+    assert client.get("/api/loans/events/stats").json()["connections"] == 0
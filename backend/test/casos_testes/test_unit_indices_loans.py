@@ -0,0 +1,65 @@
+# Arquivo: test_unit_indices_loans.py
+# Confere com EXPLAIN QUERY PLAN que as consultas quentes de loan_repository
+# usam os índices declarados em models/loan.py (e não varrem a tabela inteira).
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+from core.database import Base
+from core.schema import upgrade_schema
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from repositories import loan_repository
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def query_plan(engine, repository_call):
+    """Executa a função do repositório, captura o SQL gerado e devolve o plano dele."""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", capture)
+    db = sessionmaker(bind=engine)()
+    repository_call(db)
+    db.close()
+    event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = statements[-1]
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+def test_emprestimos_ativos_do_tomador_usam_indice(engine):
+    plan = query_plan(engine, lambda db: loan_repository.get_active_by_borrower(db, 1))
+
+    assert "SCAN loans" not in plan
+    assert "ix_loans_active_borrower" in plan or "ix_loans_borrower_status" in plan
+
+def test_emprestimos_atrasados_usam_indice(engine):
+    plan = query_plan(engine, loan_repository.get_overdue_rows)
+
+    assert "SCAN loans" not in plan
+    assert "ix_loans_active_due_date" in plan or "ix_loans_status_due_date" in plan
+
+def test_historico_do_tomador_usa_indice(engine):
+    plan = query_plan(engine, lambda db: loan_repository.get_rows_by_borrower_id(db, 1))
+
+    assert "ix_loans_borrower_status" in plan
+
+def test_upgrade_cria_indices_em_banco_antigo(engine):
+    # Simula um banco criado antes dos índices novos
+    with engine.begin() as conn:
+        for index in Loan.__table__.indexes:
+            if index.name != "ix_loans_id":
+                conn.exec_driver_sql(f"DROP INDEX {index.name}")
+
+    upgrade_schema(engine)
+
+    names = {i["name"] for i in inspect(engine).get_indexes("loans")}
+    assert {"ix_loans_borrower_status", "ix_loans_active_borrower", "ix_loans_active_due_date"} <= names
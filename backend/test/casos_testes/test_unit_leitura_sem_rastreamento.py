@@ -0,0 +1,78 @@
+# Arquivo: test_unit_leitura_sem_rastreamento.py
+# Testes das consultas só leitura dos repositórios (search_rows,
+# get_rows_by_borrower_id, get_overdue_rows): mesmos dados e ordem da consulta
+# ORM equivalente, mas sem entidades no identity map da sessão.
+
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from core.database import Base
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from repositories import book_repository, loan_repository
+from schemas.book import BookOut
+from schemas.loan import LoanExpandedOut, LoanOut
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    owner = User(name="Dona", email="dona@leitura.com", password="x")
+    borrower = User(name="Tomador", email="tomador@leitura.com", password="x")
+    session.add_all([owner, borrower])
+    session.flush()
+    books = [Book(title=f"Python {i}", author=None if i == 1 else "Autor", owner_id=owner.id) for i in range(5)]
+    session.add_all(books)
+    session.flush()
+    today = date.today()
+    session.add_all([
+        Loan(book_id=book.id, lender_id=owner.id, borrower_id=borrower.id, status=("requested", "active")[i % 2],
+             start_date=today - timedelta(days=20), due_date=today - timedelta(days=6))
+        for i, book in enumerate(books)
+    ])
+    session.commit()
+    session.expunge_all()
+    yield session
+    session.close()
+
+def test_search_rows_igual_a_consulta_orm_sem_identity_map(db):
+    # Act
+    rows = book_repository.search_rows(db, available=True, limit=3)
+    tracked = len(db.identity_map)
+    books = db.query(Book).filter(Book.available == True).order_by(Book.id).limit(3).all()  # noqa: E712
+
+    # Assert
+    assert tracked == 0
+    assert [BookOut.from_orm(r) for r in rows] == [BookOut.from_orm(b) for b in books]
+
+@pytest.mark.parametrize("expand", [(), ("book",), ("lender",), ("book", "lender")])
+def test_registros_de_emprestimo_iguais_aos_da_consulta_orm(db, expand):
+    # Arrange
+    borrower_id = db.query(User.id).filter(User.name == "Tomador").scalar()
+
+    # Act
+    records = loan_repository.get_rows_by_borrower_id(db, borrower_id, ["active", "requested"], expand=expand)
+    tracked = len(db.identity_map)
+    loans = (db.query(Loan).filter(Loan.borrower_id == borrower_id, Loan.status.in_(["active", "requested"]))
+             .order_by(Loan.id.desc()).all())
+    expected = [
+        LoanExpandedOut.from_orm(loan).copy(update={name: None for name in ("book", "lender") if name not in expand})
+        for loan in loans
+    ]
+
+    # Assert
+    assert tracked == 0
+    assert [LoanExpandedOut.from_orm(r) for r in records] == expected
+    assert all((r.book is None) != ("book" in expand) for r in records)
+
+def test_atrasados_sem_identity_map(db):
+    rows = loan_repository.get_overdue_rows(db)
+    tracked = len(db.identity_map)
+    loans = db.query(Loan).filter(Loan.status == "active", Loan.due_date < date.today()).order_by(Loan.id).all()
+
+    assert tracked == 0
+    assert [LoanOut.from_orm(r) for r in rows] == [LoanOut.from_orm(l) for l in loans]
+    assert len(rows) == 2
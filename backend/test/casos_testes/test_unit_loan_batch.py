@@ -0,0 +1,130 @@
+# Arquivo: test_unit_loan_batch.py
+# Testes das operações em lote de empréstimos (confirm_loans / return_loans):
+# resultado por item, uma transação e número de consultas que não cresce com o lote.
+
+import pytest
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from main import app
+from core.database import get_db
+from core.security import create_access_token
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from services import loan_service
+from config.constants import INITIAL_POINTS, CREDIT_PER_LEND, DEBIT_PER_BORROW, LATE_FINE_PER_DAY
+
+def seed(Session, pedidos):
+    """Um dono, `pedidos` tomadores e um pedido pendente de cada um; devolve (dono, ids dos pedidos)."""
+    db = Session()
+    owner = User(name="Dono", email="dono@lote.com", password="x", points=INITIAL_POINTS)
+    db.add(owner)
+    db.flush()
+    loan_ids = []
+    for i in range(pedidos):
+        borrower = User(name=f"T{i}", email=f"t{i}@lote.com", password="x", points=INITIAL_POINTS)
+        book = Book(title=f"Livro {i}", author="Autor", owner_id=owner.id)
+        db.add_all([borrower, book])
+        db.flush()
+        loan = Loan(book_id=book.id, lender_id=owner.id, borrower_id=borrower.id)
+        db.add(loan)
+        db.flush()
+        loan_ids.append(loan.id)
+    db.commit()
+    owner_id = owner.id
+    db.close()
+    return owner_id, loan_ids
+
+def count_statements(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+def test_confirmacao_em_lote_com_resultado_por_item(Session):
+    # Arrange: 3 pedidos válidos, um id inexistente e um repetido
+    owner_id, loan_ids = seed(Session, 3)
+    db = Session()
+
+    # Act
+    results = loan_service.confirm_loans(db, loan_ids + [9999, loan_ids[0]], owner_id)
+
+    # Assert
+    assert [r["ok"] for r in results] == [True, True, True, False]
+    assert results[3]["error"] == "Pedido não encontrado."
+    assert db.get(User, owner_id).points == INITIAL_POINTS + 3 * CREDIT_PER_LEND
+    borrower = db.get(User, db.get(Loan, loan_ids[0]).borrower_id)
+    assert borrower.points == INITIAL_POINTS - DEBIT_PER_BORROW and borrower.active_loans == 1
+    assert all(db.get(Book, db.get(Loan, i).book_id).available is False for i in loan_ids)
+    db.close()
+
+def test_so_o_dono_confirma_e_livro_disputado_confirma_uma_vez(Session):
+    owner_id, loan_ids = seed(Session, 2)
+    db = Session()
+    # Segundo pedido para o mesmo livro do primeiro
+    first = db.get(Loan, loan_ids[0])
+    extra = Loan(book_id=first.book_id, lender_id=owner_id, borrower_id=db.get(Loan, loan_ids[1]).borrower_id)
+    db.add(extra)
+    db.commit()
+
+    stranger = loan_service.confirm_loans(db, [loan_ids[1]], owner_id + 100)
+    results = loan_service.confirm_loans(db, [loan_ids[0], extra.id], owner_id)
+
+    assert stranger[0]["error"] == "Você não é o dono deste livro."
+    assert [r["ok"] for r in results] == [True, False]
+    assert results[1]["error"] == "Livro indisponível."
+    db.close()
+
+def test_numero_de_consultas_nao_cresce_com_o_lote(Session):
+    owner_id, loan_ids = seed(Session, 40)
+
+    def statements_for(ids):
+        db = Session()
+        statements = count_statements(db)
+        loan_service.confirm_loans(db, ids, owner_id)
+        db.close()
+        return [s for s in statements if not s.startswith("UPDATE loans") and not s.startswith("UPDATE books")]
+
+    small, large = statements_for(loan_ids[:5]), statements_for(loan_ids[5:])
+
+    # 2 SELECTs com IN (...), 1 UPDATE em users, 1 INSERT no razão e 1 UPDATE na
+    # versão do catálogo, qualquer que seja o tamanho do lote
+    assert len(small) == len(large) == 5
+
+def test_devolucao_em_lote_cobra_multa_e_libera_livros(Session):
+    owner_id, loan_ids = seed(Session, 2)
+    db = Session()
+    loan_service.confirm_loans(db, loan_ids, owner_id)
+    late = db.get(Loan, loan_ids[0])
+    late.due_date = date.today() - timedelta(days=2)
+    db.commit()
+    borrower_id = late.borrower_id
+
+    results = loan_service.return_loans(db, loan_ids, borrower_id)
+
+    assert [r["ok"] for r in results] == [True, False]
+    assert results[1]["error"] == "Você não tem permissão para devolver este livro."
+    borrower = db.get(User, borrower_id)
+    assert borrower.points == INITIAL_POINTS - DEBIT_PER_BORROW - 2 * LATE_FINE_PER_DAY
+    assert borrower.active_loans == 0
+    assert db.get(Book, late.book_id).available is True
+    db.close()
+
+def test_rota_de_lote_nao_e_confundida_com_loan_id(Session):
+    owner_id, loan_ids = seed(Session, 2)
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = lambda: Session()
+    try:
+        response = TestClient(app).post(
+            "/api/loans/batch/confirm",
+            json={"loan_ids": loan_ids},
+            headers={"Authorization": f"Bearer {create_access_token(str(owner_id))}"},
+        )
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+
+    assert response.status_code == 200
+    assert [item["loan"]["status"] for item in response.json()] == ["active", "active"]
@@ -0,0 +1,137 @@
+# Arquivo: test_unit_loan_service.py
+# Testes do serviço de empréstimos (services/loan_service.py) contra um SQLite em memória.
+# Verificam as regras de pontos e que cada operação é uma única transação.
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy import event
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from services import loan_service
+from repositories import user_repository
+from config.constants import INITIAL_POINTS, CREDIT_PER_LEND, DEBIT_PER_BORROW, MAX_ACTIVE_LOANS
+
+def count_commits(db):
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+    return commits
+
+def test_confirmar_emprestimo_faz_um_unico_commit(Session, cenario):
+    db = Session()
+    loan = loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    commits = count_commits(db)
+
+    confirmed = loan_service.confirm_loan(db, loan.id)
+
+    assert len(commits) == 1
+    assert confirmed.status == "active"
+    assert db.get(User, cenario["owner"]).points == INITIAL_POINTS + CREDIT_PER_LEND
+    assert db.get(User, cenario["borrower"]).points == INITIAL_POINTS - DEBIT_PER_BORROW
+    assert db.get(Book, cenario["book"]).available is False
+    db.close()
+
+def test_falha_no_meio_da_confirmacao_desfaz_tudo(Session, cenario):
+    db = Session()
+    loan_id = loan_service.request_loan(db, cenario["borrower"], cenario["book"]).id
+
+    with patch("services.loan_service.book_repository.update", side_effect=RuntimeError("falha")):
+        with pytest.raises(RuntimeError):
+            loan_service.confirm_loan(db, loan_id)
+    db.close()
+
+    # Nada da transação pode ter ficado gravado (nem o status, nem os pontos)
+    check = Session()
+    assert check.get(Loan, loan_id).status == "requested"
+    assert check.get(User, cenario["owner"]).points == INITIAL_POINTS
+    assert check.get(User, cenario["borrower"]).points == INITIAL_POINTS
+    check.close()
+
+def test_devolver_emprestimo_libera_o_livro(Session, cenario):
+    db = Session()
+    loan = loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    loan_service.confirm_loan(db, loan.id)
+    commits = count_commits(db)
+
+    returned = loan_service.return_loan(db, loan.id)
+
+    assert len(commits) == 1
+    assert returned.status == "returned"
+    assert db.get(Book, cenario["book"]).available is True
+    db.close()
+
+def test_confirmacao_concorrente_nao_duplica_pontos(Session, cenario):
+    # Duas sessões (como dois workers) leem o mesmo pedido antes de qualquer commit
+    setup = Session()
+    loan_id = loan_service.request_loan(setup, cenario["borrower"], cenario["book"]).id
+    setup.close()
+    worker_a, worker_b = Session(), Session()
+    stale = (worker_b.get(Loan, loan_id), worker_b.get(Book, cenario["book"])) # versões antigas em memória
+
+    loan_service.confirm_loan(worker_a, loan_id)
+
+    # O commit do worker B detecta o conflito, tenta de novo e vê que já foi confirmado
+    with patch("core.database.time.sleep") as backoff:
+        with pytest.raises(ValueError) as excinfo:
+            loan_service.confirm_loan(worker_b, loan_id)
+    assert "não está pendente" in str(excinfo.value)
+    backoff.assert_called_once() # houve exatamente uma nova tentativa
+
+    check = Session()
+    assert check.get(User, cenario["owner"]).points == INITIAL_POINTS + CREDIT_PER_LEND
+    assert check.get(User, cenario["borrower"]).points == INITIAL_POINTS - DEBIT_PER_BORROW
+    for s in (worker_a, worker_b, check):
+        s.close()
+
+def test_add_points_nao_perde_atualizacao_concorrente(Session, cenario):
+    worker_a, worker_b = Session(), Session()
+    stale = worker_a.get(User, cenario["owner"]) # leitura antiga (50 pontos) em memória
+
+    user_repository.add_points(worker_b, cenario["owner"], 10)
+    worker_b.commit()
+    user_repository.add_points(worker_a, cenario["owner"], -5)
+    worker_a.commit()
+
+    check = Session()
+    assert check.get(User, cenario["owner"]).points == INITIAL_POINTS + 10 - 5
+    for s in (worker_a, worker_b, check):
+        s.close()
+
+def test_contador_de_emprestimos_ativos_acompanha_confirmacao_e_devolucao(Session, cenario):
+    db = Session()
+    loan = loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    loan_service.confirm_loan(db, loan.id)
+    assert db.get(User, cenario["borrower"]).active_loans == 1
+    assert loan_service.count_active_loans(db, cenario["borrower"]) == 1
+
+    loan_service.return_loan(db, loan.id)
+    assert db.get(User, cenario["borrower"]).active_loans == 0
+    db.close()
+
+def test_limite_de_emprestimos_usa_o_contador(Session, cenario):
+    db = Session()
+    db.get(User, cenario["borrower"]).active_loans = MAX_ACTIVE_LOANS
+    db.commit()
+
+    with pytest.raises(ValueError) as excinfo:
+        loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    assert "Limite de empréstimos ativos" in str(excinfo.value)
+    db.close()
+
+def test_reconciliacao_recalcula_contadores(Session, cenario):
+    db = Session()
+    loan = loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    loan_service.confirm_loan(db, loan.id)
+    # Contadores "estragados" de propósito
+    db.get(User, cenario["borrower"]).active_loans = 7
+    db.get(User, cenario["owner"]).active_loans = 2
+    db.commit()
+
+    fixed = user_repository.recount_active_loans(db)
+    db.commit()
+    db.expire_all()
+
+    assert fixed == 2
+    assert db.get(User, cenario["borrower"]).active_loans == 1
+    assert db.get(User, cenario["owner"]).active_loans == 0
+    db.close()
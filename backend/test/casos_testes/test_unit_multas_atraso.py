@@ -0,0 +1,103 @@
+# Arquivo: test_unit_multas_atraso.py
+# Testes do job de multas por atraso (services/fine_service.py): cobrança em
+# blocos com UPDATE em conjunto, idempotente no mesmo dia e retomável.
+
+import pytest
+from datetime import date, timedelta
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from services import loan_service
+from services.fine_service import apply_overdue_fines
+from config.constants import LATE_FINE_PER_DAY
+
+HOJE = date(2026, 3, 10)
+
+@pytest.fixture
+def cenario(Session):
+    """Um dono, dois tomadores com 100 pontos e empréstimos ativos vencidos há 1..5 dias."""
+    db = Session()
+    owner = User(name="Dono", email="dono@multa.com", password="x", points=100)
+    a = User(name="A", email="a@multa.com", password="x", points=100, active_loans=3)
+    b = User(name="B", email="b@multa.com", password="x", points=100, active_loans=2)
+    db.add_all([owner, a, b])
+    db.flush()
+    loans = []
+    for days_late, borrower in zip([1, 2, 3, 4, 5], [a, a, a, b, b]):
+        book = Book(title=f"Livro {days_late}", author="Autor", owner_id=owner.id, available=False)
+        db.add(book)
+        db.flush()
+        loans.append(Loan(book_id=book.id, lender_id=owner.id, borrower_id=borrower.id, status="active",
+                          start_date=HOJE - timedelta(days=20), due_date=HOJE - timedelta(days=days_late)))
+    # Um empréstimo ainda no prazo não pode ser multado
+    loans.append(Loan(book_id=1, lender_id=owner.id, borrower_id=b.id, status="active",
+                      start_date=HOJE, due_date=HOJE + timedelta(days=14)))
+    db.add_all(loans)
+    db.commit()
+    ids = {"a": a.id, "b": b.id, "loan_a": loans[0].id}
+    db.close()
+    return ids
+
+def points(Session, user_id):
+    with Session() as db:
+        return db.get(User, user_id).points
+
+def test_job_cobra_os_dias_de_atraso_em_blocos(Session, cenario):
+    db = Session()
+
+    report = apply_overdue_fines(db, today=HOJE, chunk_size=2)
+
+    assert report["loans"] == 5 and report["chunks"] == 3
+    assert points(Session, cenario["a"]) == 100 - (1 + 2 + 3) * LATE_FINE_PER_DAY
+    assert points(Session, cenario["b"]) == 100 - (4 + 5) * LATE_FINE_PER_DAY
+    assert report["elapsed_seconds"] >= 0
+    db.close()
+
+def test_rodar_de_novo_no_mesmo_dia_nao_cobra_em_dobro(Session, cenario):
+    db = Session()
+    apply_overdue_fines(db, today=HOJE)
+
+    report = apply_overdue_fines(db, today=HOJE)
+
+    assert report["loans"] == 0
+    assert points(Session, cenario["a"]) == 100 - 6 * LATE_FINE_PER_DAY
+    db.close()
+
+def test_dia_seguinte_cobra_so_um_dia_por_emprestimo(Session, cenario):
+    db = Session()
+    apply_overdue_fines(db, today=HOJE)
+
+    report = apply_overdue_fines(db, today=HOJE + timedelta(days=1))
+
+    assert report["loans"] == 5
+    assert points(Session, cenario["a"]) == 100 - (6 + 3) * LATE_FINE_PER_DAY
+    db.close()
+
+def test_job_interrompido_continua_de_onde_parou(Session, cenario):
+    # Arrange: só o primeiro empréstimo foi cobrado antes da "queda"
+    db = Session()
+    db.get(Loan, cenario["loan_a"]).fined_through = HOJE
+    db.get(User, cenario["a"]).points -= 1 * LATE_FINE_PER_DAY
+    db.commit()
+
+    # Act
+    report = apply_overdue_fines(db, today=HOJE)
+
+    # Assert: o total cobrado é o mesmo de uma execução sem interrupção
+    assert report["loans"] == 4
+    assert points(Session, cenario["a"]) == 100 - 6 * LATE_FINE_PER_DAY
+    db.close()
+
+def test_devolucao_cobra_apenas_o_que_o_job_nao_cobrou(Session, cenario):
+    db = Session()
+    loan = db.get(Loan, cenario["loan_a"])
+    loan.due_date = date.today() - timedelta(days=3)
+    db.commit()
+    apply_overdue_fines(db, today=date.today() - timedelta(days=1))
+    before = points(Session, cenario["a"])
+
+    loan_service.return_loan(db, cenario["loan_a"])
+
+    # 2 dias já cobrados pelo job; a devolução cobra só o dia de hoje
+    assert before - points(Session, cenario["a"]) == 1 * LATE_FINE_PER_DAY
+    db.close()
@@ -0,0 +1,154 @@
+# Arquivo: test_unit_notification_outbox.py
+# Testes da outbox de notificações (services/notification_service.py): o aviso
+# é gravado na transação do pedido e enviado depois, em lote, com nova tentativa.
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import event
+from models.notification import Notification
+from services import loan_service, notification_service
+from services.notification_service import NotificationDispatcher
+from utils.notifications import SmtpTransport
+from config.settings import settings
+
+class FakeTransport:
+    """Guarda as mensagens enviadas; falha nas primeiras `failures` chamadas."""
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def send_batch(self, messages):
+        self.batches.append(messages)
+        if self.failures:
+            self.failures -= 1
+            return [ConnectionError("smtp fora do ar")] * len(messages)
+        return [None] * len(messages)
+
+def test_pedido_grava_notificacao_na_mesma_transacao(Session, cenario):
+    # Arrange: conta os SELECTs para garantir que o dono vem junto com o livro
+    db = Session()
+    statements = []
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", capture)
+
+    # Act
+    loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    event.remove(db.get_bind(), "before_cursor_execute", capture)
+
+    # Assert
+    outbox = db.query(Notification).all()
+    assert len(outbox) == 1
+    assert outbox[0].to_email == "dono@teste.com"
+    assert "Livro" in outbox[0].body and outbox[0].status == "pending"
+    assert sum(s.lstrip().startswith("SELECT") and "FROM users" in s and "books" not in s for s in statements) == 1
+    db.close()
+
+def test_pedido_desfeito_nao_deixa_notificacao(Session, cenario):
+    db = Session()
+    with patch("services.loan_service.loan_repository.create", side_effect=RuntimeError("falha")):
+        with pytest.raises(RuntimeError):
+            loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+
+    assert db.query(Notification).count() == 0
+    db.close()
+
+def test_dispatcher_envia_em_lote_e_marca_enviadas(Session):
+    # Arrange
+    db = Session()
+    for i in range(5):
+        notification_service.enqueue(db, f"u{i}@outbox.com", "Assunto", "Corpo")
+    db.commit()
+    transport = FakeTransport()
+
+    # Act
+    sent, failed = NotificationDispatcher(Session, transport, batch_size=3).run_once()
+
+    # Assert: dois lotes (3 + 2) e nada pendente
+    assert (sent, failed) == (5, 0)
+    assert [len(batch) for batch in transport.batches] == [3, 2]
+    assert notification_service.queue_depth(db) == {"pending": 0, "sent": 5, "failed": 0}
+    db.close()
+
+def test_falha_no_envio_agenda_nova_tentativa_com_backoff(Session):
+    db = Session()
+    notification_service.enqueue(db, "u@outbox.com", "Assunto", "Corpo")
+    db.commit()
+
+    sent, failed = notification_service.dispatch_batch(db, FakeTransport(failures=1))
+
+    notification = db.query(Notification).one()
+    assert (sent, failed) == (0, 1)
+    assert notification.status == "pending" and notification.attempts == 1
+    assert notification.next_attempt_at > datetime.utcnow() + timedelta(seconds=settings.NOTIFY_BACKOFF_SECONDS / 2)
+    # Ainda não venceu: o próximo lote não pega a mensagem
+    assert notification_service.dispatch_batch(db, FakeTransport()) == (0, 0)
+    db.close()
+
+def test_desiste_apos_o_maximo_de_tentativas(Session, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFY_MAX_ATTEMPTS", 2)
+    db = Session()
+    notification_service.enqueue(db, "u@outbox.com", "Assunto", "Corpo")
+    db.commit()
+    transport = FakeTransport(failures=5)
+
+    notification_service.dispatch_batch(db, transport)
+    db.query(Notification).update({"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    notification_service.dispatch_batch(db, transport)
+
+    notification = db.query(Notification).one()
+    assert notification.status == "failed" and notification.attempts == 2
+    assert "smtp fora do ar" in notification.last_error
+    db.close()
+
+class ConexaoQueCai:
+    """Servidor SMTP falso cuja conexão cai (timeout) na segunda mensagem."""
+    def __init__(self, *args, **kwargs):
+        self.sent = []
+
+    def send_message(self, message):
+        if self.sent:
+            raise TimeoutError("timed out")
+        self.sent.append(message["To"])
+
+    def quit(self):
+        raise ConnectionResetError("conexão fechada")
+
+    def close(self):
+        pass
+
+def test_smtp_que_cai_no_meio_do_lote_registra_todas_as_mensagens(Session):
+    # Arrange
+    db = Session()
+    for i in range(3):
+        notification_service.enqueue(db, f"u{i}@outbox.com", "Assunto", "Corpo")
+    db.commit()
+
+    # Act
+    with patch("utils.notifications.smtplib.SMTP", ConexaoQueCai):
+        sent, failed = notification_service.dispatch_batch(db, SmtpTransport("localhost", 25, "p2p@livros.com"))
+
+    # Assert: a primeira não é reenviada e as outras contam a tentativa
+    notifications = db.query(Notification).order_by(Notification.id).all()
+    assert (sent, failed) == (1, 2)
+    assert notifications[0].status == "sent"
+    assert [(n.status, n.attempts) for n in notifications[1:]] == [("pending", 1), ("pending", 1)]
+    assert all("timed out" in n.last_error for n in notifications[1:])
+    db.close()
+
+def test_notificacao_reservada_nao_e_pega_por_outro_dispatcher(Session):
+    from repositories import notification_repository
+    db, other = Session(), Session()
+    notification_service.enqueue(db, "u@outbox.com", "Assunto", "Corpo")
+    db.commit()
+    now = datetime.utcnow()
+
+    first = notification_repository.claim_due(db, now, 10, now + timedelta(seconds=60))
+    db.commit()
+    second = notification_repository.claim_due(other, now, 10, now + timedelta(seconds=60))
+
+    assert len(first) == 1 and second == []
+    db.close()
+    other.close()
@@ -0,0 +1,52 @@
+# Arquivo: test_unit_perfil_banco.py
+# Testes Unitários do perfil de tuning do engine (core.database): PRAGMAs do
+# SQLite aplicados em cada conexão e opções de pool por tipo de banco.
+
+import pytest
+from typing import get_args
+from pydantic import ValidationError
+from config.settings import Settings, settings
+from core.database import SQLITE_PROFILES, build_engine, engine_options, sqlite_pragmas
+
+def pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+def test_perfil_production_aplica_pragmas_em_cada_conexao(tmp_path):
+    # Arrange
+    engine = build_engine(f"sqlite:///{tmp_path / 'perfil.db'}", "production")
+
+    # Act / Assert
+    assert pragma(engine, "journal_mode") == "wal"
+    assert pragma(engine, "synchronous") == 1  # NORMAL
+    assert pragma(engine, "busy_timeout") == 5000
+    assert pragma(engine, "temp_store") == 2  # MEMORY
+    engine.dispose()
+
+def test_campos_do_settings_sobrescrevem_o_perfil(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(settings, "DB_BUSY_TIMEOUT_MS", 250)
+
+    # Act
+    pragmas = sqlite_pragmas("production")
+
+    # Assert
+    assert pragmas["busy_timeout"] == 250
+    assert pragmas["journal_mode"] == "WAL"
+
+def test_postgres_usa_pre_ping_e_tamanho_do_pool():
+    options = engine_options("postgresql+psycopg2://u:p@db/p2p")
+
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert "connect_args" not in options
+
+def test_sqlite_em_memoria_nao_recebe_opcoes_de_pool():
+    assert engine_options("sqlite://") == {"connect_args": {"check_same_thread": False}}
+
+def test_perfil_desconhecido_e_recusado_pelo_settings():
+    # Os valores aceitos no Settings são exatamente os perfis definidos
+    assert set(get_args(Settings.__fields__["DB_PROFILE"].outer_type_)) == set(SQLITE_PROFILES)
+
+    with pytest.raises(ValidationError, match="DB_PROFILE"):
+        Settings(DB_PROFILE="producton")
@@ -0,0 +1,80 @@
+# Arquivo: test_unit_profiler_sql.py
+# Testes do profiler de SQL: fingerprint normalizado, detecção de N+1 e lazy
+# loads, orçamento de consultas por endpoint e log de requisições lentas.
+
+import logging
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import joinedload
+from main import app
+from core.profiler import fingerprint, query_budget, SqlProfilerMiddleware
+from core.security import create_access_token
+from models.user import User
+from models.book import Book
+
+client = TestClient(app)
+pytestmark = pytest.mark.usefixtures("api_db")
+
+@pytest.fixture(scope="module")
+def cenario(api_db):
+    """Dois donos com 3 livros cada e um tomador."""
+    db = api_db()
+    owners = [User(name=f"Dono {i}", email=f"dono{i}@profiler.com", password="x", points=50) for i in range(2)]
+    borrower = User(name="Tomador", email="tomador@profiler.com", password="x", points=50)
+    db.add_all(owners + [borrower])
+    db.flush()
+    books = [Book(title=f"Livro {i}", author="Autor", owner_id=owners[i % 2].id) for i in range(6)]
+    db.add_all(books)
+    db.commit()
+    ids = {
+        "owner": {"Authorization": f"Bearer {create_access_token(str(owners[0].id))}"},
+        "borrower": {"Authorization": f"Bearer {create_access_token(str(borrower.id))}"},
+        "book": books[0].id,
+    }
+    db.close()
+    return ids
+
+def test_fingerprint_ignora_valores_e_tamanho_de_listas():
+    assert fingerprint("SELECT * FROM loans\n WHERE id IN (?, ?, ?) AND status = 'active' LIMIT 10") == \
+        "SELECT * FROM loans WHERE id IN (...) AND status = ? LIMIT ?"
+    assert fingerprint("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == fingerprint("INSERT INTO t (a, b) VALUES (?, ?)")
+    assert fingerprint("SELECT users_1.id FROM users AS users_1") == "SELECT users_1.id FROM users AS users_1"
+
+def test_orcamento_detecta_n_mais_1_por_lazy_load(api_db, cenario):
+    db = api_db()
+
+    # Acessar book.owner em loop: um SELECT em users por dono
+    with pytest.raises(AssertionError) as erro:
+        with query_budget(10, repeat_threshold=2):
+            [book.owner.name for book in db.query(Book).all()]
+    with query_budget(1, repeat_threshold=2) as profile:
+        [book.owner.name for book in db.query(Book).options(joinedload(Book.owner)).all()]
+    db.close()
+
+    assert "lazy loads: ['Book.owner']" in str(erro.value)
+    assert "comandos repetidos (N+1)" in str(erro.value)
+    assert profile.count == 1 and profile.lazy_loads == []
+
+def test_orcamento_de_consultas_por_endpoint(cenario):
+    # O pedido carrega o dono junto do livro (joinedload): sem lazy load de Book.owner
+    with query_budget(2, repeat_threshold=3):
+        assert client.get("/api/books/").status_code == 200
+    with query_budget(5, repeat_threshold=3):
+        loan = client.post("/api/loans/request", json={"book_id": cenario["book"]}, headers=cenario["borrower"]).json()
+    with query_budget(10, repeat_threshold=3):
+        assert client.post(f"/api/loans/{loan['id']}/confirm", headers=cenario["owner"]).status_code == 200
+    with query_budget(2, repeat_threshold=3):
+        assert client.get("/api/loans/my_loans", headers=cenario["borrower"]).status_code == 200
+    with query_budget(6, repeat_threshold=3):
+        assert client.post(f"/api/loans/{loan['id']}/return", headers=cenario["borrower"]).status_code == 200
+
+def test_middleware_loga_requisicao_lenta_com_plano(api_db, cenario, caplog):
+    profiled = TestClient(SqlProfilerMiddleware(app, engine=api_db.kw["bind"], slow_ms=0, explain=True))
+
+    with caplog.at_level(logging.WARNING, logger="core.profiler"):
+        profiled.get("/api/books/", params={"limit": 4, "available": True})
+
+    message = caplog.records[-1].getMessage()
+    assert message.startswith("GET /api/books/ ") and "[lenta]" in message
+    assert "comandos" in message and "FROM books" in message
+    assert "plano (" in message and ("SCAN" in message or "SEARCH" in message)
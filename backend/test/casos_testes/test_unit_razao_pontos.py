@@ -0,0 +1,145 @@
+# Arquivo: test_unit_razao_pontos.py
+# Testes do razão de pontos (points_ledger): toda mudança de saldo gera uma
+# entrada, snapshots permitem refazer os saldos e o extrato é paginado por cursor.
+
+import pytest
+from datetime import date, timedelta
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.pool import StaticPool
+from main import app
+from core.database import Base, get_db
+from core.schema import upgrade_schema
+from core.security import create_access_token
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from models.points import PointsEntry
+from schemas.user import UserCreate
+from services import loan_service, user_service, points_service
+from services.fine_service import apply_overdue_fines
+from config.constants import INITIAL_POINTS, CREDIT_PER_LEND, DEBIT_PER_BORROW, LATE_FINE_PER_DAY
+
+@pytest.fixture
+def cenario(Session):
+    """Dono e tomador cadastrados pelo serviço (com entrada de boas-vindas) e um livro."""
+    db = Session()
+    with patch("services.user_service.hash_password", return_value="x"):
+        owner = user_service.register(db, UserCreate(name="Dono", email="dono@razao.com", password="senha123"))
+        borrower = user_service.register(db, UserCreate(name="Tomador", email="tomador@razao.com", password="senha123"))
+    book = Book(title="Livro", author="Autor", owner_id=owner.id)
+    db.add(book)
+    db.commit()
+    ids = {"owner": owner.id, "borrower": borrower.id, "book": book.id}
+    db.close()
+    return ids
+
+def ledger(db, user_id):
+    return [(e.reason, e.delta) for e in db.query(PointsEntry).filter_by(user_id=user_id).order_by(PointsEntry.id)]
+
+def ledger_sum(db, user_id):
+    return db.query(func.sum(PointsEntry.delta)).filter_by(user_id=user_id).scalar()
+
+def test_cada_movimento_de_pontos_vira_entrada_no_razao(Session, cenario):
+    # Arrange
+    db = Session()
+    loan = loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    loan_service.confirm_loan(db, loan.id)
+    db.get(Loan, loan.id).due_date = date.today() - timedelta(days=2)
+    db.commit()
+
+    # Act
+    loan_service.return_loan(db, loan.id)
+
+    # Assert
+    assert ledger(db, cenario["owner"]) == [("signup", INITIAL_POINTS), ("lend_credit", CREDIT_PER_LEND)]
+    assert ledger(db, cenario["borrower"]) == [
+        ("signup", INITIAL_POINTS), ("borrow_debit", -DEBIT_PER_BORROW), ("late_fine", -2 * LATE_FINE_PER_DAY),
+    ]
+    for user_id in cenario["owner"], cenario["borrower"]:
+        assert ledger_sum(db, user_id) == db.get(User, user_id).points
+    db.close()
+
+def test_job_de_multas_e_lote_tambem_registram(Session, cenario):
+    db = Session()
+    loan = loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    loan_service.confirm_loans(db, [loan.id], cenario["owner"])
+    db.get(Loan, loan.id).due_date = date.today() - timedelta(days=3)
+    db.commit()
+
+    apply_overdue_fines(db)
+
+    fines = db.query(PointsEntry).filter_by(reason="late_fine").all()
+    assert [(f.loan_id, f.delta) for f in fines] == [(loan.id, -3 * LATE_FINE_PER_DAY)]
+    assert ledger_sum(db, cenario["borrower"]) == db.get(User, cenario["borrower"]).points
+    db.close()
+
+def test_rebuild_usa_snapshot_e_so_as_entradas_seguintes(Session, cenario):
+    # Arrange: snapshot, mais um movimento e o histórico anterior ao snapshot "arquivado"
+    db = Session()
+    assert points_service.take_snapshot(db) == 2
+    loan = loan_service.request_loan(db, cenario["borrower"], cenario["book"])
+    loan_service.confirm_loan(db, loan.id)
+    db.execute(text("DELETE FROM points_ledger WHERE reason = 'signup'"))
+    db.execute(text("UPDATE users SET points = 0"))
+    db.commit()
+
+    # Act
+    divergent = points_service.rebuild_balances(db, dry_run=True)
+    fixed = points_service.rebuild_balances(db)
+
+    # Assert
+    assert divergent == fixed == 2
+    assert db.get(User, cenario["owner"]).points == INITIAL_POINTS + CREDIT_PER_LEND
+    assert db.get(User, cenario["borrower"]).points == INITIAL_POINTS - DEBIT_PER_BORROW
+    assert points_service.rebuild_balances(db, dry_run=True) == 0
+    db.close()
+
+def test_upgrade_cria_saldo_de_abertura_para_usuarios_antigos():
+    # Arrange: banco anterior ao razão, com usuários já pontuados
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE points_snapshots")
+        conn.exec_driver_sql("DROP TABLE points_ledger")
+        conn.exec_driver_sql("INSERT INTO users (name, email, password, points) VALUES ('A', 'a@x', 'x', 37), ('B', 'b@x', 'x', 0)")
+
+    # Act
+    upgrade_schema(engine)
+
+    # Assert
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT user_id, delta, reason FROM points_ledger").fetchall()
+    assert rows == [(1, 37, "opening_balance")]
+    engine.dispose()
+
+def test_extrato_paginado_por_cursor(Session, cenario):
+    db = Session()
+    for i in range(4):
+        book = Book(title=f"Extra {i}", author="Autor", owner_id=cenario["owner"])
+        db.add(book)
+        db.commit()
+        loan = loan_service.request_loan(db, cenario["borrower"], book.id)
+        loan_service.confirm_loan(db, loan.id)
+        loan_service.return_loan(db, loan.id)
+    db.close()
+    headers = {"Authorization": f"Bearer {create_access_token(str(cenario['borrower']))}"}
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = lambda: Session()
+    client = TestClient(app)
+    try:
+        first = client.get("/api/users/me/ledger", params={"limit": 3}, headers=headers)
+        second = client.get("/api/users/me/ledger", params={"limit": 3, "before_id": first.headers["X-Next-Cursor"]}, headers=headers)
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+
+    # signup + 4 débitos de empréstimo; o mais recente vem primeiro
+    ids = [e["id"] for e in first.json()] + [e["id"] for e in second.json()]
+    assert len(first.json()) == 3 and len(second.json()) == 2
+    assert ids == sorted(ids, reverse=True)
+    assert second.json()[-1]["reason"] == "signup"
+    assert "X-Next-Cursor" not in second.headers
@@ -0,0 +1,71 @@
+# Arquivo: test_unit_security.py
+# Testes Unitários do hashing de senhas (core/security.py) e da atualização
+# automática do custo do bcrypt no login (services/user_service.authenticate).
+
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from core import security
+from core.security import HashingBusyError, hash_password, verify_and_update
+from core.database import Base
+from models.user import User
+import models.book, models.loan, models.notification, models.points  # noqa: F401 (registra os mappers)
+from services.user_service import authenticate
+
+# Hash com custo menor que o configurado (simula uma senha antiga)
+OLD_HASH = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("senha123")
+
+def test_hash_e_verificacao_pelo_pool():
+    hashed = hash_password("senha123")
+
+    assert verify_and_update("senha123", hashed) == (True, None)
+    assert verify_and_update("errada", hashed)[0] is False
+
+def test_hash_com_custo_antigo_e_atualizado():
+    valid, new_hash = verify_and_update("senha123", OLD_HASH)
+
+    assert valid is True
+    assert new_hash.startswith(f"$2b${security.settings.BCRYPT_ROUNDS:02d}$")
+
+def test_pool_cheio_recusa_em_vez_de_enfileirar():
+    with patch.object(security, "_hash_slots", threading.BoundedSemaphore(1)) as slots:
+        slots.acquire() # ocupa a única vaga
+        with pytest.raises(HashingBusyError):
+            hash_password("senha123")
+
+@patch('services.user_service.user_repository')
+def test_login_regrava_hash_antigo(mock_repo):
+    mock_user = MagicMock(id=1, password=OLD_HASH)
+    mock_repo.get_by_email.return_value = mock_user
+
+    out = authenticate(MagicMock(spec=Session), "antigo@teste.com", "senha123")
+
+    assert out["access_token"]
+    assert mock_user.password != OLD_HASH
+    mock_repo.update.assert_called_once()
+
+def test_logins_simultaneos_com_hash_antigo_nao_falham():
+    # Arrange: duas sessões (dois workers) leem o mesmo usuário com hash antigo
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    with Session() as db:
+        db.add(User(name="Antigo", email="antigo@teste.com", password=OLD_HASH))
+        db.commit()
+    worker_a, worker_b = Session(), Session()
+    stale = worker_b.query(User).one() # versão antiga em memória
+
+    # Act
+    first = authenticate(worker_a, "antigo@teste.com", "senha123")
+    second = authenticate(worker_b, "antigo@teste.com", "senha123")
+
+    # Assert: o segundo perde a corrida da regravação, mas o login funciona
+    assert first["access_token"] and second["access_token"]
+    assert second["user"].password == first["user"].password != OLD_HASH
+    worker_a.close()
+    worker_b.close()
+    engine.dispose()
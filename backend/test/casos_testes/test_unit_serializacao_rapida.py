@@ -0,0 +1,86 @@
+# Arquivo: test_unit_serializacao_rapida.py
+# Testes do modo de serialização rápida (FAST_JSON): o JSON das listas tem que
+# ser idêntico ao do caminho padrão (response_model + pydantic), com ou sem orjson.
+
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from main import app
+from config.settings import settings
+from core import serializers
+from core.cache import catalog_cache
+from core.security import create_access_token
+from models.user import User
+from models.book import Book
+from models.loan import Loan
+from repositories.loan_repository import LoanLenderRecord, LoanRecord
+from schemas.loan import LoanExpandedOut
+
+client = TestClient(app)
+pytestmark = pytest.mark.usefixtures("api_db")
+
+@pytest.fixture(scope="module")
+def tomador(api_db):
+    """Livros com acento e sem autor, e empréstimos em todos os status (um atrasado)."""
+    db = api_db()
+    owner = User(name="Dona Açucena", email="dona@rapida.com", password="x")
+    borrower = User(name="Tomador", email="tomador@rapida.com", password="x")
+    db.add_all([owner, borrower])
+    db.flush()
+    books = [Book(title=f"Coração {i}", author=None if i == 2 else "Autor", owner_id=owner.id) for i in range(4)]
+    db.add_all(books)
+    db.flush()
+    today = date.today()
+    db.add_all([
+        Loan(book_id=books[0].id, lender_id=owner.id, borrower_id=borrower.id, status="requested"),
+        Loan(book_id=books[1].id, lender_id=owner.id, borrower_id=borrower.id, status="active",
+             start_date=today - timedelta(days=20), due_date=today - timedelta(days=6)),
+        Loan(book_id=books[2].id, lender_id=owner.id, borrower_id=borrower.id, status="returned",
+             requested_at=datetime(2024, 5, 1, 10, 30, 15, 123456), start_date=date(2024, 5, 2),
+             due_date=date(2024, 5, 16), returned_date=date(2024, 5, 10)),
+    ])
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(str(borrower.id))}"}
+    db.close()
+    return headers
+
+def both_modes(monkeypatch, url, **kwargs):
+    bodies = []
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_JSON", fast)
+        catalog_cache.clear()
+        response = client.get(url, **kwargs)
+        assert response.status_code == 200
+        bodies.append(response)
+    return bodies
+
+@pytest.mark.parametrize("url, params", [
+    ("/api/books/", {}),
+    ("/api/loans/my_loans", {}),
+    ("/api/loans/my_loans", {"expand": "book,lender"}),
+    ("/api/loans/my_loans", {"expand": "lender", "limit": 2}),
+    ("/api/loans/overdue", {}),
+])
+def test_modo_rapido_gera_o_mesmo_json(monkeypatch, tomador, url, params):
+    default, fast = both_modes(monkeypatch, url, params=params, headers=tomador)
+
+    assert fast.content == default.content
+    assert fast.headers["content-type"] == default.headers["content-type"]
+    assert fast.headers.get("X-Next-Cursor") == default.headers.get("X-Next-Cursor")
+    assert len(fast.json()) > 0
+
+def test_fallback_sem_orjson_gera_os_mesmos_bytes(monkeypatch):
+    content = [{"titulo": "Coração", "data": date(2024, 5, 2), "hora": datetime(2024, 5, 1, 10, 30, 15, 5), "n": None}]
+    with_orjson = serializers.dumps(content)
+    monkeypatch.setattr(serializers, "orjson", None)
+
+    assert serializers.dumps(content) == with_orjson
+
+def test_aninhado_ausente_sai_como_none():
+    record = LoanRecord(1, 2, 3, 4, datetime(2024, 1, 1), None, None, None, "requested",
+                        None, LoanLenderRecord(3, "Dona"))
+
+    item = serializers.compile_serializer(LoanExpandedOut)(record)
+
+    assert item["book"] is None and item["lender"] == {"id": 3, "name": "Dona"}
+    assert list(item) == list(LoanExpandedOut.__fields__)
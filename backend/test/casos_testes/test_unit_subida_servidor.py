@@ -0,0 +1,64 @@
+# Arquivo: test_unit_subida_servidor.py
+# Testes da subida do servidor: importar main não toca no banco nem carrega
+# passlib/jose, e o passo de esquema (Settings.SCHEMA_STARTUP) recusa subir com
+# o esquema desatualizado ou o atualiza, conforme o modo.
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, inspect
+from core.schema import pending_changes, startup_check, upgrade_schema
+import models.user, models.book, models.loan, models.notification, models.points  # noqa: F401
+
+BACKEND = Path(__file__).resolve().parents[2]
+
+def test_importar_main_nao_cria_esquema_nem_carrega_modulos_pesados(tmp_path):
+    # Arrange
+    db_file = tmp_path / "frio.db"
+    code = "import sys, main; print(sorted(m for m in ('passlib', 'jose', 'bcrypt') if m in sys.modules))"
+
+    # Act
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{db_file}"},
+    )
+
+    # Assert
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+    assert not db_file.exists() or inspect(create_engine(f"sqlite:///{db_file}")).get_table_names() == []
+
+def test_pendencias_somem_depois_do_upgrade():
+    engine = create_engine("sqlite://")
+
+    assert "tabela loans" in pending_changes(engine)
+    assert "tabela catalog_version" in pending_changes(engine)
+    upgrade_schema(engine)
+    assert pending_changes(engine) == []
+
+def test_modo_check_recusa_subir_com_esquema_desatualizado():
+    engine = create_engine("sqlite://")
+
+    with pytest.raises(RuntimeError, match="upgrade-schema"):
+        startup_check(engine, "check")
+    assert inspect(engine).get_table_names() == []
+
+def test_modo_check_sobe_com_esquema_atualizado():
+    engine = create_engine("sqlite://")
+    upgrade_schema(engine)
+
+    startup_check(engine, "check")
+
+@pytest.mark.parametrize("mode, tables", [("off", False), ("upgrade", True)])
+def test_modos_off_e_upgrade(mode, tables):
+    engine = create_engine("sqlite://")
+
+    startup_check(engine, mode)
+
+    assert bool(inspect(engine).get_table_names()) is tables
+
+def test_modo_invalido_e_recusado():
+    with pytest.raises(ValueError):
+        startup_check(create_engine("sqlite://"), "migrar")
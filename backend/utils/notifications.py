@@ -1,2 +1,71 @@
+import smtplib
+from email.message import EmailMessage
+from config.settings import settings
+
+# Transportes de envio. Todos recebem um lote de (to_email, subject, body) e
+# devolvem, na mesma ordem, None (enviado) ou a exceção daquela mensagem.
+
+class ConsoleTransport:
+    def send_batch(self, messages):
+        for to_email, subject, body in messages:
+            send_notification_stub(to_email, subject, body)
+        return [None] * len(messages)
+
+class FileTransport:
+    """Grava as mensagens num arquivo (uma por linha); útil em desenvolvimento."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def send_batch(self, messages):
+        try:
+            with open(self.path, "a", encoding="utf-8") as sink:
+                for to_email, subject, body in messages:
+                    sink.write(f"{to_email}\t{subject}\t{body}\n")
+        except OSError as e:
+            return [e] * len(messages)
+        return [None] * len(messages)
+
+class SmtpTransport:
+    """Envia o lote inteiro numa única conexão SMTP (ex.: `python -m aiosmtpd -n` local)."""
+    def __init__(self, host: str, port: int, sender: str, timeout: float = 10.0):
+        self.host, self.port, self.sender, self.timeout = host, port, sender, timeout
+
+    def send_batch(self, messages):
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except OSError as e:
+            return [e] * len(messages)
+        results = []
+        try:
+            for to_email, subject, body in messages:
+                message = EmailMessage()
+                message["From"], message["To"], message["Subject"] = self.sender, to_email, subject
+                message.set_content(body)
+                try:
+                    smtp.send_message(message)
+                    results.append(None)
+                except smtplib.SMTPException as e:
+                    results.append(e)
+        except OSError as e:
+            # Conexão caiu no meio do lote (timeout, reset): as que já foram ficam
+            # como enviadas e as que faltam levam o erro, para a outbox registrar todas
+            results += [e] * (len(messages) - len(results))
+        finally:
+            try:
+                smtp.quit()
+            except OSError:
+                smtp.close()
+        return results
+
+def get_transport():
+    if settings.NOTIFY_TRANSPORT == "file":
+        return FileTransport(settings.NOTIFY_FILE_PATH)
+    if settings.NOTIFY_TRANSPORT == "smtp":
+        return SmtpTransport(settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_SENDER)
+    return ConsoleTransport()
+
+def loan_request_message(title: str, requester_name):
+    return "Nova Solicitação de Empréstimo", f"{requester_name or 'Um usuário'} solicitou '{title}'."
+
 def send_notification_stub(to_email: str, subject: str, body: str):
     print(f"[NOTIF] Para: {to_email} | {subject} -> {body}")
@@ -0,0 +1,76 @@
+import csv
+import json
+
+# Leitura incremental de uploads: o corpo chega em pedaços (request.stream())
+# e só a linha atual fica em memória, qualquer que seja o tamanho do arquivo.
+
+MAX_LINE_BYTES = 64 * 1024
+
+def _too_long(line_no: int):
+    return ValueError(f"Linha {line_no} maior que {MAX_LINE_BYTES} bytes.")
+
+def _decode(line: bytes, line_no: int) -> str:
+    text = line.decode("utf-8", errors="replace")
+    if line_no == 1:
+        text = text.removeprefix("\ufeff")  # BOM do UTF-8
+    return text.rstrip("\r")
+
+async def iter_lines(chunks):
+    """
+    Produz (número da linha, texto) sem o '\\n' final, decodificando cada linha
+    como UTF-8. Uma linha com mais de MAX_LINE_BYTES bytes (medidos no corpo
+    recebido) sai como (número da linha, ValueError) e é descartada enquanto
+    chega, sem ficar em memória.
+    """
+    pending = b""
+    skipping = False  # no meio de uma linha longa demais, já descartada
+    line_no = 0
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            line_no += 1
+            if skipping or len(line) > MAX_LINE_BYTES:
+                skipping = False
+                yield line_no, _too_long(line_no)
+            else:
+                yield line_no, _decode(line, line_no)
+        if len(pending) > MAX_LINE_BYTES:
+            skipping, pending = True, b""
+    if skipping:
+        yield line_no + 1, _too_long(line_no + 1)
+    elif pending.strip():
+        yield line_no + 1, _decode(pending, line_no + 1)
+
+async def iter_records(chunks, fmt: str):
+    """
+    Produz (número da linha, dict) para cada registro de um upload CSV (com
+    cabeçalho; um registro por linha) ou NDJSON. Registros ilegíveis saem como
+    (número da linha, ValueError) para o chamador reportar sem abortar.
+    """
+    header = None
+    async for line_no, line in iter_lines(chunks):
+        if isinstance(line, ValueError):
+            yield line_no, line
+            continue
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, ValueError(f"JSON inválido: {e.msg}")
+                continue
+            if not isinstance(record, dict):
+                yield line_no, ValueError("Cada linha deve ser um objeto JSON.")
+                continue
+            yield line_no, record
+        else:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip().lower() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_no, ValueError(f"Esperadas {len(header)} colunas, encontradas {len(values)}.")
+                continue
+            # Célula vazia vale como campo ausente (usa o padrão do schema)
+            yield line_no, {name: value for name, value in zip(header, values) if value != ""}
@@ -149,15 +149,27 @@ document.getElementById('logout-btn').addEventListener('click', () => {
 
 // ==================== LIVROS ====================
 
-async function loadAvailableBooks() {
+async function loadAvailableBooks(afterId = null) {
     try {
-        const response = await fetch(`${API_URL}/books/`);
+        // O catálogo vem em páginas; a próxima é pedida com o X-Next-Cursor da anterior
+        const params = new URLSearchParams({ limit: 50 });
+        if (afterId) {
+            params.set('after_id', afterId);
+        }
+        const response = await fetch(`${API_URL}/books/?${params}`);
         const books = await handleResponse(response);
+        const nextCursor = response.headers.get('X-Next-Cursor');
         
         const container = document.getElementById('books-list');
-        container.innerHTML = ''; // Limpa o container
+        if (!afterId) {
+            container.innerHTML = ''; // Limpa o container na primeira página
+        }
+        const loadMore = document.getElementById('books-load-more');
+        if (loadMore) {
+            loadMore.remove();
+        }
         
-        if (books.length === 0) {
+        if (books.length === 0 && !afterId) {
             container.innerHTML = '<p class="empty-message">Nenhum livro disponível no momento.</p>';
             return;
         }
@@ -182,22 +194,41 @@ async function loadAvailableBooks() {
             `;
             container.appendChild(card);
         });
+        
+        if (nextCursor) {
+            const button = document.createElement('button');
+            button.id = 'books-load-more';
+            button.className = 'btn-secondary';
+            button.textContent = 'Carregar mais';
+            button.addEventListener('click', () => loadAvailableBooks(nextCursor));
+            container.appendChild(button);
+        }
     } catch (error) {
         console.error('Erro ao carregar livros:', error);
         showModal(`Erro ao carregar livros disponíveis: ${error.message}`);
     }
 }
 
-async function loadMyBooks() {
+async function loadMyBooks(afterId = null) {
     try {
-        const response = await fetch(`${API_URL}/books/`);
-        const books = await handleResponse(response);
-        const myBooks = books.filter(book => book.owner_id === currentUser.id);
+        const params = new URLSearchParams({ owner_id: currentUser.id, limit: 200 });
+        if (afterId) {
+            params.set('after_id', afterId);
+        }
+        const response = await fetch(`${API_URL}/books/?${params}`);
+        const myBooks = await handleResponse(response);
+        const nextCursor = response.headers.get('X-Next-Cursor');
         
         const container = document.getElementById('my-books-list');
-        container.innerHTML = ''; // Limpa o container
+        if (!afterId) {
+            container.innerHTML = ''; // Limpa o container na primeira página
+        }
+        const loadMore = document.getElementById('my-books-load-more');
+        if (loadMore) {
+            loadMore.remove();
+        }
         
-        if (myBooks.length === 0) {
+        if (myBooks.length === 0 && !afterId) {
             container.innerHTML = '<p class="empty-message">Você ainda não cadastrou nenhum livro.</p>';
             return;
         }
@@ -214,6 +245,15 @@ async function loadMyBooks() {
             `;
             container.appendChild(card);
         });
+        
+        if (nextCursor) {
+            const button = document.createElement('button');
+            button.id = 'my-books-load-more';
+            button.className = 'btn-secondary';
+            button.textContent = 'Carregar mais';
+            button.addEventListener('click', () => loadMyBooks(nextCursor));
+            container.appendChild(button);
+        }
     } catch (error) {
         console.error('Erro ao carregar meus livros:', error);
         showModal(`Erro ao carregar seus livros: ${error.message}`);
@@ -313,20 +353,32 @@ async function returnLoan(loanId) {
     }
 }
 
-async function loadMyLoans() {
+async function loadMyLoans(beforeId = null) {
     try {
-        const response = await fetch(`${API_URL}/loans/my_loans`, {
+        // expand=book,lender traz título, autor e dono junto, sem baixar o catálogo inteiro
+        const params = new URLSearchParams({ expand: 'book,lender', limit: 50 });
+        if (beforeId) {
+            params.set('before_id', beforeId);
+        }
+        const response = await fetch(`${API_URL}/loans/my_loans?${params}`, {
             headers: { 
                 'Authorization': `Bearer ${token}`
             }
         });
         
         const loans = await handleResponse(response);
+        const nextCursor = response.headers.get('X-Next-Cursor');
         
         const container = document.getElementById('loans-list');
-        container.innerHTML = ''; // Limpa o container
+        if (!beforeId) {
+            container.innerHTML = ''; // Limpa o container na primeira página
+        }
+        const loadMore = document.getElementById('loans-load-more');
+        if (loadMore) {
+            loadMore.remove();
+        }
         
-        if (loans.length === 0) {
+        if (loans.length === 0 && !beforeId) {
             container.innerHTML = '<p class="empty-message">Você não possui empréstimos ativos ou no histórico.</p>';
             return;
         }
@@ -349,7 +401,9 @@ async function loadMyLoans() {
             }
 
             card.innerHTML = `
-                <h3>Livro ID: ${loan.book_id}</h3>
+                <h3>${loan.book ? loan.book.title : `Livro ID: ${loan.book_id}`}</h3>
+                ${loan.book ? `<p><strong>Autor:</strong> ${loan.book.author}</p>` : ''}
+                ${loan.lender ? `<p><strong>Proprietário:</strong> ${loan.lender.name}</p>` : ''}
                 <p><strong>Status:</strong> ${statusText}</p>
                 <p><strong>Data de Início:</strong> ${loan.start_date || 'N/A'}</p>
                 <p><strong>Data de Devolução:</strong> ${loan.due_date || 'N/A'}</p>
@@ -357,6 +411,15 @@ async function loadMyLoans() {
             `;
             container.appendChild(card);
         });
+        
+        if (nextCursor) {
+            const button = document.createElement('button');
+            button.id = 'loans-load-more';
+            button.className = 'btn-secondary';
+            button.textContent = 'Carregar mais';
+            button.addEventListener('click', () => loadMyLoans(nextCursor));
+            container.appendChild(button);
+        }
     } catch (error) {
         console.error('Erro ao carregar empréstimos:', error);
         showModal(`Falha ao carregar empréstimos: ${error.message}`);